@@ -1,229 +1,474 @@
 import os
+import asyncio
 import logging
+import threading
 from dotenv import load_dotenv
-from solcx import compile_standard, install_solc
-from typing import Optional
-from cdp_langchain.agent_toolkits import CdpToolkit
-from cdp_langchain.utils import CdpAgentkitWrapper
-from cdp import Wallet  # Import for type hinting and place_bet
+from typing import TYPE_CHECKING, Callable, List, Optional
+from .contracts import load_artifact
+from .indexer import ChainIndexer
+from .market_reader import MarketReader
+from .rpc import JsonRpcClient
+from .telemetry import span
+from .tx_pipeline import TransactionPipeline, TxHandle
+
+if TYPE_CHECKING:
+    from cdp import Wallet  # Import for type hinting and place_bet
 
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+USDC_ABI = [
+    {"name": "approve", "inputs": [{"type": "address", "name": "spender"}, {"type": "uint256", "name": "amount"}], "outputs": [{"type": "bool"}], "type": "function"},
+    {"name": "allowance", "inputs": [{"type": "address", "name": "owner"}, {"type": "address", "name": "spender"}], "outputs": [{"type": "uint256"}], "type": "function"},
+    {"name": "balanceOf", "inputs": [{"type": "address", "name": "account"}], "outputs": [{"type": "uint256"}], "type": "function"},
+]
+
 
 class AgentService:
+    """
+    On-chain operations through a CDP wallet.
+
+    Construction only reads configuration. The CDP SDK is imported and the
+    wallet set up on first use, so building the service (and starting the
+    app) needs neither the SDK import time nor a reachable CDP API.
+    """
+
     def __init__(self):
+        # Get API key and private key from environment variables
+        self.api_key_name = os.getenv('CDP_API_KEY_NAME')
+        self.api_key_private_key = os.getenv('CDP_API_KEY_PRIVATE_KEY')
+        self.network_id = "base-sepolia"  # Or get from .env if you prefer
+        # Requesting testnet funds is slow and rate limited; opt in with AGENT_FAUCET=true
+        self.use_faucet = os.getenv("AGENT_FAUCET", "false").lower() == "true"
+
+        self._agentkit = None
+        self._tools = None
+        self._wallet_lock = threading.Lock()
+        self.faucet_status = "disabled" if not self.use_faucet else "pending"
+
+        # Set chain constants
+        self.usdc_address = "0x50c5725949A6F0c72E6C4a641F24049A917DB0Cb"
+        self.base_chain_id = 84532
+
+        # "contract" deploys a full PredictionMarket per market; "clone" creates
+        # EIP-1167 clones through MarketFactory, several per transaction. The
+        # factory is deployed on first use unless MARKET_FACTORY_ADDRESS is set.
+        self.deploy_mode = os.getenv("MARKET_DEPLOY_MODE", "contract").lower()
+        if self.deploy_mode not in ("contract", "clone"):
+            raise ValueError(f"MARKET_DEPLOY_MODE must be 'contract' or 'clone', got {self.deploy_mode!r}")
+        self.factory_address = os.getenv("MARKET_FACTORY_ADDRESS")
+        self.market_batch_size = int(os.getenv("MARKET_BATCH_SIZE", "20"))
+        self._factory_lock = asyncio.Lock()
+
+        # Batched JSON-RPC reads (BASE_RPC_URL can point at a local devnet)
+        self.rpc = JsonRpcClient()
+        self._market_reader = None
+
+        # Optional event indexer serving balance/market reads locally; like the
+        # wallet it is set up on first use (it may need to compile the ABI)
+        self.indexer_path = os.getenv("INDEXER_DB_PATH")
+        self._indexer = None
+        # Reads go over RPC while the indexer is more than this many blocks behind
+        self.indexer_max_lag = int(os.getenv("INDEXER_MAX_LAG", "20"))
+
+        # One transaction pipeline (local nonce counter) per sending address
+        self._pipelines = {}
+        # Gas limit for a buy sent while its approval is still pending,
+        # when the node cannot estimate it against the current state
+        self.bet_gas_limit = int(os.getenv("BET_GAS_LIMIT", "200000"))
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key_name and self.api_key_private_key)
+
+    @property
+    def wallet_ready(self) -> bool:
+        return self._agentkit is not None
+
+    @property
+    def agentkit(self):
+        """CDP Agentkit wrapper, created on first access."""
+        if self._agentkit is None:
+            with self._wallet_lock:
+                if self._agentkit is None:
+                    self._agentkit = self._init_agentkit()
+        return self._agentkit
+
+    def _init_agentkit(self):
         try:
-            # Get API key and private key from environment variables
-            api_key_name = os.getenv('CDP_API_KEY_NAME')
-            api_key_private_key = os.getenv('CDP_API_KEY_PRIVATE_KEY')
-            network_id = "base-sepolia"  # Or get from .env if you prefer
-
-            if not api_key_name or not api_key_private_key:
+            if not self.configured:
                 raise ValueError("CDP_API_KEY_NAME and CDP_API_KEY_PRIVATE_KEY must be set in .env")
 
+            # Imported here: the CDP SDKs are slow to import and only needed for on-chain work
+            from cdp_langchain.utils import CdpAgentkitWrapper
+
             # Pass API key and private key *directly* to CdpAgentkitWrapper
-            self.agentkit = CdpAgentkitWrapper(
-                api_key_name=api_key_name,
-                api_key_private_key=api_key_private_key,
-                network_id=network_id  # Good practice to include
+            agentkit = CdpAgentkitWrapper(
+                api_key_name=self.api_key_name,
+                api_key_private_key=self.api_key_private_key,
+                network_id=self.network_id  # Good practice to include
             )
-            self.wallet_data = self.agentkit.export_wallet()  # Get wallet data
-            logger.info(f"Wallet Data: {self.wallet_data}")
-
-            # Initialize CDP Agentkit Toolkit.
-            cdp_toolkit = CdpToolkit.from_cdp_agentkit_wrapper(self.agentkit)
-            self.tools = cdp_toolkit.get_tools()  # Get the tools, though we don't use them directly here
+            logger.info(f"Deployment Wallet Address: {agentkit.wallet.default_address}")
 
-            # We can access the underlying wallet through the agentkit.
-            self.wallet = self.agentkit.wallet
-            self.address = self.wallet.default_address
-            self.private_key = self.wallet.private_key  # access private key
-            logger.info(f"Deployment Wallet Address: {self.address}")
-
-            # Try to fund the wallet
+            # Load (or build once) the contract artifact so requests only do a lookup
             try:
-                faucet_tx = self.wallet.faucet()
-                faucet_tx.wait()
-                logger.info(f"Faucet transaction successful: {faucet_tx}")
+                load_artifact("PredictionMarket")
             except Exception as e:
-                logger.error(f"Faucet transaction failed: {e}")
+                logger.error(f"PredictionMarket artifact unavailable: {e}")
 
-            # Set chain constants
-            self.usdc_address = "0x50c5725949A6F0c72E6C4a641F24049A917DB0Cb"
-            self.base_chain_id = 84532
+            if self.use_faucet:
+                # Funding runs in the background; nothing waits on it
+                threading.Thread(target=self._request_faucet, args=(agentkit.wallet,), daemon=True).start()
+            return agentkit
 
         except Exception as e:
             logger.error(f"Error initializing AgentService: {e}")
             raise ValueError(f"Failed to initialize AgentService: {str(e)}")
 
-    def _compile_solidity(self, solidity_code: str, contract_name: str):
-        """Compiles Solidity code using py-solc-x."""
+    def _request_faucet(self, wallet):
         try:
-            install_solc('0.8.20')
-            compiled_sol = compile_standard(
-                {
-                    "language": "Solidity",
-                    "sources": {f"{contract_name}.sol": {"content": solidity_code}},
-                    "settings": {
-                        "outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}
-                    },
-                },
-                solc_version="0.8.20",
-            )
-            return compiled_sol
+            faucet_tx = wallet.faucet()
+            faucet_tx.wait()
+            self.faucet_status = "funded"
+            logger.info(f"Faucet transaction successful: {faucet_tx}")
         except Exception as e:
-            logger.error(f"Solidity compilation error: {e}")
-            raise
+            self.faucet_status = "failed"
+            logger.error(f"Faucet transaction failed: {e}")
+
+    async def ensure_wallet(self):
+        """Set up the wallet without blocking the event loop (e.g. from a warm-up task)."""
+        await asyncio.to_thread(lambda: self.agentkit)
+
+    @property
+    def wallet_data(self):
+        return self.agentkit.export_wallet()
+
+    @property
+    def tools(self) -> list:
+        """CDP Agentkit toolkit tools; not used directly here."""
+        if self._tools is None:
+            from cdp_langchain.agent_toolkits import CdpToolkit
+
+            self._tools = CdpToolkit.from_cdp_agentkit_wrapper(self.agentkit).get_tools()
+        return self._tools
+
+    @property
+    def wallet(self):
+        # We can access the underlying wallet through the agentkit.
+        return self.agentkit.wallet
+
+    @property
+    def address(self):
+        return self.wallet.default_address
+
+    @property
+    def private_key(self):
+        return self.wallet.private_key
+
+    @property
+    def _market_artifact(self) -> dict:
+        """ABI and bytecode of the market contract for the deploy mode, from the artifact cache."""
+        return load_artifact("PredictionMarketClone" if self.deploy_mode == "clone" else "PredictionMarket")
+
+    @property
+    def market_reader(self) -> MarketReader:
+        if self._market_reader is None:
+            self._market_reader = MarketReader(self.rpc, self._market_artifact["abi"])
+        return self._market_reader
+
+    @property
+    def indexer(self) -> Optional[ChainIndexer]:
+        """Event indexer when INDEXER_DB_PATH is set, created on first access; None otherwise."""
+        if self._indexer is None and self.indexer_path:
+            with self._wallet_lock:
+                if self._indexer is None:
+                    self._indexer = ChainIndexer(self.rpc, self.market_reader, self.indexer_path)
+        return self._indexer
+
+    def _current_indexer(self) -> Optional[ChainIndexer]:
+        """The indexer if it is following the chain within indexer_max_lag blocks, else None."""
+        if not self.indexer_path:
+            return None
+        lag = self.indexer.lag
+        return self.indexer if lag is not None and lag <= self.indexer_max_lag else None
+
+    async def follow_chain(self):
+        """Keep the indexer at the chain head; run as a background task when INDEXER_DB_PATH is set."""
+        # Creating the indexer may compile the market ABI; keep that off the event loop
+        indexer = await asyncio.to_thread(lambda: self.indexer)
+        start = os.getenv("INDEXER_START_BLOCK")
+        await indexer.run(int(start) if start else None)
+
+    async def close(self):
+        if self._indexer is not None:
+            self._indexer.close()
+        await self.rpc.close()
+
+    async def _block_number(self) -> int:
+        return int(await self.rpc.call("eth_blockNumber"), 16)
+
+    async def _index_markets(self, addresses: List[Optional[str]], from_block: int):
+        """Have the indexer follow newly created markets; reads use RPC until it does."""
+        addresses = [address for address in addresses if address]
+        if not addresses:
+            return
+        try:
+            await self.indexer.add_markets(addresses, from_block)
+        except Exception as e:
+            logger.error(f"Error registering {len(addresses)} markets with the indexer: {e}")
 
     async def create_market(self, market_data: dict) -> Optional[str]:
-        """Creates a market by deploying a smart contract."""
+        """Creates a market: a PredictionMarket deployment, or a clone in clone mode."""
+        if self.deploy_mode == "clone":
+            return (await self.create_markets([market_data]))[0]
+        from_block = None
+        if self.indexer_path:
+            try:
+                # The market's events start after this block
+                from_block = await self._block_number()
+            except Exception as e:
+                logger.error(f"Cannot read block number; new market will be read over RPC: {e}")
         try:
-            # Get the contract code and compile it
-            solidity_code = self._get_prediction_market_contract()
-            contract_name = "PredictionMarket"
-            compiled_sol = self._compile_solidity(solidity_code, contract_name)
-
-            if not compiled_sol:
-                return None
 
             # Get contract interface
-            contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
-            abi = contract_interface["abi"]
-            bytecode = contract_interface["evm"]["bytecode"]["object"]
+            abi = self._market_artifact["abi"]
+            bytecode = self._market_artifact["bytecode"]
 
             # Convert prices to the correct decimal format
             yes_price_decimal = int(market_data["yesPrice"] * (10**18))
             no_price_decimal = int(market_data["noPrice"] * (10**18))
 
             # Deploy the contract using the agentkit's wallet
-            contract = self.wallet.deploy_contract(
-                abi=abi,
-                bytecode=bytecode,
-                constructor_args=[
-                    market_data["question"],
-                    int(market_data["endTimestamp"]),
-                    self.usdc_address,
-                    yes_price_decimal,
-                    no_price_decimal
-                ],
-            ).wait()
+            with span("chain_deploy"):
+                contract = self.wallet.deploy_contract(
+                    abi=abi,
+                    bytecode=bytecode,
+                    constructor_args=[
+                        market_data["question"],
+                        int(market_data["endTimestamp"]),
+                        self.usdc_address,
+                        yes_price_decimal,
+                        no_price_decimal
+                    ],
+                ).wait()
 
             logger.info(f"Deployed market contract at: {contract.contract_address}")
+            if from_block is not None:
+                await self._index_markets([contract.contract_address], from_block)
             return contract.contract_address
 
         except Exception as e:
             logger.error(f"Error creating market: {e}")
             return None
-    async def place_bet(self, market_address: str, outcome: str, amount: float, user_wallet: Wallet) -> bool:
-        """Places a bet (buyYes or buyNo)."""
-        try:
-            solidity_code = self._get_prediction_market_contract()
-            contract_name = "PredictionMarket"
-            compiled_sol = self._compile_solidity(solidity_code, contract_name)
-            contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
-            abi = contract_interface["abi"]
 
-            # Load contracts
-            contract = user_wallet.load_contract(address=market_address, abi=abi) # use user wallet
-            amount_decimal = int(amount * (10**6))  # USDC has 6 decimals
+    async def create_markets(self, markets: List[dict]) -> List[Optional[str]]:
+        """
+        Creates many markets. In clone mode they are created in batches of
+        MARKET_BATCH_SIZE per createMarkets transaction, sent back-to-back
+        and confirmed concurrently; otherwise each market is deployed in turn.
+        :param markets: Dicts with question, endTimestamp, yesPrice and noPrice
+        :return: One market address per input, in order; None where creation failed
+        """
+        if self.deploy_mode != "clone":
+            return [await self.create_market(market) for market in markets]
 
-            # Approve USDC transfer
-            usdc_contract = user_wallet.load_contract(address=self.usdc_address, abi=[
-                {"name": "approve", "inputs": [{"type": "address", "name": "spender"}, {"type": "uint256", "name": "amount"}], "outputs": [{"type": "bool"}], "type": "function"},
-                {"name": "balanceOf", "inputs": [{"type": "address", "name": "account"}], "outputs": [{"type": "uint256"}], "type": "function"},
-            ])
+        try:
+            factory = await self._factory()
+        except Exception as e:
+            logger.error(f"Error loading market factory: {e}")
+            return [None] * len(markets)
 
-            # Check balance and approve
-            current_balance = usdc_contract.functions.balanceOf(user_wallet.address).call()
-            logger.info(f"Current USDC balance: {current_balance}")
+        pipeline = self._pipeline_for(self.wallet)
+        batches = []
+        for start in range(0, len(markets), self.market_batch_size):
+            chunk = markets[start:start + self.market_batch_size]
+            try:
+                handle = await pipeline.submit(factory.functions.createMarkets(
+                    [market["question"] for market in chunk],
+                    [int(market["endTimestamp"]) for market in chunk],
+                    [int(market["yesPrice"] * (10**18)) for market in chunk],
+                    [int(market["noPrice"] * (10**18)) for market in chunk]
+                ), label=f"createMarkets x{len(chunk)}")
+            except Exception as e:
+                logger.error(f"Error submitting createMarkets: {e}")
+                handle = None
+            batches.append((chunk, handle))
+
+        with span("chain_deploy", markets=len(markets)):
+            await asyncio.gather(*(handle.wait() for _, handle in batches if handle is not None))
+
+        from web3.logs import DISCARD
+
+        addresses = []
+        for chunk, handle in batches:
+            created = []
+            if handle is not None and handle.status == "confirmed":
+                # MarketCreated events are emitted in input order
+                events = factory.events.MarketCreated().process_receipt(handle.receipt, errors=DISCARD)
+                created = [event["args"]["market"] for event in events]
+            if len(created) != len(chunk):
+                reason = "submission failed" if handle is None else handle.error or "missing MarketCreated events"
+                logger.error(f"createMarkets created {len(created)} of {len(chunk)} markets: {reason}")
+                created = [None] * len(chunk)
+            addresses.extend(created)
+        logger.info(f"Created {sum(1 for a in addresses if a)} of {len(markets)} market clones in {len(batches)} transactions")
+        if self.indexer_path:
+            blocks = [handle.receipt["blockNumber"] for _, handle in batches if handle is not None and handle.receipt]
+            if blocks:
+                await self._index_markets(addresses, min(blocks))
+        return addresses
+
+    async def _factory(self):
+        """MarketFactory contract, deployed (with its implementation) on first use if no address is configured."""
+        async with self._factory_lock:
+            if self.factory_address is None:
+                implementation = load_artifact("PredictionMarketClone")
+                factory = load_artifact("MarketFactory")
+                with span("chain_deploy", contract="MarketFactory"):
+                    implementation_address = (await asyncio.to_thread(lambda: self.wallet.deploy_contract(
+                        abi=implementation["abi"], bytecode=implementation["bytecode"], constructor_args=[]
+                    ).wait())).contract_address
+                    self.factory_address = (await asyncio.to_thread(lambda: self.wallet.deploy_contract(
+                        abi=factory["abi"], bytecode=factory["bytecode"],
+                        constructor_args=[implementation_address, self.usdc_address]
+                    ).wait())).contract_address
+                logger.info(f"Deployed MarketFactory at {self.factory_address}; "
+                            f"set MARKET_FACTORY_ADDRESS to reuse it")
+            return self.wallet.load_contract(address=self.factory_address, abi=load_artifact("MarketFactory")["abi"])
+
+    def _pipeline_for(self, wallet) -> TransactionPipeline:
+        address = wallet.address
+        if address not in self._pipelines:
+            self._pipelines[address] = TransactionPipeline(wallet.w3, address, self.base_chain_id, self.rpc)
+        return self._pipelines[address]
+
+    async def place_bet(
+        self,
+        market_address: str,
+        outcome: str,
+        amount: float,
+        user_wallet: "Wallet",
+        on_status: Callable[[TxHandle], None] = None
+    ) -> Optional[TxHandle]:
+        """
+        Places a bet (buyYes or buyNo) without waiting for confirmation.
+        Returns a handle for the buy transaction (await handle.wait() for the
+        receipt, or pass on_status), or None if submission failed.
+        """
+        try:
+            if outcome.lower() not in ("yes", "no"):
+                raise ValueError("Invalid outcome")
 
-            approval_tx = usdc_contract.functions.approve(market_address, amount_decimal).transact(chain_id=self.base_chain_id)
-            approval_receipt = user_wallet.w3.eth.wait_for_transaction_receipt(approval_tx)
-            logger.info(f"USDC approval transaction: {approval_receipt}")
+            abi = self._market_artifact["abi"]
 
-            # Place bet
+            # Load contracts
+            contract = user_wallet.load_contract(address=market_address, abi=abi) # use user wallet
+            usdc_contract = user_wallet.load_contract(address=self.usdc_address, abi=USDC_ABI)
+            amount_decimal = int(amount * (10**6))  # USDC has 6 decimals
+            pipeline = self._pipeline_for(user_wallet)
+
+            # Repeat bettors usually have allowance left; skip approve when they do
+            with span("chain_read", call="allowance"):
+                allowance = await asyncio.to_thread(
+                    usdc_contract.functions.allowance(user_wallet.address, market_address).call
+                )
+            buy_gas = None
+            if allowance < amount_decimal:
+                await pipeline.submit(
+                    usdc_contract.functions.approve(market_address, amount_decimal),
+                    label="approve"
+                )
+                # Gas estimation would run against state without the approval
+                buy_gas = self.bet_gas_limit
+
+            # Place bet with the next nonce, right behind the approval
             if outcome.lower() == "yes":
-                tx_hash = contract.functions.buyYes(amount_decimal).transact(chain_id=self.base_chain_id)
-            elif outcome.lower() == "no":
-                tx_hash = contract.functions.buyNo(amount_decimal).transact(chain_id=self.base_chain_id)
+                buy = contract.functions.buyYes(amount_decimal)
             else:
-                raise ValueError("Invalid outcome")
-
-            receipt = user_wallet.w3.eth.wait_for_transaction_receipt(tx_hash)
-            logger.info(f"{outcome.capitalize()} purchase transaction receipt: {receipt}")
-            return True
+                buy = contract.functions.buyNo(amount_decimal)
+            return await pipeline.submit(buy, label=f"buy{outcome.capitalize()}", gas=buy_gas, on_status=on_status)
 
         except Exception as e:
             logger.error(f"Error placing bet: {e}")
-            return False
+            return None
 
     async def resolve_market(self, market_address: str, winning_outcome: str) -> bool:
         """Resolves a market."""
         try:
-            solidity_code = self._get_prediction_market_contract()
-            contract_name = "PredictionMarket"
-            compiled_sol = self._compile_solidity(solidity_code, contract_name)
-            contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
-            abi = contract_interface["abi"]
+            abi = self._market_artifact["abi"]
 
             contract = self.wallet.load_contract(address=market_address, abi=abi) # use agentkit wallet
             outcome_bool = winning_outcome.lower() == "yes"
-            tx_hash = contract.functions.resolve(outcome_bool).transact(chain_id=self.base_chain_id)
-            receipt = self.wallet.w3.eth.wait_for_transaction_receipt(tx_hash)
-            logger.info(f"Resolve transaction receipt: {receipt}")
-            return True
+            handle = await self._pipeline_for(self.wallet).submit(contract.functions.resolve(outcome_bool), label="resolve")
+            receipt = await handle.wait()
+            logger.info(f"Resolve transaction {handle.tx_hash} {handle.status} in block "
+                        f"{receipt['blockNumber'] if receipt else None}")
+            return handle.status == "confirmed"
 
         except Exception as e:
             logger.error(f"Error resolving market: {e}")
             return False
+
+    async def resolve_markets(self, resolutions: List[tuple]) -> List[Optional[TxHandle]]:
+        """
+        Submits resolve transactions for many markets back-to-back without
+        waiting for receipts
+        :param resolutions: List of (market_address, winning_outcome) tuples
+        :return: One TxHandle per market (None where submission failed)
+        """
+        abi = self._market_artifact["abi"]
+        pipeline = self._pipeline_for(self.wallet)
+        handles = []
+        for market_address, winning_outcome in resolutions:
+            try:
+                contract = self.wallet.load_contract(address=market_address, abi=abi)
+                handles.append(await pipeline.submit(
+                    contract.functions.resolve(winning_outcome.lower() == "yes"),
+                    label=f"resolve {market_address}"
+                ))
+            except Exception as e:
+                logger.error(f"Error submitting resolve for {market_address}: {e}")
+                handles.append(None)
+        return handles
+
     async def get_market_details(self, market_address: str):
         """Gets market details."""
         try:
-            solidity_code = self._get_prediction_market_contract()
-            contract_name = "PredictionMarket"
-            compiled_sol = self._compile_solidity(solidity_code, contract_name)
-            contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
-            abi = contract_interface["abi"]
-
-            contract = self.wallet.load_contract(address=market_address, abi=abi) # use agentkit wallet
-
-            # Get contract details
-            question = contract.functions.question().call()
-            endTime = contract.functions.endTime().call()
-            resolved = contract.functions.resolved().call()
-            yesPrice = contract.functions.yesPrice().call() / (10**18)
-            noPrice = contract.functions.noPrice().call() / (10**18)
-            creator = contract.functions.creator().call()
-
-            details = {
-                "question": question,
-                "endTime": endTime,
-                "resolved": resolved,
-                "yesPrice": yesPrice,
-                "noPrice": noPrice,
-                "creator": creator
-            }
-
-            logger.info(f"Market details: {details}")
+            indexer = self._current_indexer()
+            details = indexer.get_market_details(market_address) if indexer else None
+            if details is None:
+                details = (await self.market_reader.get_market_details_many([market_address]))[0]
+            logger.debug(f"Market details: {details}")
             return details
 
         except Exception as e:
             logger.error(f"Error getting market details: {e}")
             return None
 
+    async def get_market_details_many(self, market_addresses: List[str]) -> List[Optional[dict]]:
+        """Gets details for many markets using batched RPC reads."""
+        try:
+            return await self.market_reader.get_market_details_many(market_addresses)
+
+        except Exception as e:
+            logger.error(f"Error getting details for {len(market_addresses)} markets: {e}")
+            return [None] * len(market_addresses)
+
     async def get_user_balance(self, market_address: str, user_address: str):
         """Gets user yes/no balance."""
         try:
-            solidity_code = self._get_prediction_market_contract()
-            contract_name = "PredictionMarket"
-            compiled_sol = self._compile_solidity(solidity_code, contract_name)
-            contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
-            abi = contract_interface["abi"]
+            indexer = self._current_indexer()
+            if indexer:
+                indexed = indexer.get_user_balance(market_address, user_address)
+                if indexed is not None:
+                    return indexed
+
+            abi = self._market_artifact["abi"]
 
             contract = self.wallet.load_contract(address=market_address, abi=abi) # use agentkit wallet
-            yes_balance, no_balance = contract.functions.getBalance(user_address).call()
+            with span("chain_read", call="getBalance"):
+                yes_balance, no_balance = contract.functions.getBalance(user_address).call()
 
             return {
                 "yesBalance": yes_balance,
@@ -233,66 +478,3 @@ class AgentService:
         except Exception as e:
             logger.error(f"Error getting user balance: {e}")
             return None
-    def _get_prediction_market_contract(self) -> str:
-        """Returns the Solidity code for the prediction market contract."""
-        return """
-        // SPDX-License-Identifier: MIT
-        pragma solidity ^0.8.20;
-        contract PredictionMarket {
-            string public question;
-            uint256 public endTime;
-            address public creator;
-            address public usdcToken;
-            bool public resolved;
-            bool public outcome;
-            uint256 public yesPrice;
-            uint256 public noPrice;
-            mapping(address => uint256) public yesBalances;
-            mapping(address => uint256) public noBalances;
-
-            constructor(string memory _question, uint256 _endTime, address _usdcToken, uint256 _yesPrice, uint256 _noPrice) {
-                question = _question;
-                endTime = _endTime;
-                creator = msg.sender;
-                usdcToken = _usdcToken;
-                yesPrice = _yesPrice;
-                noPrice = _noPrice;
-                resolved = false;
-            }
-
-            function buyYes(uint256 amount) public {
-                require(block.timestamp < endTime, "Market has ended.");
-                require(!resolved, "Market has been resolved.");
-                uint256 cost = amount * yesPrice;
-                IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
-                yesBalances[msg.sender] += amount;
-            }
-
-            function buyNo(uint256 amount) public {
-                require(block.timestamp < endTime, "Market has ended.");
-                require(!resolved, "Market has been resolved.");
-                uint256 cost = amount * noPrice;
-                IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
-                noBalances[msg.sender] += amount;
-            }
-
-            function resolve(bool _outcome) public {
-                require(msg.sender == creator, "Only creator can resolve.");
-                require(block.timestamp >= endTime, "Market has not ended.");
-                require(!resolved, "Market has already been resolved.");
-                resolved = true;
-                outcome = _outcome;
-            }
-
-            function getBalance(address user) public view returns (uint256 yes, uint256 no) {
-                return (yesBalances[user], noBalances[user]);
-            }
-        }
-
-        interface IERC20 {
-            function transferFrom(address sender, address recipient, uint256 amount) external returns (bool);
-            function transfer(address recipient, uint256 amount) external returns (bool);
-            function balanceOf(address account) external view returns (uint256);
-            function approve(address spender, uint256 amount) external returns (bool);
-        }
-        """
\ No newline at end of file
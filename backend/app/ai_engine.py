@@ -1,8 +1,16 @@
-from openai import AzureOpenAI
 from .price_service import PriceService
+from .prediction_cache import PredictionCache
+from .resilience import BulkheadFullError, CircuitBreaker, register
+from .llm_output import (
+    BinaryPrediction, OutputParseError, PricePrediction, parse_batch_output, parse_output, repair_prompt
+)
+from .telemetry import span
 import os
+import asyncio
+import random
+import threading
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import json
 import logging
 from datetime import datetime, timedelta
 
@@ -12,114 +20,457 @@ logger = logging.getLogger(__name__)
 
 class AIPredictionEngine:
     def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+        # The openai SDK is slow to import; the client is built on first use (or by warm_up)
+        self._client = None
+        self._client_lock = threading.Lock()
         self.deployment = os.getenv("AZURE_OPENAI_DEPLOYMENT")
         self.price_service = PriceService()
 
-    async def generate_binary_market(self, asset: str, target_price: float = None, duration_days: int = 1) -> dict:
+        self.llm_timeout = float(os.getenv("LLM_TIMEOUT", "30"))
+        self.llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.llm_retry_backoff = float(os.getenv("LLM_RETRY_BACKOFF", "0.5"))
+        self.llm_semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "16")))
+        # Calls waiting for the semaphore beyond this fail fast with BulkheadFullError
+        # instead of piling up behind a slow LLM; 0 means no limit
+        self.llm_max_queued = int(os.getenv("LLM_MAX_QUEUED", "48")) or None
+        self._llm_queued = 0
+        # Fail fast while Azure OpenAI is down (LLM_BREAKER_*). The breaker only sees
+        # calls holding the semaphore, so its LLM_MAX_IN_FLIGHT bulkhead is just a
+        # backstop above LLM_MAX_CONCURRENCY
+        self.llm_breaker = register(CircuitBreaker.from_env("llm", "LLM", is_failure=self._is_retryable))
+        # While it is, reuse expired predictions up to this old for the same market state
+        self.degraded_max_age = float(os.getenv("PREDICTION_DEGRADED_MAX_AGE", "3600"))
+        self.bulk_concurrency = int(os.getenv("BULK_MAX_CONCURRENCY", "8"))
+        # Ask for JSON mode; disable for deployments that reject response_format
+        self.json_mode = os.getenv("LLM_JSON_MODE", "true").lower() == "true"
+        self.llm_repair_attempts = int(os.getenv("LLM_REPAIR_ATTEMPTS", "1"))
+        # Markets scored per completion in bulk generation; larger batches send
+        # the system prompt less often but take longer to answer. 1 disables batching.
+        self.llm_batch_size = max(1, int(os.getenv("LLM_BATCH_SIZE", "8")))
+        self.llm_stats = {
+            "requests": 0, "completions": 0, "retries": 0, "fast_path": 0,
+            "extracted": 0, "invalid": 0, "repairs": 0, "failures": 0,
+            "batches": 0, "batch_entries": 0, "batch_fallbacks": 0, "degraded": 0, "fallbacks": 0, "shed": 0
+        }
+
+        # Reuse completions while the quantized market state is unchanged
+        self.prediction_cache = PredictionCache(
+            ttl=float(os.getenv("PREDICTION_CACHE_TTL", "300")),
+            max_entries=int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "1024")),
+            path=os.getenv("PREDICTION_CACHE_PATH") or None
+        )
+
+    @property
+    def client(self):
+        """Azure OpenAI client, created (and the SDK imported) on first access."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from openai import AsyncAzureOpenAI
+
+                    # Retries are handled in _complete so they share the concurrency limit
+                    self._client = AsyncAzureOpenAI(
+                        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+                        max_retries=0
+                    )
+        return self._client
+
+    @property
+    def llm_ready(self) -> bool:
+        return self._client is not None
+
+    def warm_up(self):
+        """Import the SDK and build the client ahead of the first request; safe to run in a thread."""
+        try:
+            self.client
+        except Exception as e:
+            logger.error(f"LLM client unavailable: {e}")
+
+    async def close(self):
+        """Close the LLM and price service HTTP clients."""
+        if self._client is not None:
+            await self._client.close()
+        await self.price_service.close()
+        self.prediction_cache.close()
+
+    @staticmethod
+    def _is_retryable(error: BaseException) -> bool:
+        from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+        if isinstance(error, (APITimeoutError, APIConnectionError)):
+            return True
+        return isinstance(error, APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+    @asynccontextmanager
+    async def _llm_slot(self):
+        """Hold an LLM_MAX_CONCURRENCY slot, or raise BulkheadFullError if too many calls already wait for one."""
+        if self.llm_semaphore.locked() and self.llm_max_queued and self._llm_queued >= self.llm_max_queued:
+            self.llm_stats["shed"] += 1
+            raise BulkheadFullError("llm", f"has {self._llm_queued} calls queued")
+        self._llm_queued += 1
+        try:
+            await self.llm_semaphore.acquire()
+        finally:
+            self._llm_queued -= 1
+        try:
+            yield
+        finally:
+            self.llm_semaphore.release()
+
+    async def _complete(self, messages: list, **kwargs):
         """
-        Generates a binary market prediction for whether an asset will reach a target price
+        Run a chat completion under the concurrency limit, retrying with
+        exponential backoff on timeouts, connection errors, 429 and 5xx
         """
-        try:
-            # Get market data
-            market_data = await self.price_service.get_market_data(asset)
+        params = {"max_tokens": 800, "temperature": 0.7, "top_p": 0.95}
+        params.update(kwargs)
+        attempt = 0
+        while True:
+            try:
+                # Queue for a local slot first so the breaker only times (and counts)
+                # calls that are actually in flight to the LLM
+                async with self._llm_slot(), self.llm_breaker.guard():
+                    with span("llm_call", attempt=attempt):
+                        return await self.client.chat.completions.create(
+                            model=self.deployment,
+                            messages=messages,
+                            timeout=self.llm_timeout,
+                            **params
+                        )
+            except Exception as e:
+                if attempt >= self.llm_max_retries or not self._is_retryable(e):
+                    raise
+                self.llm_stats["retries"] += 1
+                delay = self.llm_retry_backoff * (2 ** attempt) * (1 + random.random())
+                logger.warning(f"LLM call failed ({e}); retrying in {delay:.2f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _complete_structured(self, messages: list, schema):
+        """
+        Run a completion and validate it against a Pydantic schema. Replies
+        wrapped in prose or code fences are extracted; a reply that is still
+        unusable gets a short repair prompt, up to LLM_REPAIR_ATTEMPTS times.
+        :raises OutputParseError: if no reply could be validated
+        """
+        self.llm_stats["requests"] += 1
+        params = {"response_format": {"type": "json_object"}} if self.json_mode else {}
+        for attempt in range(self.llm_repair_attempts + 1):
+            completion = await self._complete(messages, **params)
+            self.llm_stats["completions"] += 1
+            text = completion.choices[0].message.content
+            try:
+                with span("parse"):
+                    result, fast_path = parse_output(text, schema)
+            except OutputParseError as e:
+                self.llm_stats["invalid"] += 1
+                if attempt == self.llm_repair_attempts:
+                    self.llm_stats["failures"] += 1
+                    raise
+                logger.warning(f"Unusable LLM reply ({e}); asking for a repair")
+                self.llm_stats["repairs"] += 1
+                messages = messages + [
+                    {"role": "assistant", "content": text or ""},
+                    {"role": "user", "content": repair_prompt(e, schema)}
+                ]
+                # Repairs should reformat the answer, not re-sample it
+                params["temperature"] = 0
+                continue
+            self.llm_stats["fast_path" if fast_path else "extracted"] += 1
+            return result
+
+    def llm_output_stats(self) -> dict:
+        """Counters plus parse failure, repair and retry rates."""
+        stats = self.llm_stats
+        return dict(
+            stats,
+            parseFailureRate=stats["invalid"] / stats["completions"] if stats["completions"] else 0.0,
+            repairRate=stats["repairs"] / stats["requests"] if stats["requests"] else 0.0,
+            failureRate=stats["failures"] / stats["requests"] if stats["requests"] else 0.0,
+            retryRate=stats["retries"] / stats["completions"] if stats["completions"] else 0.0,
+            batchFallbackRate=stats["batch_fallbacks"] / stats["batch_entries"] if stats["batch_entries"] else 0.0
+        )
+
+    def _build_binary_prompt(self, asset: str, target_price: float, duration_days: int, market_data: dict) -> list:
+        """Build the chat messages for a binary market prediction."""
+        current_price = market_data['current_price']
+        price_difference_percent = ((target_price - current_price) / current_price) * 100
+        return [
+            {
+                "role": "system",
+                "content": """You are a professional crypto trading AI analyzing market conditions.
+                Based on the provided market data, estimate the probability of the asset reaching
+                the target price within the specified timeframe. Consider market momentum,
+                volume, and historical volatility.
+                Format your response as JSON with fields:
+                - yesProbability: float between 0 and 1
+                - noProbability: float between 0 and 1 (must sum to 1 with yesProbability)
+                - confidence: float between 0 and 1
+                - reasoning: string explaining the prediction"""
+            },
+            {
+                "role": "user",
+                "content": f"""Analyze the probability of {asset} reaching ${target_price:,.2f} 
+                (a {price_difference_percent:,.1f}% change) within {duration_days} days.
+                
+                Current market data:
+                Current Price: ${current_price:,.2f}
+                24h Change: {market_data['percent_change_24h']}%
+                7d Change: {market_data['percent_change_7d']}%
+                24h Volume: ${market_data['volume_24h']:,.2f}
+                Market Cap: ${market_data['market_cap']:,.2f}"""
+            }
+        ]
+
+    def _build_batch_prompt(self, items: list) -> list:
+        """
+        Build one set of chat messages scoring several binary markets
+        :param items: (id, asset, target_price, duration_days, market_data) tuples
+        """
+        sections = []
+        for item_id, asset, target_price, duration_days, market_data in items:
             current_price = market_data['current_price']
-            
-            # If target_price is None, set it to a default value (e.g., 5% above current price)
-            if target_price is None:
-                target_price = current_price * 1.05  # 5% above current price
-            
-            # Calculate price difference percentage
             price_difference_percent = ((target_price - current_price) / current_price) * 100
-            
-            # Build prompt for binary prediction
-            prompt = [
-                {
-                    "role": "system",
-                    "content": """You are a professional crypto trading AI analyzing market conditions.
-                    Based on the provided market data, estimate the probability of the asset reaching
-                    the target price within the specified timeframe. Consider market momentum,
-                    volume, and historical volatility.
-                    Format your response as JSON with fields:
-                    - yesProbability: float between 0 and 1
-                    - noProbability: float between 0 and 1 (must sum to 1 with yesProbability)
-                    - confidence: float between 0 and 1
-                    - reasoning: string explaining the prediction"""
-                },
-                {
-                    "role": "user",
-                    "content": f"""Analyze the probability of {asset} reaching ${target_price:,.2f} 
-                    (a {price_difference_percent:,.1f}% change) within {duration_days} days.
-                    
-                    Current market data:
-                    Current Price: ${current_price:,.2f}
-                    24h Change: {market_data['percent_change_24h']}%
-                    7d Change: {market_data['percent_change_7d']}%
-                    24h Volume: ${market_data['volume_24h']:,.2f}
-                    Market Cap: ${market_data['market_cap']:,.2f}"""
-                }
-            ]
-
-            completion = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=prompt,
-                max_tokens=800,
-                temperature=0.7,
-                top_p=0.95
+            sections.append(
+                f"id: {item_id}\n"
+                f"Probability of {asset} reaching ${target_price:,.2f} "
+                f"(a {price_difference_percent:,.1f}% change) within {duration_days} days.\n"
+                f"Current Price: ${current_price:,.2f}\n"
+                f"24h Change: {market_data['percent_change_24h']}%\n"
+                f"7d Change: {market_data['percent_change_7d']}%\n"
+                f"24h Volume: ${market_data['volume_24h']:,.2f}\n"
+                f"Market Cap: ${market_data['market_cap']:,.2f}"
             )
+        return [
+            {
+                "role": "system",
+                "content": """You are a professional crypto trading AI analyzing market conditions.
+                For each market below, estimate the probability of the asset reaching
+                the target price within the specified timeframe. Consider market momentum,
+                volume, and historical volatility. Judge each market independently.
+                Format your response as a JSON object {"predictions": [...]} with one entry
+                per market, in the order given, with fields:
+                - id: the market's id
+                - yesProbability: float between 0 and 1
+                - noProbability: float between 0 and 1 (must sum to 1 with yesProbability)
+                - confidence: float between 0 and 1
+                - reasoning: one or two sentences explaining the prediction"""
+            },
+            {"role": "user", "content": "\n\n".join(sections)}
+        ]
 
-            # Parse the AI response
-            response_text = completion.choices[0].message.content
-            prediction_data = json.loads(response_text)
-            
-            # Calculate end timestamp
-            end_timestamp = datetime.now() + timedelta(days=duration_days)
-            
-            # Create market structure
-            market = {
-                "asset": asset,
-                "predictorType": "AI",
-                "question": f"Will {asset} reach ${target_price:,.2f} by {end_timestamp.strftime('%Y-%m-%d')}?",
-                "currentPrice": current_price,
-                "targetPrice": target_price,
-                "endTimestamp": end_timestamp.timestamp(),
-                "yesPrice": prediction_data["yesProbability"],
-                "noPrice": prediction_data["noProbability"],
-                "confidence": prediction_data["confidence"],
-                "reasoning": prediction_data["reasoning"],
-                "marketData": market_data,
-                "totalLiquidity": 1000.0,  # Initial liquidity pool
-                "yesLiquidity": 1000.0 * prediction_data["yesProbability"],
-                "noLiquidity": 1000.0 * prediction_data["noProbability"]
-            }
+    async def _predict_binary_batch(self, items: list) -> dict:
+        """
+        Probabilities for several binary markets from one completion; cached
+        entries are served without asking the LLM
+        :param items: (key, asset, target_price, duration_days, market_data) tuples
+        :return: Prediction dicts by key; keys whose entry was missing or invalid are left out
+        """
+        results = {}
+        misses = []
+        for key, asset, target_price, duration_days, market_data in items:
+            current_price = market_data['current_price']
+            price_difference_percent = ((target_price - current_price) / current_price) * 100
+            cache_key = self.prediction_cache.make_key(asset, duration_days, market_data, price_difference_percent)
+            cached = self.prediction_cache.get(cache_key)
+            if cached is not None:
+                results[key] = cached
+            else:
+                misses.append((key, asset, target_price, duration_days, market_data, cache_key))
+        # A lone miss is cheaper with the single-market prompt
+        if len(misses) < 2:
+            return results
 
-            logger.info(f"Generated binary market for {asset}: {market}")
-            return market
+        # Short positional ids keep the prompt small and are easy to echo back
+        ids = [str(i + 1) for i in range(len(misses))]
+        with span("prompt_build"):
+            prompt = self._build_batch_prompt([(item_id, *miss[1:5]) for item_id, miss in zip(ids, misses)])
+        params = {"max_tokens": 200 + 150 * len(misses)}
+        if self.json_mode:
+            params["response_format"] = {"type": "json_object"}
+        self.llm_stats["batches"] += 1
+        self.llm_stats["batch_entries"] += len(misses)
+        completion = await self._complete(prompt, **params)
+        self.llm_stats["completions"] += 1
+        try:
+            with span("parse", markets=len(misses)):
+                parsed = parse_batch_output(completion.choices[0].message.content, BinaryPrediction, ids)
+        except OutputParseError as e:
+            logger.warning(f"Unusable batched LLM reply ({e})")
+            parsed = {}
+        for item_id, miss in zip(ids, misses):
+            prediction = parsed.get(item_id)
+            if prediction is None:
+                continue
+            prediction_data = prediction.model_dump()
+            self.prediction_cache.set(miss[5], prediction_data)
+            results[miss[0]] = prediction_data
+        self.llm_stats["batch_fallbacks"] += len(misses) - len(parsed)
+        return results
+
+    def _build_market(self, asset: str, target_price: float, duration_days: int, market_data: dict,
+                      prediction_data: dict) -> dict:
+        """Binary market structure for a prediction."""
+        current_price = market_data['current_price']
+        end_timestamp = datetime.now() + timedelta(days=duration_days)
+        market = {
+            "asset": asset,
+            "predictorType": "AI",
+            "question": f"Will {asset} reach ${target_price:,.2f} by {end_timestamp.strftime('%Y-%m-%d')}?",
+            "currentPrice": current_price,
+            "targetPrice": target_price,
+            "endTimestamp": end_timestamp.timestamp(),
+            "yesPrice": prediction_data["yesProbability"],
+            "noPrice": prediction_data["noProbability"],
+            "confidence": prediction_data["confidence"],
+            "reasoning": prediction_data["reasoning"],
+            "marketData": market_data,
+            "totalLiquidity": 1000.0,  # Initial liquidity pool
+            "yesLiquidity": 1000.0 * prediction_data["yesProbability"],
+            "noLiquidity": 1000.0 * prediction_data["noProbability"]
+        }
+        logger.info(f"Generated binary market for {asset}: yes={market['yesPrice']:.3f} "
+                    f"target=${target_price:,.2f}")
+        return market
+
+    async def generate_binary_market(self, asset: str, target_price: float = None, duration_days: int = 1,
+                                     market_data: dict = None) -> dict:
+        """
+        Generates a binary market prediction for whether an asset will reach a target price
+        :param market_data: Pre-fetched market data for the asset; fetched when omitted
+        """
+        # Get market data (the last known quote while CoinMarketCap is unavailable);
+        # without any price there is no market to create, so errors propagate
+        if market_data is None:
+            market_data = await self.price_service.get_market_data(asset)
+        current_price = market_data['current_price']
+
+        # If target_price is None, set it to a default value (e.g., 5% above current price)
+        if target_price is None:
+            target_price = current_price * 1.05  # 5% above current price
+
+        # Calculate price difference percentage
+        price_difference_percent = ((target_price - current_price) / current_price) * 100
+
+        cache_key = self.prediction_cache.make_key(asset, duration_days, market_data, price_difference_percent)
+        degraded = False
+        try:
+            prediction_data = self.prediction_cache.get(cache_key)
+            if prediction_data is None:
+                with span("prompt_build"):
+                    prompt = self._build_binary_prompt(asset, target_price, duration_days, market_data)
+                prediction = await self._complete_structured(prompt, BinaryPrediction)
+                prediction_data = prediction.model_dump()
+                self.prediction_cache.set(cache_key, prediction_data)
 
         except Exception as e:
             logger.error(f"Error generating binary market: {e}")
-            # Fallback prediction
-            end_timestamp = datetime.now() + timedelta(days=duration_days)
-            return {
-                "asset": asset,
-                "predictorType": "AI",
-                "question": f"Will {asset} reach ${target_price:,.2f} by {end_timestamp.strftime('%Y-%m-%d')}?",
-                "currentPrice": current_price,
-                "targetPrice": target_price,
-                "endTimestamp": end_timestamp.timestamp(),
-                "yesPrice": 0.5,
-                "noPrice": 0.5,
-                "confidence": 0.6,
-                "reasoning": "Fallback prediction due to error. Using neutral 50-50 probability.",
-                "marketData": market_data,
-                "totalLiquidity": 1000.0,
-                "yesLiquidity": 500.0,
-                "noLiquidity": 500.0
-            }
+            degraded = True
+            # Degraded: an expired prediction for the same market state, else neutral odds
+            prediction_data = self.prediction_cache.get_stale(cache_key, self.degraded_max_age)
+            if prediction_data is not None:
+                self.llm_stats["degraded"] += 1
+            else:
+                self.llm_stats["fallbacks"] += 1
+                prediction_data = {
+                    "yesProbability": 0.5,
+                    "noProbability": 0.5,
+                    "confidence": 0.6,
+                    "reasoning": "Fallback prediction due to error. Using neutral 50-50 probability."
+                }
+
+        market = self._build_market(asset, target_price, duration_days, market_data, prediction_data)
+        if degraded:
+            market["degraded"] = True
+        return market
+
+    async def generate_binary_markets(self, requests: list, concurrency: int = None, batch_size: int = None):
+        """
+        Generates binary markets for many assets, yielding each result as soon as it is ready.
+        Markets are scored batch_size at a time in one completion; entries the
+        batched reply leaves out or gets wrong fall back to single-market calls.
+        :param requests: List of dicts with 'asset' and optional 'target_price' / 'duration_days'
+        :param concurrency: Maximum completions in flight at once (defaults to BULK_MAX_CONCURRENCY)
+        :param batch_size: Markets per completion (defaults to LLM_BATCH_SIZE; 1 disables batching)
+        :return: Async iterator of {"index", "market"} or {"index", "error"} dicts
+        """
+        # One batched quote call for every asset in the request
+        try:
+            quotes = await self.price_service.get_market_data_many([r["asset"] for r in requests])
+        except Exception as e:
+            logger.error(f"Error fetching market data for bulk generation: {e}")
+            for index in range(len(requests)):
+                yield {"index": index, "error": f"Market data unavailable: {e}"}
+            return
+
+        semaphore = asyncio.Semaphore(concurrency or self.bulk_concurrency)
+        batch_size = batch_size or self.llm_batch_size
+
+        async def generate(index: int, request: dict) -> dict:
+            asset = request["asset"]
+            try:
+                market_data = quotes.get(asset.upper())
+                if market_data is None:
+                    raise ValueError(f"Price not found for {asset}")
+                async with semaphore:
+                    market = await self.generate_binary_market(
+                        asset=asset,
+                        target_price=request.get("target_price"),
+                        duration_days=request.get("duration_days", 1),
+                        market_data=market_data
+                    )
+                return {"index": index, "market": market}
+            except Exception as e:
+                logger.error(f"Error generating binary market for {asset}: {e}")
+                return {"index": index, "error": str(e)}
+
+        async def generate_batch(batch: list) -> list:
+            items = []
+            for index, request in batch:
+                market_data = quotes.get(request["asset"].upper())
+                if market_data is None:
+                    continue  # reported by the single-market path
+                # Same default target as generate_binary_market
+                target_price = request.get("target_price")
+                if target_price is None:
+                    target_price = market_data["current_price"] * 1.05
+                items.append((index, request["asset"], target_price, request.get("duration_days", 1), market_data))
+            try:
+                async with semaphore:
+                    predictions = await self._predict_binary_batch(items)
+            except Exception as e:
+                logger.error(f"Error generating batch of {len(items)} binary markets: {e}")
+                predictions = {}
+            results = [
+                {"index": index, "market": self._build_market(asset, target_price, duration_days, market_data,
+                                                              predictions[index])}
+                for index, asset, target_price, duration_days, market_data in items
+                if index in predictions
+            ]
+            results.extend(await asyncio.gather(*(
+                generate(index, request) for index, request in batch if index not in predictions
+            )))
+            return results
+
+        if batch_size > 1:
+            indexed = list(enumerate(requests))
+            tasks = [
+                asyncio.ensure_future(generate_batch(indexed[start:start + batch_size]))
+                for start in range(0, len(indexed), batch_size)
+            ]
+        else:
+            tasks = [asyncio.ensure_future(generate(i, r)) for i, r in enumerate(requests)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                done = await next_done
+                for result in (done if isinstance(done, list) else [done]):
+                    yield result
+        finally:
+            # The consumer may stop early (e.g. client disconnect)
+            for task in tasks:
+                task.cancel()
 
     async def generate_price_prediction(self, asset: str) -> dict:
         """
@@ -151,18 +502,9 @@ class AIPredictionEngine:
                 }
             ]
 
-            completion = self.client.chat.completions.create(
-                model=self.deployment,
-                messages=prompt,
-                max_tokens=800,
-                temperature=0.7,
-                top_p=0.95
-            )
+            prediction = await self._complete_structured(prompt, PricePrediction)
+            prediction_data = prediction.model_dump()
 
-            # Parse the response as JSON
-            response_text = completion.choices[0].message.content
-            prediction_data = json.loads(response_text)
-            
             # Add current price and market data
             prediction_data.update({
                 "asset": asset,
@@ -171,7 +513,7 @@ class AIPredictionEngine:
                 "marketData": market_data
             })
 
-            logger.info(f"Generated price prediction for {asset}: {prediction_data}")
+            logger.info(f"Generated price prediction for {asset}: ${prediction_data['predictedPrice']:,.2f}")
             return prediction_data
 
         except Exception as e:
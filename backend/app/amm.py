@@ -0,0 +1,248 @@
+import logging
+import math
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .models import Bet, Prediction
+from .store import PredictionStore
+
+logger = logging.getLogger(__name__)
+
+# Prices are kept away from 0 and 1 so the LMSR state stays finite
+MIN_PRICE = 1e-4
+# Largest |q_no - q_yes| / b, i.e. the exponent at which prices reach MIN_PRICE
+MAX_EXPONENT = math.log((1 - MIN_PRICE) / MIN_PRICE)
+
+
+class TradeSizeError(ValueError):
+    """A trade would push the market's price past MIN_PRICE / 1 - MIN_PRICE."""
+
+
+class MarketBook:
+    """
+    LMSR (logarithmic market scoring rule) pricing for many binary markets.
+
+    State is array-backed: per market only the outstanding YES and NO shares
+    and the liquidity parameter b are stored (three float64 slots plus an
+    open flag), so one process can price hundreds of thousands of markets.
+    The YES price is exp(q_yes / b) / (exp(q_yes / b) + exp(q_no / b)) and
+    moves with every trade; the market maker's worst-case loss is b * ln 2.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._slots: Dict[int, int] = {}  # market id -> array index
+        self.q_yes = np.zeros(capacity)
+        self.q_no = np.zeros(capacity)
+        self.b = np.ones(capacity)
+        self.open = np.zeros(capacity, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, market_id: int) -> bool:
+        return market_id in self._slots
+
+    def _grow(self):
+        capacity = len(self.q_yes) * 2
+        for name, fill in (("q_yes", 0.0), ("q_no", 0.0), ("b", 1.0), ("open", False)):
+            current = getattr(self, name)
+            grown = np.full(capacity, fill, dtype=current.dtype)
+            grown[:len(current)] = current
+            setattr(self, name, grown)
+
+    def add(self, market_id: int, yes_price: float, liquidity: float):
+        """
+        Open a market at the given YES price
+        :param yes_price: Opening YES probability
+        :param liquidity: Subsidy the market maker can lose at most; b = liquidity / ln 2
+        """
+        if market_id in self._slots:
+            return
+        if len(self._slots) == len(self.q_yes):
+            self._grow()
+        slot = len(self._slots)
+        self._slots[market_id] = slot
+        b = liquidity / math.log(2)
+        p = min(max(yes_price, MIN_PRICE), 1 - MIN_PRICE)
+        self.b[slot] = b
+        self.q_yes[slot] = b * math.log(p / (1 - p))
+        self.q_no[slot] = 0.0
+        self.open[slot] = True
+
+    def close(self, market_id: int):
+        """Stop trading a market (e.g. once it resolves)."""
+        slot = self._slots.get(market_id)
+        if slot is not None:
+            self.open[slot] = False
+
+    def slot(self, market_id: int) -> int:
+        slot = self._slots.get(market_id)
+        if slot is None:
+            raise KeyError(f"Unknown market {market_id}")
+        return slot
+
+    def slots(self, market_ids: Iterable[int]) -> np.ndarray:
+        return np.fromiter((self.slot(m) for m in market_ids), dtype=np.int64)
+
+    def is_open(self, market_id: int) -> bool:
+        slot = self._slots.get(market_id)
+        return slot is not None and bool(self.open[slot])
+
+    def yes_prices(self, slots: np.ndarray) -> np.ndarray:
+        exponent = np.clip((self.q_no[slots] - self.q_yes[slots]) / self.b[slots], -MAX_EXPONENT, MAX_EXPONENT)
+        return 1 / (1 + np.exp(exponent))
+
+    def _yes_price(self, slot: int) -> float:
+        exponent = (float(self.q_no[slot]) - float(self.q_yes[slot])) / float(self.b[slot])
+        return 1 / (1 + math.exp(min(max(exponent, -MAX_EXPONENT), MAX_EXPONENT)))
+
+    def prices(self, market_id: int) -> Tuple[float, float]:
+        """Current (yes, no) prices of a market, within [MIN_PRICE, 1 - MIN_PRICE]."""
+        yes = self._yes_price(self.slot(market_id))
+        return yes, 1 - yes
+
+    def quote_many(self, slots: np.ndarray, yes: np.ndarray, amounts: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Vectorized quotes for spending `amounts` on YES (or NO) in each market slot.
+        Amounts are not checked against the market's depth; callers size trades.
+        :return: Arrays of shares received, average price, and YES price before and after
+        """
+        b = self.b[slots]
+        yes_before = self.yes_prices(slots)
+        side_price = np.where(yes, yes_before, 1 - yes_before)
+        # Shares s solve C(q + s) - C(q) = amount: s = b * ln(1 + (e^(amount/b) - 1) / p_side)
+        growth = np.expm1(amounts / b)
+        shares = b * np.log1p(growth / side_price)
+        # After the trade the other side's price is p_other * e^(-amount/b)
+        other_after = (1 - side_price) / (growth + 1)
+        yes_after = np.where(yes, 1 - other_after, other_after)
+        return {
+            "shares": shares,
+            "averagePrice": amounts / shares,
+            "yesPriceBefore": yes_before,
+            "yesPriceAfter": yes_after,
+        }
+
+    def quote(self, market_id: int, yes: bool, amount: float) -> dict:
+        """
+        Quote a single trade without applying it; includes slippage versus the current price
+        :raises TradeSizeError: If the trade would push the other side's price below MIN_PRICE
+        """
+        # Same formulas as quote_many on Python floats; numpy call overhead dominates for one market
+        slot = self.slot(market_id)
+        b = float(self.b[slot])
+        yes_before = self._yes_price(slot)
+        side_price = yes_before if yes else 1 - yes_before
+        # Bounding the amount also keeps expm1(amount / b) finite
+        limit = max(0.0, b * math.log((1 - side_price) / MIN_PRICE))
+        if amount > limit:
+            raise TradeSizeError(f"Amount exceeds market depth; at most {limit:.2f} can be spent on "
+                                 f"{'YES' if yes else 'NO'} in market {market_id}")
+        growth = math.expm1(amount / b)
+        shares = b * math.log1p(growth / side_price)
+        other_after = (1 - side_price) / (growth + 1)
+        average_price = amount / shares
+        return {
+            "shares": shares,
+            "averagePrice": average_price,
+            "yesPriceBefore": yes_before,
+            "yesPriceAfter": 1 - other_after if yes else other_after,
+            "slippage": average_price / side_price - 1,
+        }
+
+    def apply(self, slots: np.ndarray, yes: np.ndarray, shares: np.ndarray):
+        """Add executed shares to the book; order-independent, so bet logs replay exactly."""
+        np.add.at(self.q_yes, slots[yes], shares[yes])
+        np.add.at(self.q_no, slots[~yes], shares[~yes])
+
+
+class MarketMaker:
+    """
+    Prices bets with a MarketBook and records them in the PredictionStore.
+
+    Every executed bet is logged with the shares it bought, so the book is
+    rebuilt by opening each market at its initial price and replaying the
+    log. Before quoting or trading the book replays bets written since the
+    last sync, which keeps several workers sharing one store in step.
+    """
+
+    def __init__(self, store: PredictionStore, capacity: int = 1024):
+        self.store = store
+        self.book = MarketBook(capacity)
+        self._last_bet_id = 0
+        self._untradable = set()  # resolved or unknown ids, so replays do not look them up per bet
+
+    def load(self):
+        """Open every unresolved market and replay the whole bet log."""
+        after_id = None
+        while True:
+            page = self.store.query(after_id=after_id, limit=1000, resolved=False)
+            for prediction in page:
+                self.add_market(prediction)
+            if len(page) < 1000:
+                break
+            after_id = page[-1].id
+        self.sync()
+        logger.info(f"Market maker loaded {len(self.book)} markets up to bet {self._last_bet_id}")
+
+    def add_market(self, prediction: Prediction):
+        if prediction.resolved or prediction.totalLiquidity is None:
+            return
+        opening = prediction.initialYesPrice if prediction.initialYesPrice is not None else prediction.yesPrice
+        self.book.add(prediction.id, opening if opening is not None else 0.5, prediction.totalLiquidity)
+
+    def _ensure(self, prediction_id: int) -> bool:
+        """Load a market created by another worker; False if it cannot be traded."""
+        if prediction_id not in self.book and prediction_id not in self._untradable:
+            prediction = self.store.get(prediction_id)
+            if prediction is not None:
+                self.add_market(prediction)
+            if prediction_id not in self.book:
+                self._untradable.add(prediction_id)
+        return prediction_id in self.book
+
+    def sync(self):
+        """Replay bets other workers recorded since the last sync."""
+        while True:
+            bets = self.store.list_bets(after_id=self._last_bet_id, limit=10000)
+            if not bets:
+                return
+            # Loading a market on its first bet keeps the replay complete
+            known = [bet for bet in bets if self._ensure(bet.predictionId)]
+            if known:
+                self.book.apply(
+                    self.book.slots(bet.predictionId for bet in known),
+                    np.array([bet.yes for bet in known]),
+                    np.array([bet.shares for bet in known])
+                )
+            self._last_bet_id = bets[-1].id
+
+    def quote(self, prediction_id: int, yes: bool, amount: float) -> dict:
+        self.sync()
+        if not self._ensure(prediction_id):
+            raise KeyError(f"Unknown market {prediction_id}")
+        return self.book.quote(prediction_id, yes, amount)
+
+    def bet(self, prediction_id: int, yes: bool, amount: float, user_address: Optional[str] = None) -> Bet:
+        """
+        Execute a bet at the current LMSR price and record it
+        :return: The recorded Bet, including shares bought and the new YES price
+        """
+        self.sync()
+        if not self._ensure(prediction_id) or not self.book.is_open(prediction_id):
+            raise ValueError(f"Market {prediction_id} is not open for trading")
+        quote = self.book.quote(prediction_id, yes, amount)
+        bet = self.store.record_bet(dict(
+            predictionId=prediction_id,
+            userAddress=user_address,
+            yes=yes,
+            amount=amount,
+            shares=quote["shares"],
+            yesPrice=quote["yesPriceAfter"]
+        ))
+        self.sync()
+        return bet
+
+    def close(self, prediction_id: int):
+        self.book.close(prediction_id)
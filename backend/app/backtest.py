@@ -0,0 +1,302 @@
+import argparse
+import asyncio
+import csv
+import logging
+import math
+import os
+from typing import Dict, List
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+OHLCV_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class PriceHistory:
+    """
+    OHLCV bars for many assets on a shared time axis.
+
+    Every field is a float array shaped (assets, bars); bars an asset has no
+    data for are NaN. Bars are assumed to be evenly spaced (daily by default),
+    so market durations are expressed in bars.
+    """
+
+    def __init__(self, assets: List[str], timestamps: np.ndarray, **fields: np.ndarray):
+        self.assets = list(assets)
+        self.timestamps = timestamps
+        for name in OHLCV_FIELDS:
+            setattr(self, name, fields[name])
+
+    @property
+    def shape(self) -> tuple:
+        return self.close.shape
+
+    @classmethod
+    def from_rows(cls, timestamps, symbols, **columns) -> "PriceHistory":
+        """Pivot long-format rows (one per asset and bar) into (assets, bars) arrays."""
+        assets, asset_index = np.unique(np.asarray(symbols), return_inverse=True)
+        times, time_index = np.unique(np.asarray(timestamps), return_inverse=True)
+        fields = {}
+        for name in OHLCV_FIELDS:
+            values = np.full((len(assets), len(times)), np.nan)
+            values[asset_index, time_index] = np.asarray(columns[name], dtype=float)
+            fields[name] = values
+        return cls([str(a) for a in assets], times, **fields)
+
+
+def _parse_timestamps(values: np.ndarray) -> np.ndarray:
+    # Unix seconds or ISO dates
+    try:
+        return np.asarray(values, dtype=float).astype("int64").astype("datetime64[s]")
+    except ValueError:
+        return np.asarray(values, dtype="datetime64[s]")
+
+
+def load_ohlcv(path: str) -> PriceHistory:
+    """
+    Load long-format OHLCV data from CSV or Parquet
+    :param path: File with timestamp, symbol, open, high, low, close, volume columns
+    :return: PriceHistory with one row per symbol
+    """
+    if path.endswith(".parquet"):
+        # Imported here so CSV-only setups do not need pyarrow
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path, columns=["timestamp", "symbol", *OHLCV_FIELDS])
+        columns = {name: table.column(name).to_numpy() for name in table.column_names}
+        timestamps = columns.pop("timestamp").astype("datetime64[s]")
+    else:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f))
+        names = ("timestamp", "symbol", *OHLCV_FIELDS)
+        # loadtxt parses in C; about 4x faster than csv.reader for large files
+        table = np.loadtxt(
+            path, delimiter=",", skiprows=1, ndmin=1,
+            usecols=[header.index(name) for name in names],
+            dtype=[("timestamp", "U32"), ("symbol", "U32")] + [(name, "f8") for name in OHLCV_FIELDS]
+        )
+        columns = {name: table[name] for name in names}
+        timestamps = _parse_timestamps(columns.pop("timestamp"))
+    return PriceHistory.from_rows(timestamps, columns.pop("symbol"), **columns)
+
+
+def _shift(values: np.ndarray, bars: int) -> np.ndarray:
+    """values[:, t - bars] aligned to t, NaN where it does not exist."""
+    shifted = np.full_like(values, np.nan)
+    shifted[:, bars:] = values[:, :-bars]
+    return shifted
+
+
+def _forward(values: np.ndarray, bars: int) -> np.ndarray:
+    """values[:, t + bars] aligned to t, NaN past the end."""
+    shifted = np.full_like(values, np.nan)
+    shifted[:, :-bars] = values[:, bars:]
+    return shifted
+
+
+def _normal_cdf(x: np.ndarray) -> np.ndarray:
+    # Abramowitz & Stegun 7.1.26 erf approximation (|error| < 1.5e-7); avoids a scipy dependency
+    z = np.abs(x) / math.sqrt(2)
+    t = 1 / (1 + 0.3275911 * z)
+    poly = t * (0.254829592 + t * (-0.284496736 + t * (1.421413741 + t * (-1.453152027 + t * 1.061405429))))
+    erf = 1 - poly * np.exp(-z * z)
+    return 0.5 * (1 + np.sign(x) * erf)
+
+
+class Replay:
+    """
+    Binary markets created for every asset at every bar: "will the asset
+    close at or beyond current price * (1 + target_percent / 100) after
+    duration bars?", scored on the close the way SettlementScheduler
+    settles live markets on the price at endTimestamp.
+
+    All inputs a predictor may use and the realized outcomes are computed
+    up front as (assets, bars) arrays. Markets whose window runs past the
+    end of the history have a NaN outcome and are left out of the metrics.
+    """
+
+    def __init__(self, history: PriceHistory, target_percent: float = 5.0, duration: int = 1, vol_window: int = 30):
+        if duration < 1:
+            raise ValueError(f"Market duration must be at least one bar, got {duration}")
+        self.history = history
+        self.target_percent = target_percent
+        self.duration = duration
+
+        close = history.close
+        self.current_price = close
+        self.target_price = close * (1 + target_percent / 100)
+        self.percent_change_24h = (close / _shift(close, 1) - 1) * 100
+        self.percent_change_7d = (close / _shift(close, 7) - 1) * 100
+        # Per-bar volatility of log returns over the trailing window
+        returns = np.log(close / _shift(close, 1))
+        self.volatility = np.full_like(close, np.nan)
+        if close.shape[1] >= vol_window:
+            windows = sliding_window_view(returns, vol_window, axis=1)
+            with np.errstate(invalid="ignore"):
+                self.volatility[:, vol_window - 1:] = np.nanstd(windows, axis=2)
+
+        # Targets below the current price must be reached from above, as in settlement
+        settlement_price = _forward(close, duration)
+        with np.errstate(invalid="ignore"):
+            if target_percent >= 0:
+                reached = settlement_price >= self.target_price
+            else:
+                reached = settlement_price <= self.target_price
+        self.outcome = np.where(~np.isnan(settlement_price) & ~np.isnan(close), reached.astype(float), np.nan)
+
+    def market_data(self, asset_index: int, bar: int) -> dict:
+        """Market data dict, shaped like PriceService.get_market_data, as of one bar."""
+        close = float(self.current_price[asset_index, bar])
+        volume = float(self.history.volume[asset_index, bar])
+        return {
+            "current_price": close,
+            "market_cap": 0.0,
+            "volume_24h": 0.0 if math.isnan(volume) else volume * close,
+            "percent_change_1h": 0.0,
+            "percent_change_24h": round(float(np.nan_to_num(self.percent_change_24h[asset_index, bar])), 2),
+            "percent_change_7d": round(float(np.nan_to_num(self.percent_change_7d[asset_index, bar])), 2),
+        }
+
+
+def baseline_probabilities(replay: Replay) -> np.ndarray:
+    """
+    Stub predictor: probability that a driftless random walk with the
+    trailing volatility ends the duration at or beyond the target. Used as
+    a baseline and when no LLM is available.
+    """
+    distance = np.abs(np.log(replay.target_price / replay.current_price))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = distance / (replay.volatility * math.sqrt(replay.duration))
+    probability = 1 - _normal_cdf(z)
+    return np.clip(probability, 0.01, 0.99)
+
+
+async def llm_probabilities(engine, replay: Replay, every: int = 1, concurrency: int = 16) -> np.ndarray:
+    """
+    YES probabilities from AIPredictionEngine for every `every`-th bar,
+    NaN elsewhere. The engine's prediction cache (PREDICTION_CACHE_PATH)
+    makes repeated replays of the same history free; point the engine at
+    the benchmark LLM stub to replay without an API key.
+    """
+    probabilities = np.full(replay.outcome.shape, np.nan)
+    cells = np.argwhere(~np.isnan(replay.outcome) & ~np.isnan(replay.current_price))
+    cells = cells[cells[:, 1] % every == 0]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def predict(asset_index: int, bar: int):
+        async with semaphore:
+            market = await engine.generate_binary_market(
+                replay.history.assets[asset_index],
+                target_price=float(replay.target_price[asset_index, bar]),
+                duration_days=replay.duration,
+                market_data=replay.market_data(asset_index, bar)
+            )
+        # Fallback markets carry no model opinion
+        if not market["reasoning"].startswith("Fallback"):
+            probabilities[asset_index, bar] = market["yesPrice"]
+
+    await asyncio.gather(*(predict(int(a), int(t)) for a, t in cells))
+    return probabilities
+
+
+def evaluate(probabilities: np.ndarray, outcome: np.ndarray, bins: int = 10, stake: float = 1.0,
+             market_price: float = 0.5) -> Dict:
+    """
+    Score YES probabilities against realized outcomes
+    :param probabilities: (assets, bars) predicted YES probability, NaN = no prediction
+    :param outcome: (assets, bars) 1.0 / 0.0 realized outcome, NaN = unresolved
+    :param bins: Number of calibration bins
+    :param stake: Amount bet per market on the predicted side
+    :param market_price: Price paid per share of either side (0.5 = the neutral opening price)
+    :return: Aggregate and per-asset hit rate, Brier score, calibration curve and PnL
+    """
+    mask = ~np.isnan(probabilities) & ~np.isnan(outcome)
+    p = np.where(mask, probabilities, 0.0)
+    o = np.where(mask, outcome, 0.0)
+    count = mask.sum(axis=1)
+    total = int(count.sum())
+    if not total:
+        return {"markets": 0}
+
+    hits = ((p >= 0.5) == (o == 1.0)) & mask
+    squared_error = np.where(mask, (p - o) ** 2, 0.0)
+    # Bet on the side the model favours; a winning share pays 1
+    pnl = np.where(mask, np.where(hits, stake * (1 / market_price - 1), -stake), 0.0)
+
+    bin_index = np.minimum((p[mask] * bins).astype(int), bins - 1)
+    bin_count = np.bincount(bin_index, minlength=bins)
+    with np.errstate(invalid="ignore"):
+        mean_predicted = np.bincount(bin_index, weights=p[mask], minlength=bins) / bin_count
+        observed = np.bincount(bin_index, weights=o[mask], minlength=bins) / bin_count
+
+    with np.errstate(invalid="ignore"):
+        per_asset = {
+            "markets": count,
+            "hitRate": hits.sum(axis=1) / count,
+            "brier": squared_error.sum(axis=1) / count,
+            "pnl": pnl.sum(axis=1),
+        }
+    return {
+        "markets": total,
+        "hitRate": float(hits.sum() / total),
+        "brier": float(squared_error.sum() / total),
+        "baseRate": float(o[mask].mean()),
+        "pnl": float(pnl.sum()),
+        "calibration": {
+            "binEdges": np.linspace(0, 1, bins + 1),
+            "count": bin_count,
+            "meanPredicted": mean_predicted,
+            "observed": observed,
+        },
+        "perAsset": per_asset,
+    }
+
+
+def _print_report(history: PriceHistory, report: Dict):
+    if not report["markets"]:
+        print("No resolvable markets")
+        return
+    print(f"{report['markets']:,} markets: hit rate {report['hitRate']:.3f}, Brier {report['brier']:.4f}, "
+          f"base rate {report['baseRate']:.3f}, PnL {report['pnl']:+,.1f}")
+    calibration = report["calibration"]
+    print("calibration (predicted -> observed, count):")
+    for i, count in enumerate(calibration["count"]):
+        if count:
+            print(f"  {calibration['binEdges'][i]:.1f}-{calibration['binEdges'][i + 1]:.1f}: "
+                  f"{calibration['meanPredicted'][i]:.3f} -> {calibration['observed'][i]:.3f} ({count})")
+    worst = np.argsort(np.nan_to_num(report["perAsset"]["brier"], nan=-1))[::-1][:5]
+    print("worst Brier by asset: " + ", ".join(
+        f"{history.assets[i]} {report['perAsset']['brier'][i]:.4f}" for i in worst
+    ))
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Replay binary markets over historical OHLCV data.")
+    parser.add_argument("data", help="CSV or Parquet file with timestamp, symbol, open, high, low, close, volume")
+    parser.add_argument("--target-percent", type=float, default=5.0)
+    parser.add_argument("--duration", type=int, default=1, help="Market duration in bars")
+    parser.add_argument("--predictor", choices=["baseline", "llm"], default="baseline")
+    parser.add_argument("--every", type=int, default=1, help="LLM predictor: only replay every Nth bar")
+    args = parser.parse_args()
+
+    history = load_ohlcv(args.data)
+    replay = Replay(history, args.target_percent, args.duration)
+    if args.predictor == "llm":
+        from .ai_engine import AIPredictionEngine
+
+        engine = AIPredictionEngine()
+        try:
+            probabilities = await llm_probabilities(engine, replay, every=args.every)
+        finally:
+            await engine.close()
+    else:
+        probabilities = baseline_probabilities(replay)
+    _print_report(history, evaluate(probabilities, replay.outcome))
+
+
+if __name__ == "__main__":
+    # python -m app.backtest prices.csv --target-percent 5 --duration 1
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING"))
+    asyncio.run(_main())
@@ -0,0 +1,321 @@
+import hashlib
+import json
+import logging
+import os
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+SOLC_VERSION = "0.8.20"
+
+# Compiled artifacts are cached on disk keyed by a hash of the compiler
+# version and source, so editing a contract invalidates its artifact.
+ARTIFACT_DIR = os.getenv(
+    "CONTRACT_ARTIFACT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build", "contracts")
+)
+
+PREDICTION_MARKET_SOURCE = """
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+contract PredictionMarket {
+    string public question;
+    uint256 public endTime;
+    address public creator;
+    address public usdcToken;
+    bool public resolved;
+    bool public outcome;
+    uint256 public yesPrice;
+    uint256 public noPrice;
+    mapping(address => uint256) public yesBalances;
+    mapping(address => uint256) public noBalances;
+
+    // Position changes, ERC20 Transfer-style (from == 0 for purchases), so
+    // balances can be rebuilt from logs by an indexer
+    event Transfer(address indexed from, address indexed to, uint256 amount, bool yes);
+    event Resolved(bool outcome);
+
+    constructor(string memory _question, uint256 _endTime, address _usdcToken, uint256 _yesPrice, uint256 _noPrice) {
+        question = _question;
+        endTime = _endTime;
+        creator = msg.sender;
+        usdcToken = _usdcToken;
+        yesPrice = _yesPrice;
+        noPrice = _noPrice;
+        resolved = false;
+    }
+
+    function buyYes(uint256 amount) public {
+        require(block.timestamp < endTime, "Market has ended.");
+        require(!resolved, "Market has been resolved.");
+        uint256 cost = amount * yesPrice;
+        IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
+        yesBalances[msg.sender] += amount;
+        emit Transfer(address(0), msg.sender, amount, true);
+    }
+
+    function buyNo(uint256 amount) public {
+        require(block.timestamp < endTime, "Market has ended.");
+        require(!resolved, "Market has been resolved.");
+        uint256 cost = amount * noPrice;
+        IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
+        noBalances[msg.sender] += amount;
+        emit Transfer(address(0), msg.sender, amount, false);
+    }
+
+    function resolve(bool _outcome) public {
+        require(msg.sender == creator, "Only creator can resolve.");
+        require(block.timestamp >= endTime, "Market has not ended.");
+        require(!resolved, "Market has already been resolved.");
+        resolved = true;
+        outcome = _outcome;
+        emit Resolved(_outcome);
+    }
+
+    function getBalance(address user) public view returns (uint256 yes, uint256 no) {
+        return (yesBalances[user], noBalances[user]);
+    }
+}
+
+interface IERC20 {
+    function transferFrom(address sender, address recipient, uint256 amount) external returns (bool);
+    function transfer(address recipient, uint256 amount) external returns (bool);
+    function balanceOf(address account) external view returns (uint256);
+    function approve(address spender, uint256 amount) external returns (bool);
+}
+"""
+
+MARKET_FACTORY_SOURCE = """
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+// Implementation behind the EIP-1167 clones created by MarketFactory. Same
+// trading interface as PredictionMarket, but state is set by initialize()
+// and only the keccak256 hash of the question is stored; the text is in
+// the factory's MarketCreated event.
+contract PredictionMarketClone {
+    bytes32 public questionHash;
+    uint256 public endTime;
+    address public creator;
+    address public usdcToken;
+    bool public resolved;
+    bool public outcome;
+    bool private initialized;
+    uint256 public yesPrice;
+    uint256 public noPrice;
+    mapping(address => uint256) public yesBalances;
+    mapping(address => uint256) public noBalances;
+
+    event Transfer(address indexed from, address indexed to, uint256 amount, bool yes);
+    event Resolved(bool outcome);
+
+    constructor() {
+        // The implementation itself is never a market
+        initialized = true;
+    }
+
+    function initialize(
+        bytes32 _questionHash,
+        uint256 _endTime,
+        address _creator,
+        address _usdcToken,
+        uint256 _yesPrice,
+        uint256 _noPrice
+    ) external {
+        require(!initialized, "Already initialized.");
+        initialized = true;
+        questionHash = _questionHash;
+        endTime = _endTime;
+        creator = _creator;
+        usdcToken = _usdcToken;
+        yesPrice = _yesPrice;
+        noPrice = _noPrice;
+    }
+
+    function buyYes(uint256 amount) public {
+        require(block.timestamp < endTime, "Market has ended.");
+        require(!resolved, "Market has been resolved.");
+        uint256 cost = amount * yesPrice;
+        IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
+        yesBalances[msg.sender] += amount;
+        emit Transfer(address(0), msg.sender, amount, true);
+    }
+
+    function buyNo(uint256 amount) public {
+        require(block.timestamp < endTime, "Market has ended.");
+        require(!resolved, "Market has been resolved.");
+        uint256 cost = amount * noPrice;
+        IERC20(usdcToken).transferFrom(msg.sender, address(this), cost);
+        noBalances[msg.sender] += amount;
+        emit Transfer(address(0), msg.sender, amount, false);
+    }
+
+    function resolve(bool _outcome) public {
+        require(msg.sender == creator, "Only creator can resolve.");
+        require(block.timestamp >= endTime, "Market has not ended.");
+        require(!resolved, "Market has already been resolved.");
+        resolved = true;
+        outcome = _outcome;
+        emit Resolved(_outcome);
+    }
+
+    function getBalance(address user) public view returns (uint256 yes, uint256 no) {
+        return (yesBalances[user], noBalances[user]);
+    }
+}
+
+// Creates markets as EIP-1167 minimal proxies of one PredictionMarketClone,
+// one or many per transaction. The caller becomes the market creator.
+contract MarketFactory {
+    address public immutable implementation;
+    address public immutable usdcToken;
+
+    event MarketCreated(
+        address indexed market,
+        bytes32 indexed questionHash,
+        string question,
+        uint256 endTime,
+        uint256 yesPrice,
+        uint256 noPrice
+    );
+
+    constructor(address _implementation, address _usdcToken) {
+        implementation = _implementation;
+        usdcToken = _usdcToken;
+    }
+
+    function createMarket(string calldata question, uint256 endTime, uint256 yesPrice, uint256 noPrice)
+        external
+        returns (address)
+    {
+        return _create(question, endTime, yesPrice, noPrice);
+    }
+
+    function createMarkets(
+        string[] calldata questions,
+        uint256[] calldata endTimes,
+        uint256[] calldata yesPrices,
+        uint256[] calldata noPrices
+    ) external returns (address[] memory markets) {
+        require(
+            endTimes.length == questions.length && yesPrices.length == questions.length
+                && noPrices.length == questions.length,
+            "Length mismatch."
+        );
+        markets = new address[](questions.length);
+        for (uint256 i = 0; i < questions.length; i++) {
+            markets[i] = _create(questions[i], endTimes[i], yesPrices[i], noPrices[i]);
+        }
+    }
+
+    function _create(string calldata question, uint256 endTime, uint256 yesPrice, uint256 noPrice)
+        internal
+        returns (address market)
+    {
+        market = _clone(implementation);
+        bytes32 questionHash = keccak256(bytes(question));
+        PredictionMarketClone(market).initialize(questionHash, endTime, msg.sender, usdcToken, yesPrice, noPrice);
+        emit MarketCreated(market, questionHash, question, endTime, yesPrice, noPrice);
+    }
+
+    function _clone(address target) internal returns (address instance) {
+        // EIP-1167 runtime: delegatecall everything to target
+        assembly {
+            let ptr := mload(0x40)
+            mstore(ptr, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(ptr, 0x14), shl(0x60, target))
+            mstore(add(ptr, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            instance := create(0, ptr, 0x37)
+        }
+        require(instance != address(0), "Clone failed.");
+    }
+}
+
+interface IERC20 {
+    function transferFrom(address sender, address recipient, uint256 amount) external returns (bool);
+    function transfer(address recipient, uint256 amount) external returns (bool);
+    function balanceOf(address account) external view returns (uint256);
+    function approve(address spender, uint256 amount) external returns (bool);
+}
+"""
+
+SOURCES = {
+    "PredictionMarket": PREDICTION_MARKET_SOURCE,
+    # Both contracts live in one source; each name selects its own artifact
+    "PredictionMarketClone": MARKET_FACTORY_SOURCE,
+    "MarketFactory": MARKET_FACTORY_SOURCE,
+}
+
+
+def source_hash(contract_name: str) -> str:
+    """Hash identifying one compiled version of a contract."""
+    payload = f"{SOLC_VERSION}\n{contract_name}\n{SOURCES[contract_name]}"
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def compile_contract(contract_name: str) -> dict:
+    """Compiles a contract with py-solc-x and returns its ABI and bytecode."""
+    # Imported here so processes that only load cached artifacts never need solc
+    from solcx import compile_standard, install_solc
+
+    try:
+        install_solc(SOLC_VERSION)
+        compiled_sol = compile_standard(
+            {
+                "language": "Solidity",
+                "sources": {f"{contract_name}.sol": {"content": SOURCES[contract_name]}},
+                "settings": {
+                    "outputSelection": {"*": {"*": ["abi", "evm.bytecode"]}}
+                },
+            },
+            solc_version=SOLC_VERSION,
+        )
+        contract_interface = compiled_sol["contracts"][f"{contract_name}.sol"][contract_name]
+        return {
+            "abi": contract_interface["abi"],
+            "bytecode": contract_interface["evm"]["bytecode"]["object"],
+        }
+    except Exception as e:
+        logger.error(f"Solidity compilation error: {e}")
+        raise
+
+
+@lru_cache(maxsize=None)
+def load_artifact(contract_name: str) -> dict:
+    """
+    Returns {"abi", "bytecode"} for a contract, compiling it only when no
+    artifact for the current source exists in ARTIFACT_DIR.
+    """
+    digest = source_hash(contract_name)
+    path = os.path.join(ARTIFACT_DIR, f"{contract_name}-{digest[:16]}.json")
+    try:
+        with open(path) as f:
+            artifact = json.load(f)
+        if artifact.get("sourceHash") == digest:
+            return artifact
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable contract artifact {path}: {e}")
+
+    logger.info(f"Compiling {contract_name} (no cached artifact for {digest[:16]})")
+    artifact = compile_contract(contract_name)
+    artifact["sourceHash"] = digest
+    try:
+        os.makedirs(ARTIFACT_DIR, exist_ok=True)
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(artifact, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write contract artifact {path}: {e}")
+    return artifact
+
+
+if __name__ == "__main__":
+    # Build step: python -m app.contracts
+    logging.basicConfig(level=logging.INFO)
+    for name in SOURCES:
+        load_artifact(name)
+        logger.info(f"{name} artifact ready ({source_hash(name)[:16]})")
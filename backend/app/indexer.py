@@ -0,0 +1,306 @@
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address
+
+from .contracts import load_artifact
+from .market_reader import MarketReader
+from .rpc import JsonRpcClient
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_TOPIC = "0x" + keccak(text="Transfer(address,address,uint256,bool)").hex()
+RESOLVED_TOPIC = "0x" + keccak(text="Resolved(bool)").hex()
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+class ChainIndexer:
+    """
+    Follows PredictionMarket contracts from a block cursor and keeps their
+    state (yes/no balances, resolution, prices) in a local SQLite store, so
+    balance and market reads need no RPC calls.
+
+    Logs are applied in block ranges; each range and the cursor advance are
+    committed in one transaction, so a crash never double-counts a range.
+    Only blocks `confirmations` behind the head are indexed to stay clear of reorgs.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS markets (
+            address TEXT PRIMARY KEY,
+            question TEXT,
+            endTime INTEGER,
+            creator TEXT,
+            yesPrice REAL,
+            noPrice REAL,
+            resolved INTEGER NOT NULL DEFAULT 0,
+            outcome INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS balances (
+            market TEXT NOT NULL,
+            user TEXT NOT NULL,
+            yes TEXT NOT NULL DEFAULT '0',
+            no TEXT NOT NULL DEFAULT '0',
+            PRIMARY KEY (market, user)
+        );
+        CREATE INDEX IF NOT EXISTS idx_balances_user ON balances (user);
+        CREATE TABLE IF NOT EXISTS cursor (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            block INTEGER NOT NULL
+        );
+    """
+
+    def __init__(
+        self,
+        rpc: JsonRpcClient,
+        reader: MarketReader,
+        path: str = "indexer.db",
+        block_range: int = None,
+        confirmations: int = None,
+        poll_interval: float = None
+    ):
+        self.rpc = rpc
+        self.reader = reader
+        self.block_range = block_range or int(os.getenv("INDEXER_BLOCK_RANGE", "2000"))
+        self.confirmations = confirmations if confirmations is not None else int(os.getenv("INDEXER_CONFIRMATIONS", "2"))
+        self.poll_interval = poll_interval or float(os.getenv("INDEXER_POLL_INTERVAL", "2"))
+        self._lock = threading.Lock()
+        # Serializes range indexing with market registration so no range
+        # is applied with a stale market list
+        self._index_lock = asyncio.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(self.SCHEMA)
+        self._db.commit()
+        self.stats = {"blocks": 0, "logs": 0, "seconds": 0.0}
+        # Safe head last seen by run(), for lag checks without an RPC call
+        self.safe_head: Optional[int] = None
+        self._head_seen_at = 0.0
+        # Earliest deployment block of markets added before the first indexed range
+        self._first_market_block: Optional[int] = None
+
+    @property
+    def block_height(self) -> Optional[int]:
+        """Last block whose logs have been applied, or None before the first run."""
+        with self._lock:
+            row = self._db.execute("SELECT block FROM cursor WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    @property
+    def lag(self) -> Optional[int]:
+        """
+        Blocks the cursor is behind the safe head, or None when run() has not
+        seen the head recently (not running, or the node is unreachable).
+        """
+        height = self.block_height
+        if self.safe_head is None or height is None or time.monotonic() - self._head_seen_at > 10 * self.poll_interval:
+            return None
+        return max(0, self.safe_head - height)
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.stats["blocks"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+
+    def markets(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute("SELECT address FROM markets")]
+
+    async def add_markets(self, addresses: Iterable[str], from_block: int):
+        """
+        Start tracking markets deployed at or after from_block. Their static
+        fields are read once; their logs are backfilled up to the cursor.
+        """
+        addresses = [to_checksum_address(a) for a in addresses]
+        details = await self.reader.get_market_details_many(addresses)
+        async with self._index_lock:
+            added = []
+            with self._lock, self._db:
+                for address, detail in zip(addresses, details):
+                    if detail is None:
+                        logger.error(f"Cannot index market {address}: details unavailable")
+                        continue
+                    cursor = self._db.execute(
+                        "INSERT OR IGNORE INTO markets (address, question, endTime, creator, yesPrice, noPrice) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (address, detail["question"], detail["endTime"], detail["creator"],
+                         detail["yesPrice"], detail["noPrice"])
+                    )
+                    if cursor.rowcount:
+                        added.append(address)
+            height = self.block_height
+            if added and height is None:
+                first = self._first_market_block
+                self._first_market_block = from_block if first is None else min(first, from_block)
+            if added and height is not None and height >= from_block:
+                for chunk_start in range(from_block, height + 1, self.block_range):
+                    chunk_end = min(chunk_start + self.block_range - 1, height)
+                    await self._index_range(chunk_start, chunk_end, added, advance_cursor=False)
+
+    async def backfill(self, from_block: int, to_block: int = None) -> dict:
+        """Index every tracked market from from_block to to_block (default: safe head)."""
+        if to_block is None:
+            to_block = await self._safe_head()
+        height = self.block_height
+        start = from_block if height is None else max(from_block, height + 1)
+        for chunk_start in range(start, to_block + 1, self.block_range):
+            async with self._index_lock:
+                await self._index_range(chunk_start, min(chunk_start + self.block_range - 1, to_block), self.markets())
+        return dict(self.stats, blocksPerSecond=self.blocks_per_second, blockHeight=self.block_height)
+
+    async def run(self, from_block: int = None):
+        """
+        Follow the chain head; run as a background task. Without a cursor,
+        indexing starts at from_block (default: the current safe head, or the
+        deployment block of markets added before then).
+        """
+        while True:
+            try:
+                head = await self._safe_head()
+                self.safe_head, self._head_seen_at = head, time.monotonic()
+                if from_block is None:
+                    from_block = min(head, self._first_market_block if self._first_market_block is not None else head)
+                async with self._index_lock:
+                    start = (self.block_height if self.block_height is not None else from_block - 1) + 1
+                    if start <= head:
+                        await self._index_range(start, min(start + self.block_range - 1, head), self.markets())
+                if start <= head:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Indexer error: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _safe_head(self) -> int:
+        return int(await self.rpc.call("eth_blockNumber"), 16) - self.confirmations
+
+    async def _index_range(self, from_block: int, to_block: int, addresses: List[str], advance_cursor: bool = True):
+        started = time.perf_counter()
+        logs = []
+        if addresses:
+            logs = await self.rpc.call("eth_getLogs", [{
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+                "address": addresses,
+                "topics": [[TRANSFER_TOPIC, RESOLVED_TOPIC]]
+            }])
+
+        with self._lock, self._db:
+            for log in logs:
+                if not log.get("removed"):
+                    self._apply(log)
+            if advance_cursor:
+                self._db.execute(
+                    "INSERT INTO cursor (id, block) VALUES (1, ?) ON CONFLICT(id) DO UPDATE SET block = excluded.block",
+                    (to_block,)
+                )
+
+        if advance_cursor:
+            self.stats["blocks"] += to_block - from_block + 1
+            self.stats["logs"] += len(logs)
+            self.stats["seconds"] += time.perf_counter() - started
+
+    def _apply(self, log: dict):
+        market = to_checksum_address(log["address"])
+        topic = log["topics"][0]
+        data = bytes.fromhex(log["data"][2:])
+        if topic == RESOLVED_TOPIC:
+            (outcome,) = decode(["bool"], data)
+            self._db.execute("UPDATE markets SET resolved = 1, outcome = ? WHERE address = ?", (int(outcome), market))
+        elif topic == TRANSFER_TOPIC:
+            sender = to_checksum_address("0x" + log["topics"][1][-40:])
+            recipient = to_checksum_address("0x" + log["topics"][2][-40:])
+            amount, yes = decode(["uint256", "bool"], data)
+            if sender != to_checksum_address(ZERO_ADDRESS):
+                self._adjust(market, sender, -amount, yes)
+            if recipient != to_checksum_address(ZERO_ADDRESS):
+                self._adjust(market, recipient, amount, yes)
+
+    def _adjust(self, market: str, user: str, delta: int, yes: bool):
+        # Balances are uint256; stored as text to avoid SQLite's 64-bit limit
+        row = self._db.execute(
+            "SELECT yes, no FROM balances WHERE market = ? AND user = ?", (market, user)
+        ).fetchone()
+        yes_balance, no_balance = (int(row[0]), int(row[1])) if row else (0, 0)
+        if yes:
+            yes_balance += delta
+        else:
+            no_balance += delta
+        self._db.execute(
+            "INSERT OR REPLACE INTO balances (market, user, yes, no) VALUES (?, ?, ?, ?)",
+            (market, user, str(yes_balance), str(no_balance))
+        )
+
+    def get_user_balance(self, market_address: str, user_address: str) -> Optional[dict]:
+        """Indexed yes/no balance, or None if the market is not tracked."""
+        market, user = to_checksum_address(market_address), to_checksum_address(user_address)
+        with self._lock:
+            if not self._db.execute("SELECT 1 FROM markets WHERE address = ?", (market,)).fetchone():
+                return None
+            row = self._db.execute(
+                "SELECT yes, no FROM balances WHERE market = ? AND user = ?", (market, user)
+            ).fetchone()
+        return {
+            "yesBalance": int(row[0]) if row else 0,
+            "noBalance": int(row[1]) if row else 0,
+            "blockNumber": self.block_height,
+        }
+
+    def get_market_details(self, market_address: str) -> Optional[dict]:
+        """Indexed market details, or None if the market is not tracked."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT address, question, endTime, resolved, yesPrice, noPrice, creator, outcome "
+                "FROM markets WHERE address = ?", (to_checksum_address(market_address),)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "address": row[0],
+            "question": row[1],
+            "endTime": row[2],
+            "resolved": bool(row[3]),
+            "yesPrice": row[4],
+            "noPrice": row[5],
+            "creator": row[6],
+            "outcome": None if row[7] is None else bool(row[7]),
+            "blockNumber": self.block_height,
+        }
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+async def _main():
+    parser = argparse.ArgumentParser(description="Backfill the market indexer and report catch-up rate.")
+    parser.add_argument("--rpc-url", default=os.getenv("BASE_RPC_URL", "http://127.0.0.1:8545"))
+    parser.add_argument("--db", default=os.getenv("INDEXER_DB_PATH", "indexer.db"))
+    parser.add_argument("--markets", required=True, help="Comma-separated market addresses")
+    parser.add_argument("--from-block", type=int, default=0)
+    parser.add_argument("--to-block", type=int, default=None)
+    args = parser.parse_args()
+
+    rpc = JsonRpcClient(args.rpc_url)
+    indexer = ChainIndexer(rpc, MarketReader(rpc, load_artifact("PredictionMarket")["abi"]), args.db)
+    try:
+        await indexer.add_markets(args.markets.split(","), args.from_block)
+        stats = await indexer.backfill(args.from_block, args.to_block)
+        print(f"Indexed {stats['blocks']} blocks ({stats['logs']} logs) up to block {stats['blockHeight']} "
+              f"at {stats['blocksPerSecond']:,.0f} blocks/s")
+    finally:
+        indexer.close()
+        await rpc.close()
+
+
+if __name__ == "__main__":
+    # Backfill mode: python -m app.indexer --markets 0xabc,0xdef --from-block 0
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,144 @@
+import json
+import re
+from typing import Dict, List, Optional, Type, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+T = TypeVar("T", bound=BaseModel)
+
+# Probabilities further than this from summing to 1 are rejected rather than rescaled
+PROBABILITY_TOLERANCE = 0.02
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+_decoder = json.JSONDecoder()
+
+
+class OutputParseError(ValueError):
+    """A completion could not be turned into the expected schema."""
+
+
+class BinaryPrediction(BaseModel):
+    yesProbability: float = Field(ge=0, le=1)
+    noProbability: Optional[float] = Field(default=None, ge=0, le=1)
+    confidence: float = Field(ge=0, le=1)
+    reasoning: str = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def probabilities_sum_to_one(self) -> "BinaryPrediction":
+        if self.noProbability is None:
+            self.noProbability = 1 - self.yesProbability
+        total = self.yesProbability + self.noProbability
+        if abs(total - 1) > PROBABILITY_TOLERANCE:
+            raise ValueError(f"yesProbability + noProbability must be 1, got {total:.3f}")
+        # Rounding noise is rescaled so the market prices sum to exactly 1
+        self.yesProbability /= total
+        self.noProbability = 1 - self.yesProbability
+        return self
+
+
+class PricePrediction(BaseModel):
+    predictedPrice: float = Field(gt=0)
+    confidence: float = Field(ge=0, le=1)
+    reasoning: str = Field(min_length=1)
+
+
+def extract_json(text: str) -> Optional[dict]:
+    """
+    Find the JSON object in a completion: the whole text, a fenced code
+    block, or the first decodable object embedded in prose. None if absent.
+    """
+    for candidate in (match.group(1) for match in _FENCE.finditer(text)):
+        try:
+            value = json.loads(candidate)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+    start = text.find("{")
+    while start != -1:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        start = text.find("{", start + 1)
+    return None
+
+
+def parse_output(text: Optional[str], schema: Type[T]) -> tuple:
+    """
+    Validate a completion against a schema
+    :param text: Raw completion content
+    :param schema: Pydantic model the JSON must satisfy
+    :return: (model instance, True if the plain json.loads fast path was enough)
+    :raises OutputParseError: with a short description usable in a repair prompt
+    """
+    if not text:
+        raise OutputParseError("the reply was empty")
+    fast_path = True
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        fast_path = False
+        data = extract_json(text)
+        if data is None:
+            raise OutputParseError("the reply did not contain a JSON object")
+    if not isinstance(data, dict):
+        raise OutputParseError("the reply was not a JSON object")
+    try:
+        return schema.model_validate(data), fast_path
+    except ValidationError as e:
+        problems = "; ".join(
+            f"{'.'.join(str(p) for p in error['loc']) or 'object'}: {error['msg']}" for error in e.errors()
+        )
+        raise OutputParseError(problems) from e
+
+
+def parse_batch_output(text: Optional[str], schema: Type[T], ids: List[str]) -> Dict[str, T]:
+    """
+    Validate a batched completion: a JSON object {"predictions": [...]} (or a
+    bare array) with one entry per id, each carrying an "id" field.
+    :return: Valid entries by id; ids missing or failing validation are left out
+    :raises OutputParseError: if the reply holds no list of entries at all
+    """
+    if not text:
+        raise OutputParseError("the reply was empty")
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        data = extract_json(text)
+    if isinstance(data, dict):
+        data = data.get("predictions")
+    if not isinstance(data, list):
+        # A bare array wrapped in prose or a code fence
+        start = text.find("[")
+        while start != -1 and not isinstance(data, list):
+            try:
+                data = _decoder.raw_decode(text, start)[0]
+            except json.JSONDecodeError:
+                pass
+            start = text.find("[", start + 1)
+    if not isinstance(data, list):
+        raise OutputParseError("the reply did not contain a list of predictions")
+
+    wanted = set(ids)
+    results = {}
+    for entry in data:
+        if not isinstance(entry, dict):
+            continue
+        entry_id = str(entry.get("id"))
+        if entry_id not in wanted or entry_id in results:
+            continue
+        try:
+            results[entry_id] = schema.model_validate(entry)
+        except ValidationError:
+            pass
+    return results
+
+
+def repair_prompt(error: OutputParseError, schema: Type[BaseModel]) -> str:
+    """Short follow-up asking the model to fix its previous reply."""
+    fields = ", ".join(schema.model_fields)
+    return (f"Your previous reply could not be used: {error}. "
+            f"Reply with only a JSON object with the fields {fields}.")
@@ -1,11 +1,52 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import asyncio
+import httpx
+import hashlib
+import json
 import logging
-from typing import List
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
 from .ai_engine import AIPredictionEngine
-from .models import Prediction
+from .amm import MarketMaker, TradeSizeError
+from .models import MAX_BET_AMOUNT, MarketRequest, Prediction, SupportRequest
+from .precompute import MarketPool
+from .realtime import Broadcaster, QuotePoller
+from .resilience import DependencyUnavailable, breakers, degraded_dependencies
+from .serialization import COMPRESS_MIN_BYTES, columnar, compress, dumps, join_array, negotiate_encoding
+from .settlement import SettlementScheduler
+from .store import create_store
+from .telemetry import TelemetryMiddleware, recent_traces, registry, span
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    market_maker.load()
+    if SETTLEMENT_ENABLED:
+        background_tasks.append(asyncio.create_task(settlement.run()))
+    quote_poller.track(p.asset for p in store.query(limit=10000, resolved=False))
+    background_tasks.append(asyncio.create_task(quote_poller.run()))
+    # Import the LLM SDK off the event loop so startup does not wait for it;
+    # /readyz reports ready once it is loaded
+    background_tasks.append(asyncio.create_task(asyncio.to_thread(ai_engine.warm_up)))
+    if PRECOMPUTE_ENABLED and market_pool.assets:
+        background_tasks.append(asyncio.create_task(market_pool.run()))
+    if agent_service is not None and agent_service.indexer_path:
+        background_tasks.append(asyncio.create_task(agent_service.follow_chain()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Let cancelled tasks unwind before the clients and store they use are closed
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await ai_engine.close()
+    if agent_service is not None:
+        await agent_service.close()
+    store.close()
+
+app = FastAPI(lifespan=lifespan)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -16,51 +57,345 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Trace-Id"],
 )
+# Per-request trace ids and latency histograms (sampled at TRACE_SAMPLE_RATE)
+app.add_middleware(TelemetryMiddleware)
 
-# Initialize AI engine
+# Initialize AI engine (cheap: SDK clients are created on first use)
 ai_engine = AIPredictionEngine()
 
-# In-memory storage for predictions (replace with database in production)
-predictions: List[Prediction] = []
+# Prediction storage (SQLite by default, see PREDICTION_STORE)
+store = create_store()
+
+MAX_BULK_MARKETS = int(os.getenv("MAX_BULK_MARKETS", "500"))
+
+# Live updates: one broadcaster and one shared quote poller for all stream clients
+broadcaster = Broadcaster()
+quote_poller = QuotePoller(ai_engine.price_service, broadcaster)
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+
+# LMSR pricing for bets; odds move with every bet
+market_maker = MarketMaker(store)
+
+def publish_resolution(prediction_id: int, outcome: bool, settlement_price: float):
+    market_maker.close(prediction_id)
+    broadcaster.publish({
+        "type": "resolved",
+        "id": prediction_id,
+        "outcome": outcome,
+        "settlementPrice": settlement_price
+    })
+
+# On-chain operations, when a CDP wallet or the event indexer is configured;
+# imported only then, as web3 and the ABI codecs add half a second to startup
+agent_service = None
+if os.getenv("CDP_API_KEY_NAME") or os.getenv("INDEXER_DB_PATH"):
+    from .agent_service import AgentService
+    agent_service = AgentService()
+
+# Settles expired markets. With several workers, enable it on one of them only.
+settlement = SettlementScheduler(store, ai_engine.price_service, agent_service=agent_service,
+                                 on_resolved=publish_resolution)
+SETTLEMENT_ENABLED = os.getenv("SETTLEMENT_ENABLED", "true").lower() == "true"
+background_tasks = []
+
+# Ready-made markets for HOT_ASSETS (none by default) at each HOT_TARGET_LADDER
+# target; other assets and targets are generated on demand. Each worker keeps
+# its own pool, so PRECOMPUTE_ENABLED=false can limit it to some workers.
+market_pool = MarketPool(ai_engine)
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true"
+
+registry.register_stats("quote_cache", ai_engine.price_service.cache_stats)
+registry.register_stats("prediction_cache", lambda: ai_engine.prediction_cache.stats)
+registry.register_stats("llm", ai_engine.llm_output_stats)
+registry.register_stats("settlement", lambda: dict(settlement.stats, queued=settlement.queued))
+registry.register_stats("stream", lambda: dict(broadcaster.stats, subscribers=len(broadcaster.subscribers)))
+registry.register_stats("precompute", lambda: market_pool.stats)
+
+@app.get("/healthz")
+async def liveness():
+    """Liveness: the process is serving requests. Does not touch upstreams."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness: dependencies needed to serve traffic are configured and loaded."""
+    checks = {
+        "prices": bool(ai_engine.price_service.api_key),
+        "llm": ai_engine.llm_ready,
+    }
+    try:
+        store.version()
+        checks["store"] = True
+    except Exception as e:
+        logger.error(f"Readiness store check failed: {e}")
+        checks["store"] = False
+    ready = all(checks.values())
+    # Open circuits do not make us unready: requests are served from cached data
+    degraded = degraded_dependencies()
+    status = "not ready" if not ready else "degraded" if degraded else "ready"
+    return JSONResponse({"status": status, "checks": checks, "degraded": degraded},
+                        status_code=200 if ready else 503)
 
 @app.get("/predictions")
-async def get_predictions():
-    return predictions
+async def get_predictions(
+    request: Request,
+    cursor: Optional[int] = Query(None, description="Return predictions after this id (from X-Next-Cursor)"),
+    limit: int = Query(100, ge=1, le=1000),
+    order: Literal["asc", "desc"] = Query("asc", description="desc: newest first; the cursor then pages to older ids"),
+    asset: Optional[str] = None,
+    status: Optional[Literal["open", "resolved"]] = None,
+    end_after: Optional[float] = Query(None, alias="endAfter"),
+    end_before: Optional[float] = Query(None, alias="endBefore"),
+    predictor_type: Optional[str] = Query(None, alias="predictorType"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    format: Literal["rows", "columnar"] = Query("rows", description="columnar: {field: [values]} instead of a list")
+):
+    """
+    List predictions in id order (newest first with order=desc), one page
+    at a time. The id to pass as `cursor` for the next page is returned in
+    the X-Next-Cursor header.
+    Responses are gzip or brotli compressed when the client accepts it.
+    """
+    include = None
+    if fields:
+        include = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = include - set(Prediction.model_fields)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    # The store version changes on every write, so an unchanged version
+    # means an unchanged page and we can answer 304 without reading rows
+    version = store.version()
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    # Each content coding is a different representation, so it gets its own ETag
+    etag = '"' + hashlib.sha1(f"{version}:{encoding}:{request.url.query}".encode()).hexdigest()[:20] + '"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    filters = dict(
+        after_id=cursor,
+        limit=limit + 1,
+        asset=asset,
+        resolved=None if status is None else status == "resolved",
+        end_after=end_after,
+        end_before=end_before,
+        predictor_type=predictor_type,
+        descending=order == "desc"
+    )
+    with span("serialize"):
+        if format == "rows" and include is None:
+            # Full rows: JSON bytes the store cached when each prediction was written
+            rows = store.query_json(**filters)
+            if len(rows) > limit:
+                rows = rows[:limit]
+                headers["X-Next-Cursor"] = str(rows[-1][0])
+            body = join_array(encoded for _, encoded in rows)
+        else:
+            page = store.query(**filters)
+            if len(page) > limit:
+                page = page[:limit]
+                headers["X-Next-Cursor"] = str(page[-1].id)
+            if format == "columnar":
+                body = columnar(page, include)
+            else:
+                body = dumps([p.model_dump(mode="json", include=include) for p in page])
+
+    if encoding is not None and len(body) >= COMPRESS_MIN_BYTES:
+        with span("compress", encoding=encoding):
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/stream")
+async def stream_updates(request: Request):
+    """
+    Server-sent events with compact deltas: new markets ("market"), asset
+    price changes ("price") and resolutions ("resolved").
+    """
+    subscriber = broadcaster.subscribe()
+
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while not subscriber.closed:
+                # Everything published since the last write goes out in one chunk
+                frames = await subscriber.next(timeout=STREAM_HEARTBEAT)
+                if frames is None:
+                    # Heartbeat comment keeps proxies from closing idle streams
+                    yield b": ping\n\n"
+                else:
+                    yield frames
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/stats/stream")
+async def get_stream_stats():
+    return dict(broadcaster.stats, subscribers=len(broadcaster.subscribers))
+
+@app.get("/stats/quotes")
+async def get_quote_cache_stats():
+    return ai_engine.price_service.cache_stats()
+
+@app.get("/stats/predictions")
+async def get_prediction_cache_stats():
+    return dict(ai_engine.prediction_cache.stats)
+
+@app.get("/stats/breakers")
+async def get_breaker_stats():
+    return {name: breaker.to_dict() for name, breaker in breakers.items()}
+
+@app.get("/stats/llm")
+async def get_llm_stats():
+    return ai_engine.llm_output_stats()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of stage/request histograms and component stats."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/traces")
+async def get_traces(limit: int = Query(20, ge=1, le=1000)):
+    """Most recent sampled traces with their per-stage spans."""
+    return list(recent_traces)[-limit:][::-1]
+
+@app.get("/stats/precompute")
+async def get_precompute_stats():
+    return dict(market_pool.stats)
+
+@app.get("/stats/settlement")
+async def get_settlement_stats():
+    return dict(settlement.stats, queued=settlement.queued)
+
+def save_prediction(prediction: dict) -> Prediction:
+    """Convert a generated binary market into a stored Prediction."""
+    saved = store.add(dict(
+        asset=prediction["asset"],
+        currentPrice=prediction["currentPrice"],
+        predictedPrice=prediction["targetPrice"],
+        confidence=prediction["confidence"],
+        reasoning=prediction["reasoning"],
+        predictorType="AI",
+        # Binary market specific fields
+        question=prediction["question"],
+        endTimestamp=prediction["endTimestamp"],
+        yesPrice=prediction["yesPrice"],
+        noPrice=prediction["noPrice"],
+        initialYesPrice=prediction["yesPrice"],
+        totalLiquidity=prediction["totalLiquidity"],
+        marketData=prediction.get("marketData")
+    ))
+    market_maker.add_market(saved)
+    settlement.schedule(saved)
+    quote_poller.track([saved.asset])
+    broadcaster.publish({"type": "market", "prediction": saved.model_dump(mode="json")})
+    return saved
 
 @app.post("/predictions/ai")
-async def create_ai_prediction(asset: str = "BTC"):
+async def create_ai_prediction(
+    asset: str = "BTC",
+    target_percent: Optional[float] = Query(None, alias="targetPercent", gt=-100, le=1000)
+):
+    """
+    Create a one-day binary market on asset reaching targetPercent above its
+    current price (default 5%). Hot assets are served from the precomputed pool.
+    """
     try:
-        # First try to generate a binary market prediction
-        prediction = await ai_engine.generate_binary_market(
-            asset=asset,
-            target_price=None,  # It will calculate based on current price
-            duration_days=1
-        )
+        prediction = market_pool.get(asset, target_percent)
+        if prediction is None:
+            # Cold asset or off-ladder target: generate the market now
+            market_data = await ai_engine.price_service.get_market_data(asset)
+            prediction = await ai_engine.generate_binary_market(
+                asset=asset,
+                target_price=market_data["current_price"] * (1 + target_percent / 100) if target_percent is not None else None,
+                duration_days=1,
+                market_data=market_data
+            )
         
         # Convert to your Prediction model format
-        new_prediction = Prediction(
-            id=len(predictions) + 1,
-            asset=prediction["asset"],
-            currentPrice=prediction["currentPrice"],
-            predictedPrice=prediction["targetPrice"],
-            confidence=prediction["confidence"],
-            reasoning=prediction["reasoning"],
-            predictorType="AI",
-            # Binary market specific fields
-            question=prediction["question"],
-            endTimestamp=prediction["endTimestamp"],
-            yesPrice=prediction["yesPrice"],
-            noPrice=prediction["noPrice"],
-            totalLiquidity=prediction["totalLiquidity"],
-            marketData=prediction.get("marketData")
-        )
-        
-        predictions.append(new_prediction)
-        return new_prediction
-        
+        with span("store"):
+            saved = save_prediction(prediction)
+        with span("serialize"):
+            return JSONResponse(saved.model_dump(mode="json"))
+
+    except DependencyUnavailable as e:
+        # No cached quote to fall back on; tell clients when to come back
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after) or 1)})
+    except httpx.HTTPError as e:
+        logger.error(f"Upstream error creating AI prediction: {e}")
+        raise HTTPException(status_code=503, detail="Market data unavailable")
     except Exception as e:
         logger.error(f"Error creating AI prediction: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# Add other endpoints as needed...
\ No newline at end of file
+@app.post("/predictions/ai/bulk")
+async def create_ai_predictions_bulk(requests: List[MarketRequest]):
+    """
+    Generate many binary markets in one call. The response is streamed as
+    newline-delimited JSON, one line per market in completion order:
+    {"index": i, "prediction": {...}} or {"index": i, "error": "..."}
+    """
+    if len(requests) > MAX_BULK_MARKETS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_MARKETS} markets per request")
+
+    async def stream():
+        results = ai_engine.generate_binary_markets([
+            {"asset": r.asset, "target_price": r.targetPrice, "duration_days": r.durationDays}
+            for r in requests
+        ])
+        async for result in results:
+            if "error" in result:
+                yield json.dumps(result) + "\n"
+                continue
+            try:
+                prediction = save_prediction(result["market"])
+                yield json.dumps({"index": result["index"], "prediction": prediction.model_dump()}) + "\n"
+            except Exception as e:
+                logger.error(f"Error storing bulk prediction {result['index']}: {e}")
+                yield json.dumps({"index": result["index"], "error": str(e)}) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+def get_tradable_prediction(prediction_id: int) -> Prediction:
+    prediction = store.get(prediction_id)
+    if prediction is None:
+        raise HTTPException(status_code=404, detail="Prediction not found")
+    if prediction.resolved or (prediction.endTimestamp is not None and prediction.endTimestamp <= time.time()):
+        raise HTTPException(status_code=409, detail="Market is closed")
+    if prediction.totalLiquidity is None:
+        raise HTTPException(status_code=409, detail="Prediction has no market")
+    return prediction
+
+@app.get("/predictions/{prediction_id}/quote")
+async def quote_bet(prediction_id: int, side: Literal["yes", "no"] = "yes",
+                    amount: float = Query(gt=0, le=MAX_BET_AMOUNT)):
+    """Price a bet without placing it: shares received, average price, price impact and slippage."""
+    get_tradable_prediction(prediction_id)
+    try:
+        return market_maker.quote(prediction_id, side == "yes", amount)
+    except TradeSizeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/support")
+async def support_prediction(request: SupportRequest):
+    """Place a bet at the current LMSR price; supporting the AI buys YES."""
+    get_tradable_prediction(request.predictionId)
+    try:
+        bet = market_maker.bet(request.predictionId, request.supportAi, request.amount, request.userAddress)
+    except TradeSizeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    broadcaster.publish({
+        "type": "odds",
+        "id": bet.predictionId,
+        "yesPrice": bet.yesPrice,
+        "noPrice": 1 - bet.yesPrice
+    })
+    return bet
+
+# Add other endpoints as needed...
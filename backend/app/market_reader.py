@@ -0,0 +1,80 @@
+import logging
+from typing import List, Optional
+
+from eth_abi import decode
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from .rpc import JsonRpcClient, RpcError
+
+logger = logging.getLogger(__name__)
+
+PRICE_SCALE = 10**18
+# Zero-argument getters read for every market; clone markets (see
+# MarketFactory) expose questionHash instead of question
+MARKET_DETAIL_GETTERS = ["question", "questionHash", "endTime", "resolved", "yesPrice", "noPrice", "creator"]
+
+
+class MarketReader:
+    """
+    Reads PredictionMarket state for many markets at once by packing every
+    getter call into JSON-RPC batches (one HTTP round trip per batch)
+    instead of one round trip per getter per market.
+    """
+
+    def __init__(self, rpc: JsonRpcClient, abi: list):
+        self.rpc = rpc
+        self._getters = {}
+        for entry in abi:
+            if entry.get("type") == "function" and not entry.get("inputs") and entry["name"] in MARKET_DETAIL_GETTERS:
+                self._getters[entry["name"]] = (
+                    "0x" + function_signature_to_4byte_selector(f"{entry['name']}()").hex(),
+                    [output["type"] for output in entry["outputs"]]
+                )
+
+    async def get_market_details_many(self, market_addresses: List[str], block: str = "latest") -> List[Optional[dict]]:
+        """
+        Gets details for many markets
+        :param market_addresses: PredictionMarket contract addresses
+        :param block: Block tag or hex number to read at; the same block is used for every call
+        :return: One details dict per address, in order; None where a read failed
+        """
+        if not market_addresses:
+            return []
+
+        if block == "latest":
+            # Pin one block so every market in the listing is read at the same height
+            block = await self.rpc.call("eth_blockNumber")
+
+        names = [name for name in MARKET_DETAIL_GETTERS if name in self._getters]
+        calls = [
+            ("eth_call", [{"to": address, "data": self._getters[name][0]}, block])
+            for address in market_addresses
+            for name in names
+        ]
+        results = await self.rpc.batch(calls)
+
+        details = []
+        for i, address in enumerate(market_addresses):
+            raw = results[i * len(names):(i + 1) * len(names)]
+            try:
+                values = {}
+                for name, result in zip(names, raw):
+                    if isinstance(result, RpcError):
+                        raise result
+                    values[name] = decode(self._getters[name][1], bytes.fromhex(result[2:]))[0]
+                question_hash = values.get("questionHash")
+                details.append({
+                    "address": address,
+                    "question": values.get("question"),
+                    "questionHash": "0x" + question_hash.hex() if question_hash is not None else None,
+                    "endTime": values["endTime"],
+                    "resolved": values["resolved"],
+                    "yesPrice": values["yesPrice"] / PRICE_SCALE,
+                    "noPrice": values["noPrice"] / PRICE_SCALE,
+                    "creator": to_checksum_address(values["creator"]),
+                    "blockNumber": int(block, 16) if isinstance(block, str) and block.startswith("0x") else block
+                })
+            except Exception as e:
+                logger.error(f"Error reading market details for {address}: {e}")
+                details.append(None)
+        return details
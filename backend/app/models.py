@@ -1,6 +1,16 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
+import math
+import os
+
+# Largest bet /support and the quote endpoint accept. Markets open with 1000
+# liquidity, i.e. LMSR b = 1000 / ln 2; a bet of this size moves prices by
+# e^(amount / b) = 1e4, the whole range the market maker allows.
+MAX_BET_AMOUNT = float(os.getenv("MAX_BET_AMOUNT", str(round(1000 / math.log(2) * math.log(1e4)))))
+
+# Longest market POST /predictions/ai/bulk creates
+MAX_DURATION_DAYS = int(os.getenv("MAX_DURATION_DAYS", "365"))
 
 class MarketData(BaseModel):
     volume_24h: float
@@ -23,4 +33,33 @@ class Prediction(BaseModel):
     endTimestamp: Optional[float] = None
     yesPrice: Optional[float] = None
     noPrice: Optional[float] = None
-    totalLiquidity: Optional[float] = None
\ No newline at end of file
+    totalLiquidity: Optional[float] = None
+    # Opening YES price; yesPrice/noPrice move as bets are placed
+    initialYesPrice: Optional[float] = None
+    marketAddress: Optional[str] = None
+    resolved: bool = False
+    outcome: Optional[bool] = None
+    settlementPrice: Optional[float] = None
+
+class MarketRequest(BaseModel):
+    asset: str
+    targetPrice: Optional[float] = Field(None, gt=0)
+    durationDays: int = Field(1, ge=1, le=MAX_DURATION_DAYS)
+
+class SupportRequest(BaseModel):
+    predictionId: int
+    amount: float = Field(gt=0, le=MAX_BET_AMOUNT)
+    # Supporting the AI buys YES; otherwise NO
+    supportAi: bool = True
+    userAddress: Optional[str] = None
+
+class Bet(BaseModel):
+    id: int
+    predictionId: int
+    userAddress: Optional[str] = None
+    yes: bool
+    amount: float
+    shares: float
+    # YES price after the bet
+    yesPrice: float
+    createdAt: float
@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from .ai_engine import AIPredictionEngine
+from .telemetry import background_trace
+
+logger = logging.getLogger(__name__)
+
+# Target (percent above the current price) used when POST /predictions/ai gives none
+DEFAULT_TARGET_PERCENT = 5.0
+
+
+def _parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+class MarketPool:
+    """
+    Pre-generated binary markets for hot assets, so requests for them skip
+    the quote and LLM round trips.
+
+    For every hot asset and every target on the ladder (percent away from
+    the current price) the pool keeps the latest generated market. A
+    background loop regenerates an asset's ladder when it is older than
+    `ttl` or its price has moved more than `move_threshold` percent since
+    it was generated. get() is a dict lookup plus a cached-quote check.
+    The pool is empty (and costs nothing) unless HOT_ASSETS is set.
+    """
+
+    def __init__(
+        self,
+        engine: AIPredictionEngine,
+        assets: List[str] = None,
+        ladder: List[float] = None,
+        duration_days: int = 1,
+        ttl: float = None,
+        move_threshold: float = None,
+        interval: float = None
+    ):
+        self.engine = engine
+        self.assets = [a.upper() for a in (assets if assets is not None else _parse_list(os.getenv("HOT_ASSETS", "")))]
+        self.ladder = ladder if ladder is not None else [
+            float(p) for p in _parse_list(os.getenv("HOT_TARGET_LADDER", "-10,-5,-2,2,5,10"))
+        ]
+        if any(percent <= -100 for percent in self.ladder):
+            raise ValueError(f"HOT_TARGET_LADDER targets must be above -100%, got {self.ladder}")
+        self.duration_days = duration_days
+        self.ttl = ttl or float(os.getenv("PRECOMPUTE_TTL", "300"))
+        self.move_threshold = move_threshold or float(os.getenv("PRECOMPUTE_MOVE_THRESHOLD", "0.5"))
+        self.interval = interval or float(os.getenv("PRECOMPUTE_INTERVAL", "5"))
+
+        # (asset, target percent) -> (target_price, market_data, prediction_data, generated_at)
+        self._markets: Dict[tuple, tuple] = {}
+        self._wakeup = asyncio.Event()
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "markets": 0, "errors": 0}
+
+    def _key(self, asset: str, target_percent: Optional[float]) -> tuple:
+        return asset.upper(), float(DEFAULT_TARGET_PERCENT if target_percent is None else target_percent)
+
+    def get(self, asset: str, target_percent: float = None) -> Optional[dict]:
+        """
+        A ready market for asset at target_percent (default +5%), or None if
+        the asset is cold, the target is off the ladder, or the pooled market
+        is stale. The market's end time counts from now, as for one generated
+        on demand.
+        """
+        key = self._key(asset, target_percent)
+        entry = self._markets.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        target_price, market_data, prediction_data, generated_at = entry
+        quote = self.engine.price_service.quote_cache.peek(key[0])
+        moved = quote is not None and self._moved(market_data["current_price"], quote["current_price"])
+        if time.time() - generated_at > self.ttl or moved:
+            self.stats["misses"] += 1
+            self._wakeup.set()
+            return None
+        self.stats["hits"] += 1
+        return self.engine._build_market(key[0], target_price, self.duration_days, market_data, prediction_data)
+
+    def _moved(self, generated_price: float, price: float) -> bool:
+        return abs(price / generated_price - 1) * 100 > self.move_threshold
+
+    def _needs_refresh(self, asset: str, price: float, now: float) -> bool:
+        for percent in self.ladder:
+            entry = self._markets.get((asset, percent))
+            if entry is None or now - entry[3] > self.ttl or self._moved(entry[1]["current_price"], price):
+                return True
+        return False
+
+    async def run(self):
+        """Refresh loop; run as a background task."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Market precompute error: {e}")
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def refresh(self):
+        """Regenerate the ladders of hot assets that are missing, expired or whose price moved."""
+        if not self.assets or not self.ladder:
+            return
+        quotes = await self.engine.price_service.get_market_data_many(self.assets)
+        now = time.time()
+        stale = [asset for asset in self.assets
+                 if asset in quotes and self._needs_refresh(asset, quotes[asset]["current_price"], now)]
+        if not stale:
+            return
+
+        requests = [
+            {
+                "asset": asset,
+                "target_price": quotes[asset]["current_price"] * (1 + percent / 100),
+                "duration_days": self.duration_days,
+                "percent": percent
+            }
+            for asset in stale for percent in self.ladder
+        ]
+        with background_trace("precompute"):
+            async for result in self.engine.generate_binary_markets(requests):
+                request = requests[result["index"]]
+                market = result.get("market")
+                if market is None or market.get("degraded"):
+                    # Keep serving the previous market until it expires
+                    continue
+                self._markets[(request["asset"], request["percent"])] = (
+                    market["targetPrice"],
+                    market["marketData"],
+                    {
+                        "yesProbability": market["yesPrice"],
+                        "noProbability": market["noPrice"],
+                        "confidence": market["confidence"],
+                        "reasoning": market["reasoning"]
+                    },
+                    time.time()
+                )
+        self.stats["refreshes"] += 1
+        self.stats["markets"] = len(self._markets)
+        logger.info(f"Precomputed markets for {', '.join(stale)}")
@@ -0,0 +1,129 @@
+import json
+import logging
+import math
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache for LLM prediction results, keyed on quantized market state.
+
+    Two requests whose asset, duration, price, 24h/7d change and target delta
+    fall into the same buckets reuse one completion. When `path` is set the
+    entries are also written to a SQLite file so they survive restarts.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        path: Optional[str] = None,
+        price_step: float = 0.005,
+        change_step: float = 1.0,
+        target_step: float = 0.5
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.price_step = price_step
+        self.change_step = change_step
+        self.target_step = target_step
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self.stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "stale_hits": 0}
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS prediction_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM prediction_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def make_key(self, asset: str, duration_days: int, market_data: dict, target_delta_percent: float) -> str:
+        """
+        Build a cache key from quantized market features
+        :param asset: Cryptocurrency symbol
+        :param duration_days: Market duration
+        :param market_data: Market data as returned by PriceService
+        :param target_delta_percent: Target price distance from the current price, in percent
+        :return: Cache key string
+        """
+        # Log-spaced price buckets keep the relative width constant across assets
+        price_bucket = round(math.log(market_data['current_price']) / math.log1p(self.price_step))
+        change_24h_bucket = round(market_data['percent_change_24h'] / self.change_step)
+        change_7d_bucket = round(market_data['percent_change_7d'] / self.change_step)
+        target_bucket = round(target_delta_percent / self.target_step)
+        return f"{asset.upper()}:{duration_days}:{price_bucket}:{change_24h_bucket}:{change_7d_bucket}:{target_bucket}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a copy of the cached prediction for a key, or None."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry and entry[1] > now:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return dict(entry[0])
+        # Expired entries stay in memory (until evicted) for get_stale
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM prediction_cache WHERE key = ? AND expires_at > ?",
+                (key, now)
+            ).fetchone()
+            if row:
+                value = json.loads(row[0])
+                self._remember(key, value, row[1])
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return dict(value)
+
+        self.stats["misses"] += 1
+        return None
+
+    def get_stale(self, key: str, max_age: float) -> Optional[dict]:
+        """
+        Return a prediction for a key even if its TTL has passed, as long as it
+        was cached less than max_age seconds ago; used while the LLM is unavailable.
+        """
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM prediction_cache WHERE key = ?", (key,)
+            ).fetchone()
+            entry = (json.loads(row[0]), row[1]) if row else None
+        if entry is None or entry[1] - self.ttl + max_age < time.time():
+            return None
+        self.stats["stale_hits"] += 1
+        return dict(entry[0])
+
+    def set(self, key: str, value: dict):
+        """Cache a prediction result under a key."""
+        expires_at = time.time() + self.ttl
+        self._remember(key, dict(value), expires_at)
+        if self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO prediction_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at)
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Error writing prediction cache entry: {e}")
+
+    def _remember(self, key: str, value: dict, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -1,18 +1,155 @@
 import os
-import requests
+import re
+import asyncio
+import httpx
 from dotenv import load_dotenv
 import logging
+from .quote_cache import QuoteCache
+from .resilience import CircuitBreaker, register
+from .telemetry import span
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+
+def _is_upstream_failure(error: BaseException) -> bool:
+    """Errors that say CoinMarketCap is unhealthy (not e.g. a rejected symbol)."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.HTTPError, ValueError, KeyError))
+
+
+_INVALID_SYMBOLS = re.compile(r'Invalid values? for "symbol": "([^"]*)"')
+
+
+def _invalid_symbols(response: httpx.Response) -> set:
+    """Symbols named in a CoinMarketCap 400 'Invalid value for "symbol"' error."""
+    try:
+        message = response.json()["status"]["error_message"] or ""
+    except (ValueError, KeyError, TypeError):
+        return set()
+    match = _INVALID_SYMBOLS.search(message)
+    return {symbol.strip().upper() for symbol in match.group(1).split(",")} if match else set()
+
+
 class PriceService:
     def __init__(self):
         self.api_key = os.getenv("COINMARKETCAP_API_KEY")
-        self.base_url = "https://pro-api.coinmarketcap.com/v1"
-        
+        self.base_url = os.getenv("COINMARKETCAP_BASE_URL", "https://pro-api.coinmarketcap.com/v1")
+
+        # A missing key is reported on first use (and by readiness checks), not at startup
+        if not self.api_key:
+            logger.warning("COINMARKETCAP_API_KEY not found in environment variables")
+
+        # One pooled client shared by every request: keeps TLS connections to
+        # CoinMarketCap alive instead of opening a new one per quote. We only
+        # talk to a single host, so the pool limits are the per-host limits.
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                'X-CMC_PRO_API_KEY': self.api_key or "",
+                'Accept': 'application/json'
+            },
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("CMC_MAX_CONNECTIONS", "20")),
+                max_keepalive_connections=int(os.getenv("CMC_MAX_KEEPALIVE", "10")),
+                keepalive_expiry=float(os.getenv("CMC_KEEPALIVE_EXPIRY", "30"))
+            ),
+            timeout=httpx.Timeout(
+                float(os.getenv("CMC_TIMEOUT", "10")),
+                connect=float(os.getenv("CMC_CONNECT_TIMEOUT", "5"))
+            )
+        )
+
+        # Short-lived quote cache so bursts for one asset share upstream calls
+        self.quote_cache = QuoteCache(
+            ttl=float(os.getenv("QUOTE_CACHE_TTL", "15")),
+            stale_ttl=float(os.getenv("QUOTE_CACHE_STALE_TTL", "30"))
+        )
+        # quotes/latest accepts a comma-separated symbol list; larger lists are
+        # split into chunks of this size and fetched concurrently
+        self.max_symbols_per_request = int(os.getenv("CMC_MAX_SYMBOLS_PER_REQUEST", "100"))
+
+        # Fail fast while CoinMarketCap is down (CMC_BREAKER_*, CMC_MAX_IN_FLIGHT)
+        # and meanwhile serve quotes up to QUOTE_DEGRADED_MAX_AGE seconds old
+        self.breaker = register(CircuitBreaker.from_env("cmc", "CMC", is_failure=_is_upstream_failure))
+        self.degraded_max_age = float(os.getenv("QUOTE_DEGRADED_MAX_AGE", "3600"))
+        self.stats = {"degraded": 0}
+
+    async def close(self):
+        """Close the pooled HTTP client."""
+        await self.client.aclose()
+
+    async def _fetch_quotes(self, symbols: list) -> dict:
+        """
+        Fetch raw CoinMarketCap quotes for the given symbols
+        :param symbols: Upper-case cryptocurrency symbols
+        :return: The 'data' section of the quotes/latest response; symbols
+                 CoinMarketCap rejects as invalid are left out
+        """
         if not self.api_key:
             raise ValueError("COINMARKETCAP_API_KEY not found in environment variables")
+        while symbols:
+            async with self.breaker.guard():
+                with span("quote_fetch", symbols=len(symbols)):
+                    response = await self.client.get(
+                        "/cryptocurrency/quotes/latest",
+                        params={
+                            'symbol': ",".join(symbols),
+                            'convert': 'USD'
+                        }
+                    )
+                    invalid = _invalid_symbols(response) & set(symbols) if response.status_code == 400 else set()
+                    if not invalid:
+                        response.raise_for_status()
+                        return response.json()['data'] or {}
+            # One unknown symbol fails the whole request; ask again without it
+            logger.warning(f"CoinMarketCap rejected unknown symbols {', '.join(sorted(invalid))}")
+            symbols = [symbol for symbol in symbols if symbol not in invalid]
+        return {}
+
+    async def _fetch_market_data(self, symbols: list) -> dict:
+        """
+        Fetch market data for the given symbols, bypassing the cache
+        :param symbols: Upper-case cryptocurrency symbols
+        :return: Dictionary mapping symbol to market data
+        """
+        chunks = [
+            symbols[i:i + self.max_symbols_per_request]
+            for i in range(0, len(symbols), self.max_symbols_per_request)
+        ]
+        data = {}
+        for chunk_data in await asyncio.gather(*(self._fetch_quotes(chunk) for chunk in chunks)):
+            data.update(chunk_data)
+
+        market_data = {}
+        for symbol in symbols:
+            if symbol not in data:
+                continue
+            quote = data[symbol]['quote']['USD']
+            market_data[symbol] = {
+                'current_price': quote['price'],
+                'market_cap': quote['market_cap'],
+                'volume_24h': quote['volume_24h'],
+                'percent_change_1h': quote['percent_change_1h'],
+                'percent_change_24h': quote['percent_change_24h'],
+                'percent_change_7d': quote['percent_change_7d']
+            }
+        return market_data
+
+    def cache_stats(self) -> dict:
+        """Return quote cache hit/miss/coalesce counters and last-known quotes served."""
+        return dict(self.quote_cache.stats, **self.stats)
+
+    def _last_known(self, symbols: list) -> dict:
+        """Cached market data, however stale (up to degraded_max_age), for symbols we could not refresh."""
+        market_data = {}
+        for symbol in symbols:
+            data = self.quote_cache.last_known(symbol, self.degraded_max_age)
+            if data is not None:
+                market_data[symbol] = data
+        self.stats["degraded"] += len(market_data)
+        return market_data
 
     async def get_price(self, symbol: str) -> float:
         """
@@ -20,77 +157,57 @@ class PriceService:
         :param symbol: Cryptocurrency symbol (e.g., 'BTC', 'ETH')
         :return: Current price in USD
         """
-        try:
-            headers = {
-                'X-CMC_PRO_API_KEY': self.api_key,
-                'Accept': 'application/json'
-            }
-            
-            # Convert common symbols to CMC format
-            symbol = symbol.upper()
-            
-            params = {
-                'symbol': symbol,
-                'convert': 'USD'
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/cryptocurrency/quotes/latest",
-                headers=headers,
-                params=params
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            if not data['data'] or symbol not in data['data']:
-                raise ValueError(f"Price not found for {symbol}")
-                
-            price = data['data'][symbol]['quote']['USD']['price']
-            logger.info(f"Got price for {symbol}: ${price}")
-            return price
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching price from CoinMarketCap: {e}")
-            raise
-            
+        market_data = await self.get_market_data(symbol)
+        price = market_data['current_price']
+        logger.info(f"Got price for {symbol.upper()}: ${price}")
+        return price
+
     async def get_market_data(self, symbol: str) -> dict:
         """
         Get detailed market data for a cryptocurrency
         :param symbol: Cryptocurrency symbol (e.g., 'BTC', 'ETH')
-        :return: Dictionary with market data
+        :return: Dictionary with market data; the last known data when CoinMarketCap is unavailable
         """
+        symbol = symbol.upper()
         try:
-            headers = {
-                'X-CMC_PRO_API_KEY': self.api_key,
-                'Accept': 'application/json'
-            }
-            
-            symbol = symbol.upper()
-            params = {
-                'symbol': symbol,
-                'convert': 'USD'
-            }
-            
-            response = requests.get(
-                f"{self.base_url}/cryptocurrency/quotes/latest",
-                headers=headers,
-                params=params
-            )
-            
-            response.raise_for_status()
-            data = response.json()['data'][symbol]
-            quote = data['quote']['USD']
-            
-            return {
-                'current_price': quote['price'],
-                'market_cap': quote['market_cap'],
-                'volume_24h': quote['volume_24h'],
-                'percent_change_1h': quote['percent_change_1h'],
-                'percent_change_24h': quote['percent_change_24h'],
-                'percent_change_7d': quote['percent_change_7d']
-            }
-            
+            return await self.quote_cache.get(symbol, self._fetch_market_data)
+
         except Exception as e:
+            last_known = self._last_known([symbol])
+            if last_known:
+                logger.debug(f"Serving last known market data for {symbol}: {e}")
+                return last_known[symbol]
             logger.error(f"Error fetching market data for {symbol}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_market_data_many(self, symbols: list, fresh: bool = False) -> dict:
+        """
+        Get detailed market data for several cryptocurrencies in as few
+        upstream calls as possible
+        :param symbols: Cryptocurrency symbols (e.g., ['BTC', 'ETH'])
+        :param fresh: Bypass the quote cache (e.g. for settlement prices); never
+                      falls back to last known data
+        :return: Dictionary mapping upper-case symbol to market data, in the
+                 same shape as get_market_data; unknown symbols are omitted
+        """
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in symbols))
+        try:
+            if fresh:
+                market_data = await self._fetch_market_data(symbols)
+            else:
+                try:
+                    market_data = await self.quote_cache.get_many(symbols, self._fetch_market_data)
+                except Exception as e:
+                    market_data = self._last_known(symbols)
+                    if not market_data:
+                        raise
+                    logger.debug(f"Serving last known market data for {len(market_data)} symbols: {e}")
+
+            missing = [symbol for symbol in symbols if symbol not in market_data]
+            if missing:
+                logger.warning(f"Market data not found for {', '.join(missing)}")
+            return market_data
+
+        except Exception as e:
+            logger.error(f"Error fetching market data for {len(symbols)} symbols: {e}")
+            raise
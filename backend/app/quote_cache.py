@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Fetches market data for a list of symbols, returning {symbol: market_data}
+Fetcher = Callable[[List[str]], Awaitable[Dict[str, dict]]]
+
+
+class QuoteCache:
+    """
+    Per-symbol market data cache with TTL, stale-while-revalidate and
+    request coalescing.
+
+    - Entries younger than `ttl` are served directly.
+    - Entries younger than `ttl + stale_ttl` are served immediately while a
+      single background refresh is started.
+    - Concurrent misses for the same symbol share one in-flight fetch.
+    """
+
+    def __init__(self, ttl: float = 15.0, stale_ttl: float = 30.0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: Dict[str, tuple] = {}  # symbol -> (market_data, fetched_at)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "refreshes": 0,
+            "errors": 0,
+        }
+
+    def peek(self, symbol: str):
+        """Return the cached entry for a symbol regardless of age, or None."""
+        entry = self._entries.get(symbol)
+        return dict(entry[0]) if entry else None
+
+    def last_known(self, symbol: str, max_age: float):
+        """Return the cached entry for a symbol if fetched less than max_age seconds ago, else None."""
+        entry = self._entries.get(symbol)
+        if entry is None or time.monotonic() - entry[1] > max_age:
+            return None
+        return dict(entry[0])
+
+    async def get(self, symbol: str, fetch: Fetcher) -> dict:
+        """
+        Get market data for a symbol, fetching it only when needed
+        :param symbol: Upper-case cryptocurrency symbol
+        :param fetch: Coroutine function used to load missing symbols
+        :return: A copy of the cached market data
+        """
+        entry = self._entries.get(symbol)
+        if entry:
+            age = time.monotonic() - entry[1]
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                return dict(entry[0])
+            if age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                if symbol not in self._inflight:
+                    self.stats["refreshes"] += 1
+                    self._start_fetch([symbol], fetch)
+                return dict(entry[0])
+
+        task = self._inflight.get(symbol)
+        if task:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = self._start_fetch([symbol], fetch)
+
+        # Shield so a cancelled caller does not cancel the fetch others share
+        result = await asyncio.shield(task)
+        if symbol not in result:
+            raise ValueError(f"Price not found for {symbol}")
+        return dict(result[symbol])
+
+    async def get_many(self, symbols: List[str], fetch: Fetcher) -> Dict[str, dict]:
+        """
+        Get market data for several symbols, loading all misses in one fetch
+        :param symbols: Upper-case cryptocurrency symbols
+        :param fetch: Coroutine function used to load missing symbols
+        :return: Dictionary mapping symbol to a copy of its market data;
+                 symbols the upstream does not know are omitted
+        """
+        now = time.monotonic()
+        results: Dict[str, dict] = {}
+        stale, missing, waiting = [], [], {}
+
+        for symbol in dict.fromkeys(symbols):
+            entry = self._entries.get(symbol)
+            age = now - entry[1] if entry else None
+            if entry and age < self.ttl:
+                self.stats["hits"] += 1
+                results[symbol] = dict(entry[0])
+            elif entry and age < self.ttl + self.stale_ttl:
+                self.stats["stale_hits"] += 1
+                results[symbol] = dict(entry[0])
+                if symbol not in self._inflight:
+                    stale.append(symbol)
+            elif symbol in self._inflight:
+                self.stats["coalesced"] += 1
+                waiting[symbol] = self._inflight[symbol]
+            else:
+                self.stats["misses"] += 1
+                missing.append(symbol)
+
+        if stale:
+            self.stats["refreshes"] += 1
+            self._start_fetch(stale, fetch)
+        if missing:
+            task = self._start_fetch(missing, fetch)
+            waiting.update((symbol, task) for symbol in missing)
+
+        for task in set(waiting.values()):
+            fetched = await asyncio.shield(task)
+            for symbol, pending in waiting.items():
+                if pending is task and symbol in fetched:
+                    results[symbol] = dict(fetched[symbol])
+        return results
+
+    def _start_fetch(self, symbols: List[str], fetch: Fetcher) -> asyncio.Task:
+        task = asyncio.ensure_future(self._fetch_and_store(symbols, fetch))
+        for symbol in symbols:
+            self._inflight[symbol] = task
+        task.add_done_callback(self._log_failure)
+        return task
+
+    async def _fetch_and_store(self, symbols: List[str], fetch: Fetcher) -> Dict[str, dict]:
+        try:
+            result = await fetch(symbols)
+            fetched_at = time.monotonic()
+            for symbol, market_data in result.items():
+                self._entries[symbol] = (market_data, fetched_at)
+            return result
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            for symbol in symbols:
+                if self._inflight.get(symbol) is asyncio.current_task():
+                    del self._inflight[symbol]
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        # Retrieve the exception so background refresh failures are not
+        # reported as "never retrieved"; foreground callers re-raise it.
+        if not task.cancelled() and task.exception():
+            logger.warning(f"Quote fetch failed: {task.exception()}")
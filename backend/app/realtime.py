@@ -0,0 +1,138 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+from collections import deque
+from typing import Iterable, Optional, Set
+
+from .price_service import PriceService
+
+logger = logging.getLogger(__name__)
+
+
+class Subscriber:
+    """One connected client: a read cursor into the broadcaster's shared event log."""
+
+    def __init__(self, broadcaster: "Broadcaster"):
+        self.broadcaster = broadcaster
+        self.cursor = broadcaster.sequence  # sequence number of the last event read
+        self.dropped = 0
+        self.closed = False
+
+    async def next(self, timeout: float = None) -> Optional[bytes]:
+        """
+        Every event published since the last call, as one chunk of encoded
+        SSE frames, or None on timeout or close.
+        """
+        while self.cursor == self.broadcaster.sequence:
+            if self.closed:
+                return None
+            try:
+                await asyncio.wait_for(self.broadcaster.published.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed:
+            return None
+        return self.broadcaster.read(self)
+
+
+class Broadcaster:
+    """
+    Fans out events to all subscribers. Each event is encoded once, as an
+    SSE frame, into a shared log of the last `max_buffer` events; publishing
+    appends to the log and wakes the subscribers waiting for it, so clients
+    that are not reading (e.g. blocked on a full socket) cost nothing per
+    event. A subscriber that falls more than `max_buffer` events behind
+    skips the ones it missed, and one that keeps falling behind is
+    disconnected.
+    """
+
+    def __init__(self, max_buffer: int = None, max_dropped: int = None):
+        self.max_buffer = max_buffer or int(os.getenv("STREAM_MAX_BUFFER", "256"))
+        self.max_dropped = max_dropped or int(os.getenv("STREAM_MAX_DROPPED", "1024"))
+        self.subscribers: Set[Subscriber] = set()
+        self.stats = {"published": 0, "dropped": 0, "disconnected": 0}
+        self.sequence = 0  # sequence number of the last published event
+        self._log: deque = deque(maxlen=self.max_buffer)
+        # Set and replaced on every publish, waking everyone waiting on it
+        self.published = asyncio.Event()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: dict):
+        if not self.subscribers:
+            return
+        self.stats["published"] += 1
+        self._log.append(b"data: " + json.dumps(event, separators=(",", ":")).encode() + b"\n\n")
+        self.sequence += 1
+        published, self.published = self.published, asyncio.Event()
+        published.set()
+
+    def read(self, subscriber: Subscriber) -> Optional[bytes]:
+        """Frames the subscriber has not read yet; None if it was disconnected for falling behind."""
+        oldest = self.sequence - len(self._log) + 1
+        missed = oldest - subscriber.cursor - 1
+        if missed > 0:
+            subscriber.dropped += missed
+            self.stats["dropped"] += missed
+            if subscriber.dropped > self.max_dropped:
+                logger.warning("Disconnecting slow stream subscriber")
+                self.stats["disconnected"] += 1
+                self.unsubscribe(subscriber)
+                return None
+        unread = self.sequence - max(subscriber.cursor, oldest - 1)
+        subscriber.cursor = self.sequence
+        if unread == 1:
+            return self._log[-1]
+        return b"".join(itertools.islice(self._log, len(self._log) - unread, None))
+
+
+class QuotePoller:
+    """
+    Single upstream quote poller shared by every subscriber: polls the
+    assets with open markets and publishes a price delta only when an
+    asset's price changes. Idle while nobody is subscribed.
+    """
+
+    def __init__(self, price_service: PriceService, broadcaster: Broadcaster, interval: float = None):
+        self.price_service = price_service
+        self.broadcaster = broadcaster
+        self.interval = interval or float(os.getenv("STREAM_QUOTE_INTERVAL", "5"))
+        self.assets: Set[str] = set()
+        self._last_prices = {}
+
+    def track(self, assets: Iterable[str]):
+        self.assets.update(asset.upper() for asset in assets)
+
+    async def run(self):
+        while True:
+            try:
+                if self.broadcaster.subscribers and self.assets:
+                    await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Quote poller error: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        quotes = await self.price_service.get_market_data_many(sorted(self.assets))
+        for asset, market_data in quotes.items():
+            price = market_data["current_price"]
+            if self._last_prices.get(asset) == price:
+                continue
+            self._last_prices[asset] = price
+            self.broadcaster.publish({
+                "type": "price",
+                "asset": asset,
+                "price": price,
+                "percent_change_24h": market_data["percent_change_24h"]
+            })
@@ -0,0 +1,184 @@
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict
+
+from .telemetry import registry
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyUnavailable(Exception):
+    """An upstream call was refused without being attempted."""
+
+    def __init__(self, name: str, message: str, retry_after: float = 0.0):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"{name} {message}")
+
+
+class CircuitOpenError(DependencyUnavailable):
+    """The dependency's circuit is open after repeated failures."""
+
+
+class BulkheadFullError(DependencyUnavailable):
+    """Too many calls to the dependency are already in flight."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker and bulkhead for one upstream dependency; wrap each call
+    in `async with breaker.guard():`.
+
+    - closed: calls go through; `failure_threshold` consecutive failures
+      (errors for which is_failure is true, or calls slower than
+      `slow_call_threshold`) open the circuit.
+    - open: calls fail immediately with CircuitOpenError for `reset_timeout`
+      seconds, then the circuit becomes half-open.
+    - half-open: up to `half_open_max` probe calls go through; a success
+      closes the circuit, a failure opens it again.
+
+    At most `max_in_flight` calls run at once; extra calls fail immediately
+    with BulkheadFullError instead of queueing behind a slow upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+        max_in_flight: int = None,
+        slow_call_threshold: float = None,
+        is_failure: Callable[[BaseException], bool] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self.max_in_flight = max_in_flight
+        self.slow_call_threshold = slow_call_threshold
+        self.is_failure = is_failure or (lambda e: isinstance(e, Exception))
+
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._in_flight = 0
+        self._probes = 0
+        self.stats = {"calls": 0, "failures": 0, "slowCalls": 0, "rejected": 0, "shed": 0, "opened": 0}
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, is_failure: Callable[[BaseException], bool] = None,
+                 max_in_flight: int = 64) -> "CircuitBreaker":
+        """Breaker configured by <prefix>_BREAKER_FAILURES, _BREAKER_RESET, _BREAKER_SLOW_CALL and _MAX_IN_FLIGHT."""
+        slow_call = os.getenv(f"{prefix}_BREAKER_SLOW_CALL")
+        return cls(
+            name,
+            failure_threshold=int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv(f"{prefix}_BREAKER_RESET", "30")),
+            max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", str(max_in_flight))) or None,
+            slow_call_threshold=float(slow_call) if slow_call else None,
+            is_failure=is_failure
+        )
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through."""
+        if self.state != "open":
+            return 0.0
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def _admit(self):
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, "circuit is open", self.retry_after)
+            self.state = "half_open"
+            self._probes = 0
+            logger.info(f"Circuit {self.name} half-open; probing")
+        # Shed before taking a probe slot; a shed call never reaches the upstream
+        # and must not leave the circuit waiting on a probe that never runs
+        if self.max_in_flight and self._in_flight >= self.max_in_flight:
+            self.stats["shed"] += 1
+            raise BulkheadFullError(self.name, f"has {self._in_flight} calls in flight")
+        if self.state == "half_open":
+            if self._probes >= self.half_open_max:
+                self.stats["rejected"] += 1
+                raise CircuitOpenError(self.name, "circuit is half-open", self.reset_timeout)
+            self._probes += 1
+        self._in_flight += 1
+        self.stats["calls"] += 1
+
+    @asynccontextmanager
+    async def guard(self):
+        """Admit one call (or raise DependencyUnavailable) and record its outcome."""
+        self._admit()
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._in_flight -= 1
+            if self.is_failure(e):
+                self._record_failure(f"{type(e).__name__}: {e}")
+            else:
+                self._record_success()
+            raise
+        except BaseException:
+            # Cancellation says nothing about the upstream's health
+            self._in_flight -= 1
+            if self.state == "half_open":
+                self._probes -= 1
+            raise
+        self._in_flight -= 1
+        duration = time.monotonic() - started
+        if self.slow_call_threshold is not None and duration > self.slow_call_threshold:
+            self.stats["slowCalls"] += 1
+            self._record_failure(f"call took {duration:.2f}s")
+        else:
+            self._record_success()
+
+    def _record_failure(self, reason: str):
+        self.stats["failures"] += 1
+        self._failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self._failures >= self.failure_threshold):
+            if self.state != "open":
+                self.stats["opened"] += 1
+                logger.warning(f"Circuit {self.name} open for {self.reset_timeout:.0f}s after "
+                               f"{self._failures} failures ({reason})")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def _record_success(self):
+        if self.state == "open":
+            # A call admitted before the circuit opened; only probes close it
+            return
+        if self.state == "half_open":
+            logger.info(f"Circuit {self.name} closed")
+            self.state = "closed"
+        self._failures = 0
+
+    def to_dict(self) -> dict:
+        return dict(
+            self.stats,
+            state=self.state,
+            open=int(self.state == "open"),
+            inFlight=self._in_flight,
+            retryAfter=round(self.retry_after, 3)
+        )
+
+
+# Every breaker created by the services, for /stats/breakers and /metrics
+breakers: Dict[str, CircuitBreaker] = {}
+
+
+def register(breaker: CircuitBreaker) -> CircuitBreaker:
+    """Track a breaker and export its stats as predictx_breaker_<name>_* gauges."""
+    breakers[breaker.name] = breaker
+    registry.register_stats(f"breaker_{breaker.name}", breaker.to_dict)
+    return breaker
+
+
+def degraded_dependencies() -> list:
+    """Names of dependencies whose circuit is currently open."""
+    return [name for name, breaker in breakers.items() if breaker.state != "closed"]
@@ -0,0 +1,105 @@
+import asyncio
+import itertools
+import logging
+import os
+from typing import List, Tuple
+
+import httpx
+
+from .resilience import CircuitBreaker, register
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+
+class RpcError(Exception):
+    """Error returned by the node for a single JSON-RPC call."""
+
+    def __init__(self, error: dict):
+        self.code = error.get("code")
+        self.data = error.get("data")
+        super().__init__(error.get("message", str(error)))
+
+
+def _is_node_failure(error: BaseException) -> bool:
+    """Transport errors, timeouts, 429 and 5xx; errors the node returns for a call are not failures."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, (httpx.HTTPError, ValueError))
+
+
+class JsonRpcClient:
+    """
+    Minimal async JSON-RPC client with request batching, used for read paths
+    that would otherwise need one HTTP round trip per contract call.
+    """
+
+    def __init__(self, url: str = None, max_batch_size: int = None, timeout: float = None):
+        self.url = url or os.getenv("BASE_RPC_URL", "https://sepolia.base.org")
+        # Public nodes commonly cap batches at 100 calls
+        self.max_batch_size = max_batch_size or int(os.getenv("RPC_MAX_BATCH_SIZE", "100"))
+        self.client = httpx.AsyncClient(
+            timeout=timeout or float(os.getenv("RPC_TIMEOUT", "10")),
+            limits=httpx.Limits(max_connections=int(os.getenv("RPC_MAX_CONNECTIONS", "10")))
+        )
+        self._ids = itertools.count(1)
+        # Fail fast while the node is down (RPC_BREAKER_*, RPC_MAX_IN_FLIGHT)
+        self.breaker = register(CircuitBreaker.from_env("rpc", "RPC", is_failure=_is_node_failure))
+
+    async def close(self):
+        await self.client.aclose()
+
+    async def call(self, method: str, params: list = None):
+        """Send a single JSON-RPC call and return its result."""
+        async with self.breaker.guard():
+            with span("rpc", method=method):
+                response = await self.client.post(self.url, json={
+                    "jsonrpc": "2.0",
+                    "id": next(self._ids),
+                    "method": method,
+                    "params": params or []
+                })
+                response.raise_for_status()
+            payload = response.json()
+        if "error" in payload:
+            raise RpcError(payload["error"])
+        return payload["result"]
+
+    async def batch(self, calls: List[Tuple[str, list]]) -> list:
+        """
+        Send many calls as JSON-RPC batches of at most max_batch_size
+        :param calls: List of (method, params) tuples
+        :return: Results in call order; failed calls are returned as RpcError
+                 instances rather than raised, so one bad call does not fail the rest
+        """
+        chunks = [calls[i:i + self.max_batch_size] for i in range(0, len(calls), self.max_batch_size)]
+        results = await asyncio.gather(*(self._send_batch(chunk) for chunk in chunks))
+        return [result for chunk in results for result in chunk]
+
+    async def _send_batch(self, calls: List[Tuple[str, list]]) -> list:
+        ids = [next(self._ids) for _ in calls]
+        async with self.breaker.guard():
+            with span("rpc_batch", calls=len(calls)):
+                response = await self.client.post(self.url, json=[
+                    {"jsonrpc": "2.0", "id": call_id, "method": method, "params": params}
+                    for call_id, (method, params) in zip(ids, calls)
+                ])
+                response.raise_for_status()
+            payload = response.json()
+        if isinstance(payload, dict):
+            # Some nodes answer a rejected batch with a single error object
+            error = RpcError(payload.get("error", {"message": "Invalid batch response"}))
+            return [error] * len(calls)
+
+        # Responses may arrive in any order; match them back by id
+        by_id = {item.get("id"): item for item in payload}
+        results = []
+        for call_id in ids:
+            item = by_id.get(call_id)
+            if item is None:
+                results.append(RpcError({"message": "Missing response in batch"}))
+            elif "error" in item:
+                results.append(RpcError(item["error"]))
+            else:
+                results.append(item["result"])
+        return results
@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+from typing import Iterable, List, Optional, Set
+
+from .models import Prediction
+
+# orjson and brotli are optional; without them responses use the json
+# module and only gzip is offered
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "1"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+
+def _default(value):
+    # Nested models (MarketData) inside attribute values
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value) -> bytes:
+    """Compact JSON bytes for plain data, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_default).encode()
+
+
+def encode_prediction(prediction: Prediction) -> bytes:
+    """The JSON bytes a prediction is listed as; stores cache these per prediction."""
+    return prediction.model_dump_json().encode()
+
+
+def join_array(items: Iterable[bytes]) -> bytes:
+    """A JSON array from already-encoded elements."""
+    return b"[" + b",".join(items) + b"]"
+
+
+def columnar(predictions: List[Prediction], include: Optional[Set[str]] = None) -> bytes:
+    """
+    Predictions as {field: [value per prediction]}, in model field order;
+    about half the size of the row format for long listings.
+    """
+    names = [name for name in Prediction.model_fields if include is None or name in include]
+    return dumps({name: [getattr(p, name) for p in predictions] for name in names})
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, or None for identity."""
+    offered = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        offered[coding.strip()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if offered.get(coding, offered.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body
@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from .models import Prediction
+from .price_service import PriceService
+from .store import PredictionStore
+from .telemetry import background_trace, span
+
+logger = logging.getLogger(__name__)
+
+
+class SettlementScheduler:
+    """
+    Settles markets as their endTimestamp passes.
+
+    Open markets are kept in a heap ordered by endTimestamp. When markets
+    expire they are settled in batches: one batched quote call for all of
+    their assets, then resolve transactions submitted back-to-back through
+    AgentService (when the market is on-chain) and the result recorded in
+    the store. Failed settlements are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        store: PredictionStore,
+        price_service: PriceService,
+        agent_service=None,
+        batch_window: float = None,
+        max_batch: int = None,
+        max_retries: int = None,
+        retry_delay: float = None,
+        rescan_interval: float = None,
+        on_resolved: Callable[[int, bool, float], None] = None
+    ):
+        self.store = store
+        self.price_service = price_service
+        self.agent_service = agent_service
+        self.on_resolved = on_resolved
+        # Markets ending within batch_window seconds after the earliest due one
+        # settle together, once all of them have ended
+        self.batch_window = batch_window if batch_window is not None else float(os.getenv("SETTLEMENT_BATCH_WINDOW", "5"))
+        self.max_batch = max_batch or int(os.getenv("SETTLEMENT_MAX_BATCH", "200"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("SETTLEMENT_MAX_RETRIES", "5"))
+        self.retry_delay = retry_delay or float(os.getenv("SETTLEMENT_RETRY_DELAY", "10"))
+        # Picks up markets created by other workers
+        self.rescan_interval = rescan_interval or float(os.getenv("SETTLEMENT_RESCAN_INTERVAL", "60"))
+
+        self._heap: List[tuple] = []  # (due_at, prediction_id)
+        self._scheduled: Dict[int, int] = {}  # prediction_id -> attempts so far
+        self._wakeup = asyncio.Event()
+        self.stats = {"settled": 0, "failed": 0, "retries": 0, "batches": 0}
+
+    @property
+    def queued(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, prediction: Prediction, due_at: float = None):
+        """Add an open market to the settlement queue."""
+        if prediction.resolved or prediction.endTimestamp is None or prediction.id in self._scheduled:
+            return
+        self._scheduled[prediction.id] = 0
+        heapq.heappush(self._heap, (due_at or prediction.endTimestamp, prediction.id))
+        self._wakeup.set()
+
+    def load_open(self):
+        """Schedule every unresolved market in the store."""
+        after_id = None
+        while True:
+            page = self.store.query(after_id=after_id, limit=1000, resolved=False)
+            for prediction in page:
+                self.schedule(prediction)
+            if len(page) < 1000:
+                break
+            after_id = page[-1].id
+
+    async def run(self):
+        """Settlement loop; run as a background task."""
+        self.load_open()
+        last_scan = time.time()
+        while True:
+            try:
+                now = time.time()
+                if now - last_scan >= self.rescan_interval:
+                    self.load_open()
+                    last_scan = now
+
+                due = self._pop_due(now)
+                if due:
+                    await self.settle(due)
+                    continue
+
+                timeout = self.rescan_interval - (now - last_scan)
+                if self._heap:
+                    timeout = min(timeout, self._heap[0][0] + self.batch_window - now)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), max(timeout, 0))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Settlement loop error: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    def _pop_due(self, now: float) -> List[int]:
+        # Hold the earliest market for batch_window so those ending just after it
+        # join the batch; only markets that have already ended are taken
+        if not self._heap or self._heap[0][0] + self.batch_window > now:
+            return []
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.max_batch:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    async def settle(self, prediction_ids: List[int]):
+        """Settle a batch of expired markets."""
+        with background_trace("settlement"), span("settlement_batch", markets=len(prediction_ids)):
+            await self._settle(prediction_ids)
+
+    async def _settle(self, prediction_ids: List[int]):
+        self.stats["batches"] += 1
+        predictions = []
+        for prediction_id in prediction_ids:
+            prediction = self.store.get(prediction_id)
+            if prediction is None or prediction.resolved:
+                self._scheduled.pop(prediction_id, None)
+            else:
+                predictions.append(prediction)
+        if not predictions:
+            return
+
+        try:
+            quotes = await self.price_service.get_market_data_many(
+                [p.asset for p in predictions], fresh=True
+            )
+        except Exception as e:
+            logger.error(f"Error fetching settlement prices: {e}")
+            for prediction in predictions:
+                self._retry(prediction, f"settlement price unavailable: {e}")
+            return
+
+        settled = []
+        for prediction in predictions:
+            market_data = quotes.get(prediction.asset.upper())
+            if market_data is None:
+                self._retry(prediction, "settlement price unavailable")
+                continue
+            price = market_data["current_price"]
+            settled.append((prediction, self._outcome(prediction, price), price))
+
+        onchain = [item for item in settled if item[0].marketAddress]
+        handles = {}
+        if onchain and self.agent_service is not None:
+            submitted = await self.agent_service.resolve_markets([
+                (prediction.marketAddress, "yes" if outcome else "no")
+                for prediction, outcome, _ in onchain
+            ])
+            handles = {item[0].id: handle for item, handle in zip(onchain, submitted)}
+            # Receipts confirm concurrently; nonces were already assigned in order
+            await asyncio.gather(*(h.wait() for h in submitted if h is not None))
+
+        for prediction, outcome, price in settled:
+            if prediction.marketAddress and self.agent_service is not None:
+                handle = handles.get(prediction.id)
+                if handle is None or handle.status != "confirmed":
+                    self._retry(prediction, handle.error if handle else "resolve submission failed")
+                    continue
+            if self.store.mark_resolved(prediction.id, outcome, price) and self.on_resolved:
+                self.on_resolved(prediction.id, outcome, price)
+            self._scheduled.pop(prediction.id, None)
+            self.stats["settled"] += 1
+            logger.info(f"Settled prediction {prediction.id} ({prediction.asset}) at ${price:,.2f}: "
+                        f"{'YES' if outcome else 'NO'}")
+
+    @staticmethod
+    def _outcome(prediction: Prediction, settlement_price: float) -> bool:
+        """Did the asset reach the target? Targets below the creation price must be reached from above."""
+        if prediction.predictedPrice >= prediction.currentPrice:
+            return settlement_price >= prediction.predictedPrice
+        return settlement_price <= prediction.predictedPrice
+
+    def _retry(self, prediction: Prediction, reason: Optional[str]):
+        attempts = self._scheduled.get(prediction.id, 0) + 1
+        if attempts > self.max_retries:
+            logger.error(f"Giving up settling prediction {prediction.id} after {attempts - 1} retries: {reason}")
+            # Stays in _scheduled so rescans do not queue it again
+            self.stats["failed"] += 1
+            return
+        self._scheduled[prediction.id] = attempts
+        self.stats["retries"] += 1
+        delay = self.retry_delay * (2 ** (attempts - 1))
+        logger.warning(f"Retrying settlement of prediction {prediction.id} in {delay:.0f}s: {reason}")
+        heapq.heappush(self._heap, (time.time() + delay, prediction.id))
@@ -0,0 +1,388 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .models import Bet, Prediction
+from .serialization import encode_prediction
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionStore(ABC):
+    """Storage backend for predictions. IDs are allocated by the store."""
+
+    @abstractmethod
+    def add(self, fields: dict) -> Prediction:
+        """Persist a new prediction and return it with its allocated id."""
+
+    @abstractmethod
+    def get(self, prediction_id: int) -> Optional[Prediction]:
+        """Return a prediction by id, or None."""
+
+    @abstractmethod
+    def list(self) -> List[Prediction]:
+        """Return all predictions ordered by id."""
+
+    @abstractmethod
+    def query(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        asset: Optional[str] = None,
+        resolved: Optional[bool] = None,
+        end_after: Optional[float] = None,
+        end_before: Optional[float] = None,
+        predictor_type: Optional[str] = None,
+        descending: bool = False
+    ) -> List[Prediction]:
+        """
+        Return up to `limit` matching predictions ordered by id, newest first
+        if descending; after_id is the last id of the previous page.
+        """
+
+    def query_json(self, after_id: Optional[int] = None, limit: int = 100, **filters) -> List[Tuple[int, bytes]]:
+        """Like query, but as (id, JSON bytes) pairs for listing responses; stores cache the bytes."""
+        return [(p.id, encode_prediction(p)) for p in self.query(after_id, limit, **filters)]
+
+    @abstractmethod
+    def mark_resolved(self, prediction_id: int, outcome: bool, settlement_price: float) -> bool:
+        """Record a settlement; returns False if the prediction is missing or already resolved."""
+
+    @abstractmethod
+    def record_bet(self, fields: dict) -> Bet:
+        """Append a bet to the bet log and move the prediction's yes/no prices to the bet's yesPrice."""
+
+    @abstractmethod
+    def list_bets(self, after_id: Optional[int] = None, limit: int = 1000) -> List[Bet]:
+        """Return up to `limit` bets with id > after_id, ordered by id."""
+
+    @abstractmethod
+    def version(self) -> int:
+        """Return a counter that changes whenever any prediction is written."""
+
+    def close(self):
+        pass
+
+
+class InMemoryPredictionStore(PredictionStore):
+    """Process-local store; for tests and single-worker development only."""
+
+    def __init__(self):
+        self._predictions: List[Prediction] = []
+        self._bets: List[Bet] = []
+        self._version = 0
+        self._lock = threading.Lock()
+        # id -> (prediction, JSON bytes); predictions are replaced, not mutated, on write
+        self._json: Dict[int, tuple] = {}
+
+    def add(self, fields: dict) -> Prediction:
+        with self._lock:
+            prediction = Prediction(id=len(self._predictions) + 1, **fields)
+            self._predictions.append(prediction)
+            self._version += 1
+        self._encoded(prediction)
+        return prediction
+
+    def get(self, prediction_id: int) -> Optional[Prediction]:
+        if 0 < prediction_id <= len(self._predictions):
+            return self._predictions[prediction_id - 1]
+        return None
+
+    def list(self) -> List[Prediction]:
+        return list(self._predictions)
+
+    def query(self, after_id=None, limit=100, asset=None, resolved=None,
+              end_after=None, end_before=None, predictor_type=None, descending=False) -> List[Prediction]:
+        results = []
+        if descending:
+            candidates = reversed(self._predictions[:after_id - 1] if after_id else self._predictions)
+        else:
+            candidates = self._predictions[after_id or 0:]
+        for prediction in candidates:
+            if asset is not None and prediction.asset != asset:
+                continue
+            if resolved is not None and prediction.resolved != resolved:
+                continue
+            if end_after is not None and (prediction.endTimestamp is None or prediction.endTimestamp < end_after):
+                continue
+            if end_before is not None and (prediction.endTimestamp is None or prediction.endTimestamp >= end_before):
+                continue
+            if predictor_type is not None and prediction.predictorType != predictor_type:
+                continue
+            results.append(prediction)
+            if len(results) >= limit:
+                break
+        return results
+
+    def query_json(self, after_id=None, limit=100, **filters) -> List[Tuple[int, bytes]]:
+        return [(p.id, self._encoded(p)) for p in self.query(after_id, limit, **filters)]
+
+    def _encoded(self, prediction: Prediction) -> bytes:
+        entry = self._json.get(prediction.id)
+        if entry is None or entry[0] is not prediction:
+            entry = (prediction, encode_prediction(prediction))
+            self._json[prediction.id] = entry
+        return entry[1]
+
+    def mark_resolved(self, prediction_id: int, outcome: bool, settlement_price: float) -> bool:
+        with self._lock:
+            prediction = self.get(prediction_id)
+            if prediction is None or prediction.resolved:
+                return False
+            prediction = self._predictions[prediction_id - 1] = prediction.model_copy(update={
+                "resolved": True, "outcome": outcome, "settlementPrice": settlement_price
+            })
+            self._version += 1
+        self._encoded(prediction)
+        return True
+
+    def record_bet(self, fields: dict) -> Bet:
+        with self._lock:
+            bet = Bet(id=len(self._bets) + 1, createdAt=time.time(), **fields)
+            prediction = self.get(bet.predictionId)
+            if prediction is None:
+                raise KeyError(f"Unknown prediction {bet.predictionId}")
+            self._bets.append(bet)
+            prediction = self._predictions[bet.predictionId - 1] = prediction.model_copy(update={
+                "yesPrice": bet.yesPrice, "noPrice": 1 - bet.yesPrice
+            })
+            self._version += 1
+        self._encoded(prediction)
+        return bet
+
+    def list_bets(self, after_id=None, limit=1000) -> List[Bet]:
+        start = after_id or 0
+        return self._bets[start:start + limit]
+
+    def version(self) -> int:
+        return self._version
+
+
+class SQLitePredictionStore(PredictionStore):
+    """
+    SQLite-backed store. Runs in WAL mode so several uvicorn workers can read
+    while one writes; ids come from AUTOINCREMENT so they are never reused.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asset TEXT NOT NULL,
+            predictorType TEXT NOT NULL,
+            endTimestamp REAL,
+            resolved INTEGER NOT NULL DEFAULT 0,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            predictionId INTEGER NOT NULL,
+            userAddress TEXT,
+            yes INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            shares REAL NOT NULL,
+            yesPrice REAL NOT NULL,
+            createdAt REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_bets_prediction ON bets (predictionId);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+        CREATE INDEX IF NOT EXISTS idx_predictions_asset ON predictions (asset);
+        CREATE INDEX IF NOT EXISTS idx_predictions_end_timestamp ON predictions (endTimestamp);
+        CREATE INDEX IF NOT EXISTS idx_predictions_predictor_type ON predictions (predictorType);
+        CREATE INDEX IF NOT EXISTS idx_predictions_resolved ON predictions (resolved);
+    """
+
+    def __init__(self, path: str = "predictions.db", json_cache_size: int = None):
+        self.path = path
+        self._lock = threading.Lock()
+        # id -> (data column, JSON bytes). Entries are checked against the row's
+        # data on every read, so writes from other workers are never served stale.
+        self._json: Dict[int, tuple] = {}
+        self._json_lock = threading.Lock()
+        self.json_cache_size = json_cache_size or int(os.getenv("PREDICTION_JSON_CACHE_SIZE", "100000"))
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._db.executescript(self.SCHEMA)
+        self._db.commit()
+
+    def _migrate(self):
+        """Bring databases created by older versions up to the current schema."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(predictions)")}
+        if columns and "resolved" not in columns:
+            self._db.execute("ALTER TABLE predictions ADD COLUMN resolved INTEGER NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def _row_to_prediction(row) -> Prediction:
+        return Prediction(id=row[0], **json.loads(row[1]))
+
+    def add(self, fields: dict) -> Prediction:
+        # Validate before touching the database so bad input never takes an id
+        prediction = Prediction(id=0, **fields)
+        data = prediction.model_dump_json(exclude={"id"})
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "INSERT INTO predictions (asset, predictorType, endTimestamp, data) VALUES (?, ?, ?, ?)",
+                (prediction.asset, prediction.predictorType, prediction.endTimestamp, data)
+            )
+            self._bump_version()
+        prediction.id = cursor.lastrowid
+        self._encoded(prediction.id, data, prediction)
+        return prediction
+
+    def get(self, prediction_id: int) -> Optional[Prediction]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, data FROM predictions WHERE id = ?", (prediction_id,)
+            ).fetchone()
+        return self._row_to_prediction(row) if row else None
+
+    def list(self) -> List[Prediction]:
+        with self._lock:
+            rows = self._db.execute("SELECT id, data FROM predictions ORDER BY id").fetchall()
+        return [self._row_to_prediction(row) for row in rows]
+
+    def query(self, after_id=None, limit=100, asset=None, resolved=None,
+              end_after=None, end_before=None, predictor_type=None, descending=False) -> List[Prediction]:
+        rows = self._query_rows(after_id, limit, asset, resolved, end_after, end_before, predictor_type, descending)
+        return [self._row_to_prediction(row) for row in rows]
+
+    def query_json(self, after_id=None, limit=100, **filters) -> List[Tuple[int, bytes]]:
+        return [(row[0], self._encoded(row[0], row[1])) for row in self._query_rows(after_id, limit, **filters)]
+
+    def _query_rows(self, after_id=None, limit=100, asset=None, resolved=None,
+                    end_after=None, end_before=None, predictor_type=None, descending=False) -> list:
+        clauses, params = [], []
+        if descending:
+            if after_id:
+                clauses.append("id < ?")
+                params.append(after_id)
+        else:
+            clauses.append("id > ?")
+            params.append(after_id or 0)
+        if asset is not None:
+            clauses.append("asset = ?")
+            params.append(asset)
+        if resolved is not None:
+            clauses.append("resolved = ?")
+            params.append(int(resolved))
+        if end_after is not None:
+            clauses.append("endTimestamp >= ?")
+            params.append(end_after)
+        if end_before is not None:
+            clauses.append("endTimestamp < ?")
+            params.append(end_before)
+        if predictor_type is not None:
+            clauses.append("predictorType = ?")
+            params.append(predictor_type)
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, data FROM predictions WHERE {' AND '.join(clauses) or '1'} "
+                f"ORDER BY id {'DESC' if descending else 'ASC'} LIMIT ?",
+                params
+            ).fetchall()
+        return rows
+
+    def _encoded(self, prediction_id: int, data: str, prediction: Prediction = None) -> bytes:
+        """JSON bytes for a row, from the cache while its data column is unchanged."""
+        entry = self._json.get(prediction_id)
+        if entry is not None and entry[0] == data:
+            return entry[1]
+        if prediction is None:
+            prediction = self._row_to_prediction((prediction_id, data))
+        encoded = encode_prediction(prediction)
+        with self._json_lock:
+            if prediction_id not in self._json and len(self._json) >= self.json_cache_size:
+                # Evict the oldest entry
+                del self._json[next(iter(self._json))]
+            self._json[prediction_id] = (data, encoded)
+        return encoded
+
+    def mark_resolved(self, prediction_id: int, outcome: bool, settlement_price: float) -> bool:
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT data FROM predictions WHERE id = ? AND resolved = 0", (prediction_id,)
+            ).fetchone()
+            if row is None:
+                return False
+            data = json.loads(row[0])
+            data.update(resolved=True, outcome=outcome, settlementPrice=settlement_price)
+            text = json.dumps(data)
+            # The resolved = 0 guard keeps this idempotent across workers
+            cursor = self._db.execute(
+                "UPDATE predictions SET resolved = 1, data = ? WHERE id = ? AND resolved = 0",
+                (text, prediction_id)
+            )
+            if cursor.rowcount:
+                self._bump_version()
+        if cursor.rowcount:
+            self._encoded(prediction_id, text)
+        return cursor.rowcount > 0
+
+    def record_bet(self, fields: dict) -> Bet:
+        bet = Bet(id=0, createdAt=time.time(), **fields)
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT data FROM predictions WHERE id = ?", (bet.predictionId,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown prediction {bet.predictionId}")
+            data = json.loads(row[0])
+            data.update(yesPrice=bet.yesPrice, noPrice=1 - bet.yesPrice)
+            text = json.dumps(data)
+            self._db.execute("UPDATE predictions SET data = ? WHERE id = ?", (text, bet.predictionId))
+            cursor = self._db.execute(
+                "INSERT INTO bets (predictionId, userAddress, yes, amount, shares, yesPrice, createdAt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (bet.predictionId, bet.userAddress, int(bet.yes), bet.amount, bet.shares, bet.yesPrice, bet.createdAt)
+            )
+            self._bump_version()
+        bet.id = cursor.lastrowid
+        self._encoded(bet.predictionId, text)
+        return bet
+
+    def list_bets(self, after_id=None, limit=1000) -> List[Bet]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, predictionId, userAddress, yes, amount, shares, yesPrice, createdAt "
+                "FROM bets WHERE id > ? ORDER BY id LIMIT ?", (after_id or 0, limit)
+            ).fetchall()
+        return [
+            Bet(id=r[0], predictionId=r[1], userAddress=r[2], yes=bool(r[3]), amount=r[4],
+                shares=r[5], yesPrice=r[6], createdAt=r[7])
+            for r in rows
+        ]
+
+    def version(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def _bump_version(self):
+        # Called inside write transactions so readers in other workers see it
+        self._db.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def create_store() -> PredictionStore:
+    """Create the store configured by PREDICTION_STORE (sqlite or memory)."""
+    backend = os.getenv("PREDICTION_STORE", "sqlite").lower()
+    if backend == "memory":
+        return InMemoryPredictionStore()
+    if backend == "sqlite":
+        path = os.getenv("PREDICTION_DB_PATH", "predictions.db")
+        logger.info(f"Using SQLite prediction store at {path}")
+        return SQLitePredictionStore(path)
+    raise ValueError(f"Unknown PREDICTION_STORE backend: {backend}")
@@ -0,0 +1,261 @@
+import bisect
+import logging
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_TRACE_ID = re.compile(r"^[0-9A-Za-z-]{8,64}$")
+
+
+class Counter:
+    """Prometheus-style counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in values]
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = buckets
+        self._series: Dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(label, "") for label in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + (repr(bound),))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), key + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {series[-1]}")
+        return lines
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{str(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Registry:
+    """Metrics plus stats callbacks rendered in the Prometheus text format."""
+
+    def __init__(self, prefix: str = "predictx"):
+        self.prefix = prefix
+        self.metrics: List = []
+        self._stats: Dict[str, Callable[[], dict]] = {}
+
+    def counter(self, name: str, description: str, labels: tuple = ()) -> Counter:
+        metric = Counter(f"{self.prefix}_{name}", description, labels)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, description: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(f"{self.prefix}_{name}", description, labels, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def register_stats(self, group: str, collect: Callable[[], dict]):
+        """Export a component's numeric stats dict as gauges named <prefix>_<group>_<key>."""
+        self._stats[group] = collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for group, collect in self._stats.items():
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.error(f"Error collecting {group} stats: {e}")
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.prefix}_{group}_{re.sub(r'(?<!^)(?=[A-Z])', '_', key).lower()}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds", "Time spent in each pipeline stage", labels=("stage",)
+)
+STAGE_ERRORS = registry.counter(
+    "stage_errors_total", "Pipeline stages that raised", labels=("stage",)
+)
+REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds", "Time to response headers", labels=("method", "route", "status")
+)
+
+
+class Trace:
+    """Spans recorded for one request; only sampled traces keep them."""
+
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.started = time.perf_counter()
+        self.spans: List[dict] = []
+
+    def to_dict(self) -> dict:
+        return {
+            "traceId": self.trace_id,
+            "durationMs": round((time.perf_counter() - self.started) * 1000, 3),
+            "spans": self.spans,
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("trace", default=None)
+# Sampled traces kept for GET /traces
+recent_traces: deque = deque(maxlen=int(os.getenv("TRACE_BUFFER", "100")))
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _current_trace.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def span(stage: str, **attributes):
+    """
+    Time a pipeline stage. Always feeds the stage histogram; the span itself
+    is kept only when the current trace is sampled. Context variables follow
+    asyncio tasks and to_thread calls, so nested services share the trace.
+    """
+    trace = _current_trace.get()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_SECONDS.observe(duration, stage=stage)
+        if error is not None:
+            STAGE_ERRORS.inc(stage=stage)
+        if trace is not None and trace.sampled:
+            record = {
+                "stage": stage,
+                "startMs": round((started - trace.started) * 1000, 3),
+                "durationMs": round(duration * 1000, 3),
+            }
+            if attributes:
+                record.update(attributes)
+            if error is not None:
+                record["error"] = type(error).__name__
+            trace.spans.append(record)
+
+
+@contextmanager
+def background_trace(name: str, sample_rate: float = None):
+    """Trace for work outside a request (e.g. a settlement batch)."""
+    rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    trace = Trace(uuid.uuid4().hex, random.random() < rate)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        if trace.sampled:
+            recent_traces.append(dict(trace.to_dict(), name=name))
+
+
+class TelemetryMiddleware:
+    """
+    ASGI middleware: starts a trace per HTTP request (reusing a valid
+    X-Trace-Id header), samples it at TRACE_SAMPLE_RATE, returns the id in
+    X-Trace-Id and observes time to response headers per route.
+    """
+
+    def __init__(self, app, sample_rate: float = None):
+        self.app = app
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace_id = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"x-trace-id"), "")
+        if not _TRACE_ID.match(trace_id):
+            trace_id = uuid.uuid4().hex
+        trace = Trace(trace_id, random.random() < self.sample_rate)
+        token = _current_trace.set(trace)
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace_id.encode())]
+                route = scope.get("route")
+                REQUEST_SECONDS.observe(
+                    time.perf_counter() - trace.started,
+                    method=scope["method"],
+                    # Route templates, not raw paths, keep label cardinality bounded
+                    route=getattr(route, "path", "unmatched"),
+                    status=message["status"]
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _current_trace.reset(token)
+            if trace.sampled:
+                recent_traces.append(trace.to_dict())
+                logger.info(f"trace {trace_id} {scope['method']} {scope['path']}: " + ", ".join(
+                    f"{s['stage']}={s['durationMs']}ms" for s in trace.spans
+                ))
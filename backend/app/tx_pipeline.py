@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
+
+from .rpc import JsonRpcClient
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+_RECEIPT_QUANTITIES = ("blockNumber", "cumulativeGasUsed", "effectiveGasPrice", "gasUsed", "status",
+                       "transactionIndex", "type")
+_LOG_QUANTITIES = ("blockNumber", "logIndex", "transactionIndex")
+_HASHES = ("blockHash", "transactionHash")
+
+
+def _format_receipt(raw: dict) -> dict:
+    """
+    A raw eth_getTransactionReceipt result in the shape web3 returns (ints,
+    HexBytes, checksum addresses), so callers can index it the same way and
+    decode its logs with ContractEvent.process_receipt.
+    """
+    def formatted(item: dict, quantities: tuple) -> dict:
+        item = dict(item)
+        for name in quantities:
+            if isinstance(item.get(name), str):
+                item[name] = int(item[name], 16)
+        for name in _HASHES:
+            if item.get(name):
+                item[name] = HexBytes(item[name])
+        return item
+
+    receipt = formatted(raw, _RECEIPT_QUANTITIES)
+    if receipt.get("contractAddress"):
+        receipt["contractAddress"] = to_checksum_address(receipt["contractAddress"])
+    receipt["logs"] = [
+        dict(formatted(log, _LOG_QUANTITIES), address=to_checksum_address(log["address"]),
+             topics=[HexBytes(topic) for topic in log["topics"]], data=HexBytes(log["data"]))
+        for log in raw.get("logs") or []
+    ]
+    return receipt
+
+
+class TxHandle:
+    """A submitted transaction whose receipt is awaited in the background."""
+
+    def __init__(self, tx_hash, label: str, nonce: int):
+        # bytes(): HexBytes.hex() has a 0x prefix in hexbytes < 1.0 and none from 1.0 on
+        self.tx_hash = "0x" + bytes(tx_hash).hex() if isinstance(tx_hash, (bytes, bytearray)) else str(tx_hash)
+        self.label = label
+        self.nonce = nonce
+        self.status = "pending"  # pending -> confirmed | failed
+        self.receipt = None
+        self.error: Optional[str] = None
+        self._done = asyncio.get_running_loop().create_future()
+
+    @property
+    def done(self) -> bool:
+        return self._done.done()
+
+    async def wait(self, timeout: float = None):
+        """Wait for confirmation and return the receipt (None if the transaction failed)."""
+        await asyncio.wait_for(asyncio.shield(self._done), timeout)
+        return self.receipt
+
+    def to_dict(self) -> dict:
+        return {
+            "txHash": self.tx_hash,
+            "label": self.label,
+            "nonce": self.nonce,
+            "status": self.status,
+            "error": self.error,
+        }
+
+
+class TransactionPipeline:
+    """
+    Sends transactions for one account without waiting for receipts.
+
+    Nonces are tracked locally so several transactions (e.g. approve then
+    buy) can be sent back-to-back. One background task confirms every
+    pending transaction by polling eth_getTransactionReceipt in JSON-RPC
+    batches, then updates the returned TxHandle and fires an optional
+    callback; waiting for receipts holds no threads.
+    """
+
+    def __init__(
+        self,
+        w3,
+        address: str,
+        chain_id: int,
+        rpc: JsonRpcClient,
+        receipt_timeout: float = None,
+        poll_interval: float = None
+    ):
+        self.w3 = w3
+        self.address = address
+        self.chain_id = chain_id
+        self.rpc = rpc
+        self.receipt_timeout = receipt_timeout or float(os.getenv("TX_RECEIPT_TIMEOUT", "120"))
+        self.poll_interval = poll_interval or float(os.getenv("TX_RECEIPT_POLL_INTERVAL", "1"))
+        self._nonce = None
+        self._lock = asyncio.Lock()
+        # tx_hash -> (handle, on_status, deadline); confirmed by _poll_receipts
+        self._pending: Dict[str, tuple] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    def reset_nonce(self):
+        """Forget the local nonce so the next send re-reads it from the node."""
+        self._nonce = None
+
+    async def submit(
+        self,
+        contract_function,
+        label: str,
+        gas: int = None,
+        on_status: Callable[[TxHandle], None] = None
+    ) -> TxHandle:
+        """
+        Send a contract call with the next local nonce
+        :param contract_function: Bound web3 contract function, e.g. contract.functions.buyYes(1)
+        :param label: Name used in logs and status callbacks
+        :param gas: Explicit gas limit; required when the call depends on a still-pending transaction
+        :param on_status: Called with the handle once it is confirmed or failed
+        :return: TxHandle for the pending transaction
+        """
+        # Hold the lock across nonce allocation and send so nonces reach the node in order
+        async with self._lock:
+            if self._nonce is None:
+                self._nonce = await asyncio.to_thread(self.w3.eth.get_transaction_count, self.address, "pending")
+            nonce = self._nonce
+            tx = {"from": self.address, "nonce": nonce, "chainId": self.chain_id}
+            if gas is not None:
+                tx["gas"] = gas
+            try:
+                with span("tx_submit", label=label):
+                    tx_hash = await asyncio.to_thread(contract_function.transact, tx)
+            except Exception:
+                # The node may or may not have seen this nonce; resync next time
+                self.reset_nonce()
+                raise
+            self._nonce = nonce + 1
+
+        handle = TxHandle(tx_hash, label, nonce)
+        logger.info(f"Submitted {label} transaction {handle.tx_hash} (nonce {nonce})")
+        self._pending[handle.tx_hash] = (handle, on_status, time.monotonic() + self.receipt_timeout)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll_receipts())
+        return handle
+
+    async def _poll_receipts(self):
+        """Confirm pending transactions with batched receipt lookups until none are left."""
+        while self._pending:
+            await asyncio.sleep(self.poll_interval)
+            hashes = list(self._pending)
+            try:
+                with span("tx_confirm", transactions=len(hashes)):
+                    receipts = await self.rpc.batch([("eth_getTransactionReceipt", [tx_hash]) for tx_hash in hashes])
+            except Exception as e:
+                # Node unreachable or circuit open; keep polling until the receipts time out
+                logger.warning(f"Receipt poll for {len(hashes)} transactions failed: {e}")
+                receipts = [e] * len(hashes)
+            now = time.monotonic()
+            for tx_hash, receipt in zip(hashes, receipts):
+                if isinstance(receipt, dict):
+                    try:
+                        self._finish(tx_hash, _format_receipt(receipt), None)
+                    except Exception as e:
+                        self._finish(tx_hash, None, f"Unreadable receipt: {e}")
+                elif now >= self._pending[tx_hash][2]:
+                    reason = f": {receipt}" if isinstance(receipt, Exception) else ""
+                    self._finish(tx_hash, None, f"No receipt after {self.receipt_timeout:g}s{reason}")
+
+    def _finish(self, tx_hash: str, receipt: Optional[dict], error: Optional[str]):
+        handle, on_status, _ = self._pending.pop(tx_hash)
+        handle.receipt = receipt
+        if receipt is not None and receipt["status"] == 1:
+            handle.status = "confirmed"
+        else:
+            handle.status = "failed"
+            handle.error = error or "Transaction reverted"
+        handle._done.set_result(None)
+
+        log = logger.info if handle.status == "confirmed" else logger.error
+        log(f"{handle.label} transaction {handle.tx_hash} {handle.status}" + (f": {handle.error}" if handle.error else ""))
+        if on_status:
+            try:
+                on_status(handle)
+            except Exception as e:
+                logger.error(f"Transaction status callback failed for {handle.tx_hash}: {e}")
@@ -0,0 +1,64 @@
+"""
+Microbenchmark for the LMSR market book.
+
+Opens N markets, then measures vectorized quotes, single quotes as served
+by the quote endpoint, applied trades and a full bet-log replay. Run from
+the backend directory:
+
+    python -m benchmarks.bench_amm --markets 100000 --quotes 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.amm import MarketBook
+
+
+def rate(count: int, seconds: float) -> str:
+    return f"{count / seconds:,.0f}/s"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=100_000)
+    parser.add_argument("--quotes", type=int, default=1_000_000)
+    parser.add_argument("--single", type=int, default=50_000, help="Single-market quotes / trades to time")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    book = MarketBook()
+    started = time.perf_counter()
+    for market_id, price in enumerate(rng.uniform(0.05, 0.95, args.markets)):
+        book.add(market_id, float(price), 1000.0)
+    elapsed = time.perf_counter() - started
+    state_bytes = sum(getattr(book, name).nbytes for name in ("q_yes", "q_no", "b", "open"))
+    print(f"opened {args.markets:,} markets in {elapsed:.2f}s; array state {state_bytes / 2**20:.1f} MiB")
+
+    slots = rng.integers(0, args.markets, args.quotes)
+    yes = rng.random(args.quotes) < 0.5
+    amounts = rng.uniform(1, 200, args.quotes)
+    started = time.perf_counter()
+    book.quote_many(slots, yes, amounts)
+    print(f"vectorized quotes: {rate(args.quotes, time.perf_counter() - started)}")
+
+    started = time.perf_counter()
+    for i in range(args.single):
+        book.quote(int(slots[i]), bool(yes[i]), float(amounts[i]))
+    print(f"single quotes: {rate(args.single, time.perf_counter() - started)}")
+
+    started = time.perf_counter()
+    for i in range(args.single):
+        slot = np.array([slots[i]])
+        fill = book.quote_many(slot, yes[i:i + 1], amounts[i:i + 1])
+        book.apply(slot, yes[i:i + 1], fill["shares"])
+    print(f"sequential trades: {rate(args.single, time.perf_counter() - started)}")
+
+    shares = book.quote_many(slots, yes, amounts)["shares"]
+    started = time.perf_counter()
+    book.apply(slots, yes, shares)
+    print(f"bet log replay: {rate(args.quotes, time.perf_counter() - started)}")
+
+
+if __name__ == "__main__":
+    main()
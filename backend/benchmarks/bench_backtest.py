@@ -0,0 +1,95 @@
+"""
+Full replay of the backtesting engine over synthetic daily OHLCV data.
+
+Generates random-walk bars for N assets x D days, writes them to CSV,
+then times loading, market replay and scoring. With --llm-every the
+AIPredictionEngine is also replayed on every Nth day against the mock
+LLM. Run from the backend directory:
+
+    python -m benchmarks.bench_backtest --assets 100 --days 365
+"""
+import argparse
+import asyncio
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.backtest import Replay, baseline_probabilities, evaluate, llm_probabilities, load_ohlcv
+
+from .stubs import StubServer, openai_app
+
+
+def write_synthetic_csv(path: str, assets: int, days: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    volatility = rng.uniform(0.01, 0.06, size=(assets, 1))
+    returns = rng.normal(0, 1, size=(assets, days)) * volatility
+    close = rng.uniform(1, 50_000, size=(assets, 1)) * np.exp(np.cumsum(returns, axis=1))
+    spread = np.abs(rng.normal(0, 1, size=(assets, days))) * volatility
+    high, low = close * (1 + spread), close * (1 - spread)
+    start = 1_700_000_000
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["timestamp", "symbol", "open", "high", "low", "close", "volume"])
+        for a in range(assets):
+            for d in range(days):
+                writer.writerow([start + d * 86400, f"A{a:04d}", close[a, d], high[a, d], low[a, d], close[a, d], 1e6])
+
+
+def timed(label: str, fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    print(f"{label}: {time.perf_counter() - started:.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=100)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--target-percent", type=float, default=5.0)
+    parser.add_argument("--duration", type=int, default=3)
+    parser.add_argument("--llm-every", type=int, default=0, help="Also replay the LLM on every Nth day (0 = off)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ohlcv.csv")
+        write_synthetic_csv(path, args.assets, args.days)
+        started = time.perf_counter()
+        history = timed("load csv", load_ohlcv, path)
+        replay = timed("replay markets", Replay, history, args.target_percent, args.duration)
+        probabilities = timed("baseline predictor", baseline_probabilities, replay)
+        report = timed("score", evaluate, probabilities, replay.outcome)
+        print(f"{args.assets} assets x {args.days} days in {time.perf_counter() - started:.3f}s: "
+              f"{report['markets']:,} markets, hit rate {report['hitRate']:.3f}, Brier {report['brier']:.4f}")
+
+        if args.llm_every:
+            with StubServer(openai_app(0.0)) as llm:
+                os.environ.update({
+                    "COINMARKETCAP_API_KEY": "bench",
+                    "AZURE_OPENAI_ENDPOINT": llm.url,
+                    "AZURE_OPENAI_API_KEY": "bench",
+                    "AZURE_OPENAI_API_VERSION": "2024-06-01",
+                    "AZURE_OPENAI_DEPLOYMENT": "bench",
+                })
+                asyncio.run(_replay_llm(replay, args.llm_every))
+
+
+async def _replay_llm(replay: Replay, every: int):
+    from app.ai_engine import AIPredictionEngine
+
+    engine = AIPredictionEngine()
+    try:
+        started = time.perf_counter()
+        probabilities = await llm_probabilities(engine, replay, every=every)
+        report = evaluate(probabilities, replay.outcome)
+        print(f"LLM replay (every {every} days, mock LLM): {report['markets']:,} markets in "
+              f"{time.perf_counter() - started:.2f}s; cache {engine.prediction_cache.stats}")
+    finally:
+        await engine.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Batched LLM prompting: a bulk sweep across many assets at several
+LLM_BATCH_SIZE values against a mock LLM whose latency grows with the
+number of markets in the reply. One request names a symbol CoinMarketCap
+rejects; it must fail on its own. Reports wall time, completions, prompt
+tokens and single-call fallbacks. Run from the backend directory:
+
+    python -m benchmarks.bench_llm_batch --assets 48 --batch-sizes 1 4 8 16
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .stubs import UNKNOWN_SYMBOLS, StubServer, cmc_app, openai_app
+
+
+async def sweep(assets: list, batch_size: int, concurrency: int) -> tuple:
+    from app.ai_engine import AIPredictionEngine
+
+    engine = AIPredictionEngine()
+    try:
+        requests = [{"asset": asset} for asset in assets] + [{"asset": symbol} for symbol in UNKNOWN_SYMBOLS]
+        started = time.perf_counter()
+        results = [r async for r in engine.generate_binary_markets(requests, concurrency, batch_size=batch_size)]
+        elapsed = time.perf_counter() - started
+        errors = {requests[r["index"]]["asset"] for r in results if "error" in r}
+        assert errors <= UNKNOWN_SYMBOLS, f"known assets failed with the unknown ones: {sorted(errors - UNKNOWN_SYMBOLS)}"
+        fallbacks = sum(1 for r in results if "market" in r and r["market"]["reasoning"].startswith("Fallback"))
+        return elapsed, engine.llm_output_stats(), fallbacks
+    finally:
+        await engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--assets", type=int, default=48)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--entry-latency", type=float, default=0.1, help="extra seconds per additional batched market")
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    assets = [f"A{i}" for i in range(args.assets)]
+    with StubServer(cmc_app(0.0)) as cmc:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+        })
+        print(f"{args.assets} assets, {args.llm_latency * 1000:.0f} ms + {args.entry_latency * 1000:.0f} ms "
+              f"per extra market, concurrency {args.concurrency}, {args.malformed_rate:.0%} invalid entries")
+        for batch_size in args.batch_sizes:
+            llm_app = openai_app(args.llm_latency, malformed_rate=args.malformed_rate, entry_latency=args.entry_latency)
+            with StubServer(llm_app) as llm:
+                os.environ["AZURE_OPENAI_ENDPOINT"] = llm.url
+                elapsed, stats, fallbacks = asyncio.run(sweep(assets, batch_size, args.concurrency))
+            print(f"batch {batch_size:>3}: {elapsed:6.2f} s, {stats['completions']:>3} completions "
+                  f"({stats['batches']} batched), {llm_app['stats']['prompt_tokens']:>6,} prompt tokens, "
+                  f"{stats['batch_fallbacks']} entries retried singly, {fallbacks} neutral fallbacks")
+
+
+if __name__ == "__main__":
+    main()
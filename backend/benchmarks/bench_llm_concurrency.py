@@ -0,0 +1,57 @@
+"""
+Concurrent `AIPredictionEngine.generate_binary_market` calls against a mock LLM.
+
+With the async client, N concurrent requests (N <= LLM_MAX_CONCURRENCY)
+should finish in roughly one LLM latency. Run from the backend directory:
+
+    python -m benchmarks.bench_llm_concurrency --requests 16 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .stubs import StubServer, cmc_app, openai_app
+
+
+async def run(total: int) -> float:
+    from app.ai_engine import AIPredictionEngine
+
+    engine = AIPredictionEngine()
+    try:
+        # Warm the quote cache so only LLM latency is measured
+        await engine.price_service.get_market_data("BTC")
+        started = time.perf_counter()
+        markets = await asyncio.gather(*(engine.generate_binary_market("BTC") for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        fallbacks = sum(1 for m in markets if m["reasoning"].startswith("Fallback"))
+        if fallbacks:
+            print(f"warning: {fallbacks} fallback predictions")
+        return elapsed
+    finally:
+        await engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with StubServer(cmc_app(0.0)) as cmc, StubServer(openai_app(args.llm_latency)) as llm:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+            "LLM_MAX_CONCURRENCY": str(args.requests),
+        })
+        elapsed = asyncio.run(run(args.requests))
+        print(f"{args.requests} concurrent predictions in {elapsed:.2f}s "
+              f"({elapsed / args.llm_latency:.1f}x one LLM latency of {args.llm_latency}s)")
+
+
+if __name__ == "__main__":
+    main()
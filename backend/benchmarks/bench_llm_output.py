@@ -0,0 +1,79 @@
+"""
+Structured LLM output handling against a mock LLM that returns malformed replies.
+
+A fraction of replies is wrapped in code fences or prose, or fails schema
+validation. Reports how many predictions still fall back, how many extra
+completions repairs cost, and what a plain json.loads would have dropped.
+Run from the backend directory:
+
+    python -m benchmarks.bench_llm_output --requests 200 --malformed-rate 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from app.llm_output import BinaryPrediction, parse_output
+
+from .stubs import StubServer, cmc_app, openai_app
+
+
+def parse_throughput(iterations: int = 20000):
+    clean = json.dumps({"yesProbability": 0.61, "noProbability": 0.39, "confidence": 0.7, "reasoning": "x" * 200})
+    for label, text in (("clean", clean), ("fenced", f"Sure:\n```json\n{clean}\n```"), ("prose", f"Analysis: {clean} done")):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            parse_output(text, BinaryPrediction)
+        print(f"parse {label}: {iterations / (time.perf_counter() - started):,.0f}/s")
+
+
+async def run(total: int):
+    from app.ai_engine import AIPredictionEngine
+
+    engine = AIPredictionEngine()
+    try:
+        market_data = await engine.price_service.get_market_data("BTC")
+        price = market_data["current_price"]
+        # Distinct targets so every request misses the prediction cache
+        markets = await asyncio.gather(*(
+            engine.generate_binary_market("BTC", target_price=price * (1 + i / 100), market_data=market_data)
+            for i in range(1, total + 1)
+        ))
+        fallbacks = sum(1 for m in markets if m["reasoning"].startswith("Fallback"))
+        return engine.llm_output_stats(), fallbacks
+    finally:
+        await engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--malformed-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    parse_throughput()
+    llm_app = openai_app(0.01, malformed_rate=args.malformed_rate)
+    with StubServer(cmc_app(0.0)) as cmc, StubServer(llm_app) as llm:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+        })
+        stats, fallbacks = asyncio.run(run(args.requests))
+
+    first_pass = stats["completions"] - stats["repairs"]
+    print(f"{args.requests} predictions, {args.malformed_rate:.0%} malformed replies: "
+          f"{stats['completions']} completions ({stats['completions'] / args.requests:.2f} per prediction)")
+    print(f"{1 - stats['fast_path'] / first_pass:.1%} of first replies were not plain, valid JSON "
+          f"(previously a fallback or a market with invalid prices)")
+    print(f"extracted: {stats['extracted']}, repaired: {stats['repairs']}, fallbacks: {fallbacks}, "
+          f"parse failure rate {stats['parseFailureRate']:.1%}")
+    print(f"JSON mode requests: {llm_app['stats']['json_mode']}/{llm_app['stats']['requests']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Market deployment cost on a local anvil devnet: gas per market and wall time
+for AgentService.create_market with a full PredictionMarket deployment,
+with one MarketFactory clone per transaction, and with create_markets
+batching clones MARKET_BATCH_SIZE per transaction. Needs anvil on PATH and
+solc (through py-solc-x) or prebuilt artifacts. Run from the backend directory:
+
+    python -m benchmarks.bench_market_deploy --markets 50 --block-time 1
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from .loadtest import DevnetWallet, devnet
+
+
+def gas_used(w3, address: str, from_block: int, to_block: int) -> int:
+    """Gas paid by address for transactions mined in (from_block, to_block]."""
+    total = 0
+    for number in range(from_block + 1, to_block + 1):
+        for tx in w3.eth.get_block(number, full_transactions=True)["transactions"]:
+            if tx["from"] == address:
+                total += w3.eth.get_transaction_receipt(tx["hash"])["gasUsed"]
+    return total
+
+
+async def measure(agent, w3, markets: list, batched: bool) -> tuple:
+    start_block = w3.eth.block_number
+    started = time.perf_counter()
+    if batched:
+        addresses = await agent.create_markets(markets)
+    else:
+        addresses = [await agent.create_market(market) for market in markets]
+    elapsed = time.perf_counter() - started
+    if not all(addresses):
+        raise RuntimeError(f"{addresses.count(None)} of {len(markets)} markets were not created")
+    return gas_used(w3, agent.wallet.address, start_block, w3.eth.block_number), elapsed
+
+
+async def run(rpc_url: str, args):
+    from web3 import Web3
+
+    from app.agent_service import AgentService
+
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    wallet = DevnetWallet(w3, w3.to_checksum_address(w3.eth.accounts[0]))
+
+    class DevnetAgentService(AgentService):
+        @property
+        def wallet(self):
+            return wallet
+
+    agent = DevnetAgentService()
+    agent.market_batch_size = args.batch_size
+    now = int(time.time())
+    markets = [{
+        "question": f"Will BTC be above ${60_000 + i * 100:,} on 2026-12-31 at 00:00 UTC?",
+        "endTimestamp": now + 86400,
+        "yesPrice": 0.55,
+        "noPrice": 0.45,
+    } for i in range(args.markets)]
+
+    agent.deploy_mode = "contract"
+    results = [("PredictionMarket per market", *await measure(agent, w3, markets, batched=False))]
+
+    agent.deploy_mode = "clone"
+    start_block = w3.eth.block_number
+    await agent._factory()
+    factory_gas = gas_used(w3, wallet.address, start_block, w3.eth.block_number)
+    agent._pipeline_for(wallet).reset_nonce()
+    results.append(("clone, one per transaction", *await measure(agent, w3, markets, batched=False)))
+    results.append((f"clones, {args.batch_size} per transaction", *await measure(agent, w3, markets, batched=True)))
+
+    print(f"{args.markets} markets, block time {args.block_time or 'automine'}; "
+          f"factory + implementation (once): {factory_gas:,} gas")
+    baseline_gas, baseline_time = results[0][1], results[0][2]
+    for label, gas, elapsed in results:
+        print(f"{label:<32} {gas / args.markets:>10,.0f} gas/market ({gas / baseline_gas:.0%})  "
+              f"{elapsed:7.2f} s ({args.markets / elapsed:,.1f} markets/s, {baseline_time / elapsed:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--markets", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--block-time", type=float, default=None, help="anvil block interval (default: automine)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    with devnet("anvil", 84532, block_time=args.block_time) as (_, rpc_url):
+        asyncio.run(run(rpc_url, args))
+
+
+if __name__ == "__main__":
+    main()
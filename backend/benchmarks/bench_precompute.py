@@ -0,0 +1,96 @@
+"""
+Hot-asset market pool: latency of POST /predictions/ai-style market
+generation for hot assets served from the precomputed pool versus cold
+assets generated on demand, against mock CoinMarketCap and LLM upstreams.
+Also reports how long one ladder refresh takes and how many completions
+it costs. Run from the backend directory:
+
+    python -m benchmarks.bench_precompute --hot 4 --requests 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .stubs import StubServer, cmc_app, openai_app
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+async def scenario(hot: list, cold: list, args) -> dict:
+    from app.ai_engine import AIPredictionEngine
+    from app.precompute import MarketPool
+
+    engine = AIPredictionEngine()
+    pool = MarketPool(engine, assets=hot, ladder=args.ladder)
+    try:
+        started = time.perf_counter()
+        await pool.refresh()
+        refresh_seconds = time.perf_counter() - started
+        refresh_completions = engine.llm_output_stats()["completions"]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def serve(asset: str, percent: float) -> float:
+            async with semaphore:
+                started = time.perf_counter()
+                market = pool.get(asset, percent)
+                if market is None:
+                    market_data = await engine.price_service.get_market_data(asset)
+                    await engine.generate_binary_market(asset, market_data["current_price"] * (1 + percent / 100),
+                                                        market_data=market_data)
+                return time.perf_counter() - started
+
+        latencies = {}
+        for label, assets in (("hot", hot), ("cold", cold)):
+            latencies[label] = await asyncio.gather(*(
+                serve(assets[i % len(assets)], args.ladder[i % len(args.ladder)])
+                for i in range(args.requests)
+            ))
+        return {
+            "refresh": refresh_seconds,
+            "refreshCompletions": refresh_completions,
+            "latencies": latencies,
+            "pool": dict(pool.stats),
+        }
+    finally:
+        await engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hot", type=int, default=4, help="number of hot assets")
+    parser.add_argument("--ladder", type=float, nargs="+", default=[-10, -5, -2, 2, 5, 10])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--cmc-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    hot = [f"H{i}" for i in range(args.hot)]
+    # Cold requests use distinct assets so the prediction cache cannot answer them
+    cold = [f"C{i}" for i in range(args.requests)]
+    with StubServer(cmc_app(args.cmc_latency)) as cmc, StubServer(openai_app(args.llm_latency)) as llm:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+        })
+        result = asyncio.run(scenario(hot, cold, args))
+    print(f"{args.hot} hot assets x {len(args.ladder)} targets, {args.requests} requests each, "
+          f"concurrency {args.concurrency}, "
+          f"LLM {args.llm_latency * 1000:.0f} ms, CoinMarketCap {args.cmc_latency * 1000:.0f} ms")
+    print(f"ladder refresh: {result['refresh']:.2f} s, {result['refreshCompletions']} completions")
+    for label, latencies in result["latencies"].items():
+        print(f"{label:<5} p50 {percentile(latencies, 0.5):8.2f} ms  p99 {percentile(latencies, 0.99):8.2f} ms")
+    print(f"pool: {result['pool']}")
+
+
+if __name__ == "__main__":
+    main()
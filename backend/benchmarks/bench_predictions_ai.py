@@ -0,0 +1,88 @@
+"""
+Concurrent `POST /predictions/ai` throughput against local CMC and LLM stubs.
+
+Compares the pooled async PriceService with the previous blocking
+`requests.get` implementation. Run from the backend directory:
+
+    python -m benchmarks.bench_predictions_ai --requests 200 --cmc-latency 0.05
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import requests
+
+from .stubs import StubServer, cmc_app, openai_app
+
+
+def legacy_get_market_data(service):
+    """The pre-pool implementation: a blocking request on a fresh connection."""
+    async def get_market_data(symbol: str) -> dict:
+        symbol = symbol.upper()
+        response = requests.get(
+            f"{service.base_url}/cryptocurrency/quotes/latest",
+            headers={'X-CMC_PRO_API_KEY': service.api_key, 'Accept': 'application/json'},
+            params={'symbol': symbol, 'convert': 'USD'},
+        )
+        response.raise_for_status()
+        quote = response.json()['data'][symbol]['quote']['USD']
+        return {
+            'current_price': quote['price'],
+            'market_cap': quote['market_cap'],
+            'volume_24h': quote['volume_24h'],
+            'percent_change_1h': quote['percent_change_1h'],
+            'percent_change_24h': quote['percent_change_24h'],
+            'percent_change_7d': quote['percent_change_7d']
+        }
+    return get_market_data
+
+
+async def run(app, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with semaphore:
+                response = await client.post("/predictions/ai", params={"asset": "BTC"})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--cmc-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with StubServer(cmc_app(args.cmc_latency)) as cmc, StubServer(openai_app(args.llm_latency)) as llm:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+            "PREDICTION_STORE": "memory",
+        })
+        from app import main as app_main
+        asyncio.run(compare(app_main, args.requests, args.concurrency))
+
+
+async def compare(app_main, total: int, concurrency: int):
+    service = app_main.ai_engine.price_service
+    pooled = service.get_market_data
+    for label, impl in (("blocking requests.get", legacy_get_market_data(service)), ("pooled httpx", pooled)):
+        service.get_market_data = impl
+        elapsed = await run(app_main.app, total, concurrency)
+        print(f"{label:>22}: {total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Latency during an upstream outage, with and without circuit breakers.
+
+Markets for a set of assets are generated once so quotes and predictions
+are cached, the caches are left to expire, and then CoinMarketCap and the
+LLM stubs stall (or fail). generate_binary_market is called for the same
+assets while they are down, then again after they recover. Reports p50/p99
+latency, how requests were answered (fresh, last-known data, neutral
+fallback, error) and how long the circuits took to close again.
+First checks that calls shed by a half-open circuit's bulkhead do not
+use up its probe slots. Run from the backend directory:
+
+    python -m benchmarks.bench_resilience --fault slow --requests 200
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from .stubs import StubServer, cmc_app, openai_app
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+async def check_half_open_shed():
+    """Calls shed by the bulkhead while half-open must not use up probe slots."""
+    from app.resilience import BulkheadFullError, CircuitBreaker
+
+    breaker = CircuitBreaker("check", failure_threshold=1, reset_timeout=0.01, half_open_max=2, max_in_flight=1)
+    try:
+        async with breaker.guard():
+            raise RuntimeError("upstream down")
+    except RuntimeError:
+        pass
+    await asyncio.sleep(0.02)
+
+    async def hang():
+        async with breaker.guard():
+            await asyncio.Event().wait()
+
+    for _ in range(3):
+        probe = asyncio.create_task(hang())
+        await asyncio.sleep(0)
+        try:
+            async with breaker.guard():
+                pass
+            raise AssertionError("call beyond max_in_flight was admitted")
+        except BulkheadFullError:
+            pass
+        probe.cancel()
+        await asyncio.gather(probe, return_exceptions=True)
+    async with breaker.guard():
+        pass
+    assert breaker.state == "closed", f"circuit stuck {breaker.state} after shedding half-open calls"
+
+
+async def scenario(cmc, llm, assets: list, args) -> dict:
+    from app.ai_engine import AIPredictionEngine
+
+    engine = AIPredictionEngine()
+    try:
+        for asset in assets:
+            await engine.generate_binary_market(asset)
+        # Let the quote and prediction caches expire so every request needs the upstreams
+        await asyncio.sleep(float(os.environ["QUOTE_CACHE_TTL"]) + float(os.environ["QUOTE_CACHE_STALE_TTL"]) + 0.2)
+
+        cmc.app["fault"]["mode"] = llm.app["fault"]["mode"] = args.fault
+        degraded_before = engine.price_service.stats["degraded"]
+        outcomes = {"fresh": 0, "last known": 0, "fallback": 0, "error": 0}
+        latencies = []
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                llm_degraded, llm_fallbacks = engine.llm_stats["degraded"], engine.llm_stats["fallbacks"]
+                try:
+                    await engine.generate_binary_market(assets[i % len(assets)])
+                    if engine.llm_stats["fallbacks"] > llm_fallbacks:
+                        outcomes["fallback"] += 1
+                    elif engine.llm_stats["degraded"] > llm_degraded:
+                        outcomes["last known"] += 1
+                    else:
+                        outcomes["fresh"] += 1
+                except Exception:
+                    outcomes["error"] += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(args.requests)))
+        outage_seconds = time.perf_counter() - started
+        stale_quotes = engine.price_service.stats["degraded"] - degraded_before
+
+        # Recovery: upstreams come back; probes close the circuits after the reset timeout
+        cmc.app["fault"]["mode"] = llm.app["fault"]["mode"] = None
+        recovered_at = None
+        started = time.perf_counter()
+        while time.perf_counter() - started < args.recovery_timeout:
+            fallbacks = engine.llm_stats["fallbacks"] + engine.llm_stats["degraded"]
+            try:
+                await engine.generate_binary_market(assets[0], target_price=1.0 + time.time() % 1)
+                if engine.llm_stats["fallbacks"] + engine.llm_stats["degraded"] == fallbacks:
+                    recovered_at = time.perf_counter() - started
+                    break
+            except Exception:
+                pass
+            await asyncio.sleep(0.1)
+
+        return {
+            "p50": percentile(latencies, 0.5),
+            "p99": percentile(latencies, 0.99),
+            "seconds": outage_seconds,
+            "outcomes": outcomes,
+            "staleQuotes": stale_quotes,
+            "recovered": recovered_at,
+            "breakers": {name: b.stats["opened"] for name, b in
+                         (("cmc", engine.price_service.breaker), ("llm", engine.llm_breaker))},
+        }
+    finally:
+        await engine.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fault", choices=("slow", "error"), default="slow")
+    parser.add_argument("--assets", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--upstream-timeout", type=float, default=2.0)
+    parser.add_argument("--reset", type=float, default=2.0, help="breaker reset timeout in seconds")
+    parser.add_argument("--recovery-timeout", type=float, default=15.0)
+    args = parser.parse_args()
+
+    assets = [f"A{i}" for i in range(args.assets)]
+    with StubServer(cmc_app(0.01)) as cmc, StubServer(openai_app(0.05)) as llm:
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+            "QUOTE_CACHE_TTL": "0.5",
+            "QUOTE_CACHE_STALE_TTL": "0.5",
+            "PREDICTION_CACHE_TTL": "0.5",
+            "CMC_TIMEOUT": str(args.upstream_timeout),
+            "LLM_TIMEOUT": str(args.upstream_timeout),
+            "LLM_MAX_RETRIES": "1",
+            "CMC_BREAKER_RESET": str(args.reset),
+            "LLM_BREAKER_RESET": str(args.reset),
+        })
+        asyncio.run(check_half_open_shed())
+        print("half-open bulkhead shedding keeps probe slots: ok")
+        print(f"{args.fault} upstreams, {args.requests} requests over {args.assets} assets, "
+              f"concurrency {args.concurrency}, upstream timeout {args.upstream_timeout:.0f}s")
+        for label, failures, in_flight in (("no breakers", "1000000000", "0"), ("breakers", "5", "64")):
+            for prefix in ("CMC", "LLM"):
+                os.environ[f"{prefix}_BREAKER_FAILURES"] = failures
+                os.environ[f"{prefix}_MAX_IN_FLIGHT"] = in_flight
+            os.environ["LLM_MAX_QUEUED"] = "0" if in_flight == "0" else "48"
+            result = asyncio.run(scenario(cmc, llm, assets, args))
+            recovered = f"{result['recovered']:.1f}s" if result["recovered"] is not None else "not recovered"
+            print(f"{label:<12} p50 {result['p50']:8.1f} ms  p99 {result['p99']:8.1f} ms  "
+                  f"total {result['seconds']:5.1f}s  {result['outcomes']}  "
+                  f"stale quotes {result['staleQuotes']}  circuits opened {result['breakers']}  "
+                  f"recovery {recovered}")
+
+
+if __name__ == "__main__":
+    main()
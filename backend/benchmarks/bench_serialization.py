@@ -0,0 +1,112 @@
+"""
+Prediction listing serialization throughput at 10k and 100k predictions.
+
+Compares the previous path (Pydantic model_dump per prediction, then
+FastAPI's JSONResponse) with FastAPI's generic jsonable_encoder path, the
+cached per-prediction bytes the stores now keep (first read and warm), the
+columnar format, and gzip/brotli compression of the result. Each path
+includes reading the page from the store. Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --sizes 10000 100000 --store sqlite
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+
+def fill(store, count: int):
+    rng = random.Random(1)
+    for i in range(count):
+        price = rng.uniform(1, 60000)
+        yes = rng.uniform(0.05, 0.95)
+        store.add(dict(
+            asset=rng.choice(["BTC", "ETH", "SOL", "DOGE", "XRP"]),
+            currentPrice=price,
+            predictedPrice=price * 1.05,
+            confidence=rng.uniform(0.5, 0.9),
+            reasoning="Momentum and volume suggest a moderate chance of reaching the target within the window.",
+            predictorType="AI",
+            question=f"Will the asset reach ${price * 1.05:,.2f} by 2026-01-01?",
+            endTimestamp=1767225600.0 + i,
+            yesPrice=yes,
+            noPrice=1 - yes,
+            initialYesPrice=yes,
+            totalLiquidity=1000.0,
+            marketData={"volume_24h": price * 5e4, "market_cap": price * 1e6,
+                        "percent_change_24h": rng.uniform(-5, 5), "percent_change_7d": rng.uniform(-10, 10)}
+        ))
+
+
+def timed(fn, repeat: int) -> tuple:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def run(store, count: int, repeat: int):
+    from app.serialization import brotli, columnar, compress, join_array
+
+    paths = {
+        "model_dump + JSONResponse": lambda: JSONResponse(
+            [p.model_dump(mode="json") for p in store.query(limit=count)]).body,
+        "jsonable_encoder": lambda: JSONResponse(jsonable_encoder(store.query(limit=count))).body,
+        "cached bytes (first read)": None,
+        "cached bytes (warm)": lambda: join_array(b for _, b in store.query_json(limit=count)),
+        "columnar": lambda: columnar(store.query(limit=count)),
+    }
+    if hasattr(store, "_json"):
+        store._json.clear()
+    first, _ = timed(lambda: join_array(b for _, b in store.query_json(limit=count)), 1)
+
+    print(f"\n{count:,} predictions ({type(store).__name__})")
+    bodies = {}
+    for name, fn in paths.items():
+        if fn is None:
+            seconds, body = first, None
+        else:
+            seconds, body = timed(fn, repeat)
+            bodies[name] = body
+        size = f"{len(body) / 1e6:7.2f} MB" if body is not None else " " * 10
+        print(f"  {name:<28} {seconds * 1000:9.1f} ms  {count / seconds:>12,.0f} predictions/s  {size}")
+
+    rows = bodies["cached bytes (warm)"]
+    for encoding in ("gzip", "br"):
+        if encoding == "br" and brotli is None:
+            print("  br                           (brotli not installed)")
+            continue
+        for name, body in (("rows", rows), ("columnar", bodies["columnar"])):
+            seconds, compressed = timed(lambda: compress(body, encoding), repeat)
+            print(f"  {encoding} {name:<23} {seconds * 1000:9.1f} ms  {len(body) / seconds / 1e6:>9,.0f} MB/s"
+                  f"     {len(compressed) / 1e6:7.2f} MB ({len(compressed) / len(body):.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--store", choices=("memory", "sqlite"), default="memory")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    from app.store import InMemoryPredictionStore, SQLitePredictionStore
+
+    for count in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            if args.store == "sqlite":
+                store = SQLitePredictionStore(os.path.join(tmp, "bench.db"), json_cache_size=count)
+            else:
+                store = InMemoryPredictionStore()
+            fill(store, count)
+            run(store, count, args.repeat)
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start benchmark: import time of app.main, time until the lifespan has
+started (liveness) and until /readyz reports ready, each in a fresh
+interpreter. Pass --max-import-ms / --max-startup-ms to fail (exit 1) on a
+regression. Run from the backend directory:
+
+    python -m benchmarks.bench_startup --runs 5 --max-import-ms 1200
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main as main
+imported = time.perf_counter()
+# Heavy SDKs that `import app.main` itself pulled in
+heavy = [m for m in ("openai", "cdp", "cdp_langchain", "solcx") if m in sys.modules]
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    live = time.perf_counter()
+    client.get("/healthz")
+    while client.get("/readyz").status_code != 200 and time.perf_counter() - live < 30:
+        time.sleep(0.01)
+    ready = time.perf_counter()
+print(json.dumps({
+    "import": imported - started,
+    "startup": live - imported,
+    "ready": ready - started,
+    "heavyModulesAtImport": heavy,
+}))
+"""
+
+
+def probe(env: dict) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-startup-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            COINMARKETCAP_API_KEY=os.getenv("COINMARKETCAP_API_KEY", "bench"),
+            AZURE_OPENAI_ENDPOINT=os.getenv("AZURE_OPENAI_ENDPOINT", "http://127.0.0.1:9"),
+            AZURE_OPENAI_API_KEY=os.getenv("AZURE_OPENAI_API_KEY", "bench"),
+            AZURE_OPENAI_API_VERSION=os.getenv("AZURE_OPENAI_API_VERSION", "2024-06-01"),
+            PREDICTION_DB_PATH=os.path.join(tmp, "predictions.db"),
+            SETTLEMENT_ENABLED="false",
+            LOG_LEVEL="WARNING",
+        )
+        runs = [probe(env) for _ in range(args.runs)]
+
+    def median_ms(key: str) -> float:
+        return statistics.median(run[key] for run in runs) * 1000
+
+    import_ms, startup_ms, ready_ms = median_ms("import"), median_ms("startup"), median_ms("ready")
+    print(f"median of {args.runs} cold starts: import {import_ms:.0f} ms, "
+          f"lifespan startup {startup_ms:.0f} ms, ready {ready_ms:.0f} ms")
+    print(f"heavy SDKs imported by app.main: {runs[0]['heavyModulesAtImport'] or 'none'}")
+
+    failed = False
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        print(f"FAIL: import {import_ms:.0f} ms > {args.max_import_ms:.0f} ms")
+        failed = True
+    if args.max_startup_ms is not None and startup_ms > args.max_startup_ms:
+        print(f"FAIL: startup {startup_ms:.0f} ms > {args.max_startup_ms:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Fan-out load test for live updates.
+
+--mode sse (default) runs the app under uvicorn in its own process and
+opens real GET /stream connections from client processes: idle clients
+connect and never read the body, active clients parse every event. Once
+all are subscribed the server publishes price deltas at --rate, and the
+run reports delivery latency, server CPU time and the delivered messages
+per server CPU second (the fan-out capacity of one worker).
+
+--mode broadcaster times Broadcaster.publish in-process, without sockets.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_stream --idle 10000 --active 1000 --events 200 --rate 20
+    python -m benchmarks.bench_stream --mode broadcaster --idle 10000 --active 1000
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000 if values else 0.0
+
+
+def frames(chunk: bytes) -> list:
+    """Decoded events in a chunk of SSE frames."""
+    return [json.loads(frame[6:]) for frame in chunk.split(b"\n\n") if frame.startswith(b"data: ")]
+
+
+async def run_broadcaster(args):
+    from app.realtime import Broadcaster
+
+    if args.memory:
+        # Tracing allocations slows publishing down; keep it out of timing runs
+        tracemalloc.start()
+    broadcaster = Broadcaster(max_buffer=args.buffer, max_dropped=10**9)
+    for _ in range(args.idle):
+        broadcaster.subscribe()
+
+    latencies = []
+    received = 0
+
+    async def consume(subscriber):
+        nonlocal received
+        while received < args.events * args.active:
+            chunk = await subscriber.next(timeout=5)
+            if chunk is None:
+                return
+            now = time.perf_counter()
+            for event in frames(chunk):
+                latencies.append(now - event["sentAt"])
+                received += 1
+
+    consumers = [asyncio.create_task(consume(broadcaster.subscribe())) for _ in range(args.active)]
+    memory_before = tracemalloc.get_traced_memory()[0]
+
+    publish_times = []
+    started = time.perf_counter()
+    for i in range(args.events):
+        t = time.perf_counter()
+        broadcaster.publish({"type": "price", "asset": "BTC", "price": 60000 + i, "sentAt": t})
+        publish_times.append(time.perf_counter() - t)
+        await asyncio.sleep(1 / args.rate if args.rate else 0)
+    await asyncio.gather(*consumers)
+    elapsed = time.perf_counter() - started
+    memory_after = tracemalloc.get_traced_memory()[0]
+
+    print(f"subscribers: {args.idle} idle + {args.active} active, log of {args.buffer} events")
+    print(f"published {args.events} events in {elapsed:.2f}s; delivered {received} messages "
+          f"({received / elapsed:,.0f} msg/s to active subscribers)")
+    print(f"publish cost: mean {statistics.mean(publish_times) * 1e3:.3f} ms, "
+          f"max {max(publish_times) * 1e3:.3f} ms per event")
+    print(f"delivery latency: p50 {percentile(latencies, 0.5):.2f} ms, p99 {percentile(latencies, 0.99):.2f} ms")
+    if args.memory:
+        print(f"log memory: {(memory_after - memory_before) / 2**20:.2f} MiB")
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def serve(args):
+    """Server process: the app on uvicorn plus a publisher that starts once every client is subscribed."""
+    import uvicorn
+
+    from app import main as app_main
+
+    broadcaster = app_main.broadcaster
+    server = uvicorn.Server(uvicorn.Config(app_main.app, port=args.port, log_level="warning",
+                                           backlog=4096, timeout_keep_alive=600))
+
+    async def publish():
+        deadline = time.monotonic() + args.connect_timeout
+        while len(broadcaster.subscribers) < args.idle + args.active and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+        subscribers = len(broadcaster.subscribers)
+        await asyncio.sleep(1)
+        cpu, started = cpu_seconds(), time.monotonic()
+        for i in range(args.events):
+            broadcaster.publish({"type": "price", "asset": "BTC", "price": 60000 + i, "sentAt": time.time()})
+            await asyncio.sleep(1 / args.rate)
+        # Let the last events drain before reading the CPU counter
+        while any(s.cursor < broadcaster.sequence for s in list(broadcaster.subscribers)[:args.active]):
+            if time.monotonic() - started > args.events / args.rate + 60:
+                break
+            await asyncio.sleep(0.05)
+        result = {"subscribers": subscribers, "cpu": cpu_seconds() - cpu, "wall": time.monotonic() - started,
+                  "stats": broadcaster.stats}
+        print(json.dumps(result), flush=True)
+        # Clients close once their events arrive; then stop
+        while broadcaster.subscribers and time.monotonic() - started < args.events / args.rate + 120:
+            await asyncio.sleep(0.2)
+        server.should_exit = True
+
+    publisher = asyncio.create_task(publish())
+    await server.serve()
+    await publisher
+
+
+async def clients(url: str, idle: int, active: int, events: int, hold: float) -> dict:
+    """Client process: opens idle and active /stream connections and times event delivery."""
+    import aiohttp
+
+    latencies, errors = [], 0
+    connect = asyncio.Semaphore(100)
+    session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0),
+                                    timeout=aiohttp.ClientTimeout(total=None, sock_connect=60))
+
+    async def open_stream():
+        async with connect:
+            response = await session.get(url)
+            response.raise_for_status()
+            return response
+
+    async def idle_client(done: asyncio.Event):
+        nonlocal errors
+        try:
+            response = await open_stream()
+        except Exception:
+            errors += 1
+            return
+        # Never reads the body; the server keeps writing until the socket buffers fill
+        await done.wait()
+        response.close()
+
+    async def active_client():
+        nonlocal errors
+        try:
+            response = await open_stream()
+            received, buffer = 0, b""
+            while received < events:
+                buffer += await response.content.readany()
+                chunk, _, buffer = buffer.rpartition(b"\n\n")
+                now = time.time()
+                for event in frames(chunk):
+                    latencies.append(now - event["sentAt"])
+                    received += 1
+            response.close()
+        except Exception:
+            errors += 1
+
+    done = asyncio.Event()
+    idle_tasks = [asyncio.create_task(idle_client(done)) for _ in range(idle)]
+    if active:
+        await asyncio.gather(*(active_client() for _ in range(active)))
+    else:
+        await asyncio.sleep(hold)
+    done.set()
+    await asyncio.gather(*idle_tasks)
+    await session.close()
+    return {"latencies": latencies, "errors": errors}
+
+
+def client_worker(params: tuple) -> dict:
+    return asyncio.run(clients(*params))
+
+
+def run_sse(args):
+    port = args.port or free_port()
+    env = dict(os.environ, PREDICTION_STORE="memory", SETTLEMENT_ENABLED="false", STREAM_HEARTBEAT="600")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_stream", "--serve", "--port", str(port),
+         "--idle", str(args.idle), "--active", str(args.active), "--events", str(args.events),
+         "--rate", str(args.rate)],
+        stdout=subprocess.PIPE, env=env, text=True
+    )
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/stream"
+        procs = args.client_procs
+        hold = args.events / args.rate + 10
+        params = [(url, args.idle // procs + (i < args.idle % procs), args.active // procs + (i < args.active % procs),
+                   args.events, hold) for i in range(procs)]
+        with multiprocessing.Pool(procs) as pool:
+            results = pool.map(client_worker, params)
+        result = json.loads(server.stdout.readline())
+    finally:
+        server.wait(timeout=180)
+
+    latencies = [latency for r in results for latency in r["latencies"]]
+    delivered = result["stats"]["published"] * result["subscribers"]
+    print(f"SSE: {args.idle} idle + {args.active} active clients ({result['subscribers']} subscribed), "
+          f"{args.events} events at {args.rate:g}/s, {os.cpu_count()} CPU(s) shared by server and clients")
+    print(f"connection errors: {sum(r['errors'] for r in results)}; "
+          f"active deliveries: {len(latencies)} of {args.active * args.events}")
+    print(f"delivery latency: p50 {percentile(latencies, 0.5):.1f} ms, p99 {percentile(latencies, 0.99):.1f} ms")
+    print(f"server: {result['cpu']:.2f} CPU s over {result['wall']:.2f} s "
+          f"({result['cpu'] / result['wall']:.0%} of a core), "
+          f"{delivered / result['cpu']:,.0f} messages per CPU second, "
+          f"{result['cpu'] / args.events * 1e3:.2f} ms CPU per event")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"server did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("sse", "broadcaster"), default="sse")
+    parser.add_argument("--idle", type=int, default=10000)
+    parser.add_argument("--active", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=20.0, help="Events per second")
+    parser.add_argument("--buffer", type=int, default=256, help="broadcaster mode: shared log length")
+    parser.add_argument("--memory", action="store_true", help="broadcaster mode: report log memory (slower)")
+    parser.add_argument("--client-procs", type=int, default=4)
+    parser.add_argument("--connect-timeout", type=float, default=300.0)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args))
+    elif args.mode == "sse":
+        run_sse(args)
+    else:
+        asyncio.run(run_broadcaster(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Instrumentation overhead: cost of one span (unsampled and sampled) and
+request throughput through TelemetryMiddleware at several sample rates.
+Run from the backend directory:
+
+    python -m benchmarks.bench_telemetry
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app.telemetry import Trace, TelemetryMiddleware, _current_trace, span
+
+
+def span_cost(iterations: int, sampled: bool) -> float:
+    token = _current_trace.set(Trace("bench", sampled))
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            with span("bench"):
+                pass
+        return (time.perf_counter() - started) / iterations
+    finally:
+        _current_trace.reset(token)
+
+
+async def throughput(sample_rate: float, requests: int) -> float:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        with span("work"):
+            return {"ok": True}
+
+    if sample_rate is not None:
+        app.add_middleware(TelemetryMiddleware, sample_rate=sample_rate)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/ping")
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--spans", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=3000)
+    args = parser.parse_args()
+
+    print(f"span: {span_cost(args.spans, False) * 1e6:.2f} us unsampled, "
+          f"{span_cost(args.spans, True) * 1e6:.2f} us sampled")
+    for label, rate in (("no middleware", None), ("sample 0", 0.0), ("sample 0.01", 0.01), ("sample 1", 1.0)):
+        print(f"{label}: {asyncio.run(throughput(rate, args.requests)):,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+End-to-end load test of the API against local stand-ins for its upstreams:
+a CoinMarketCap quotes stub, an OpenAI-compatible chat-completions stub with
+configurable latency, and a local EVM devnet for AgentService (anvil when it
+is on PATH, otherwise the automining JSON-RPC stub from stubs.py).
+
+The app is served by uvicorn on its own thread and driven over HTTP through
+these scenarios:
+
+    create      market-creation burst   POST /predictions/ai
+    list        read-heavy listing      GET /predictions (pages, filters, ETags)
+    bet         bet storm               POST /support
+    settle      settlement wave         expired on-chain markets resolved
+                                        through AgentService.resolve_markets
+
+Each reports RPS and p50/p99 latency. --json writes the results;
+--baseline compares against an earlier --json file and exits 1 when RPS
+drops or p99 grows by more than --tolerance. Run from the backend directory:
+
+    python -m benchmarks.loadtest --llm-latency 0.2 --json loadtest.json
+    python -m benchmarks.loadtest --baseline loadtest.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from .stubs import StubServer, chain_app, cmc_app, openai_app
+
+SCENARIOS = ("create", "list", "bet", "settle")
+
+# Minimal PredictionMarket ABI for resolve transactions when no compiled
+# artifact is available (compiling needs solc)
+RESOLVE_ABI = [{
+    "name": "resolve",
+    "type": "function",
+    "inputs": [{"name": "_outcome", "type": "bool"}],
+    "outputs": [],
+    "stateMutability": "nonpayable",
+}]
+
+
+class AppServer:
+    """Runs the FastAPI app under uvicorn on a background thread."""
+
+    def __init__(self, app, host: str = "127.0.0.1"):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=0, log_level="warning"))
+        self.host = host
+        self.port = None
+        self.loop = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.server.serve())
+        self.loop.close()
+
+    def start(self) -> "AppServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        while not self.server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("app server failed to start")
+            time.sleep(0.01)
+        self.port = self.server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+    async def call(self, fn, *args):
+        """Run fn on the server's event loop (app state is not thread-safe)."""
+        async def invoke():
+            return fn(*args)
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(invoke(), self.loop))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@contextmanager
+def devnet(kind: str, chain_id: int, block_time: float = None):
+    """
+    Yield (kind, URL) of a local EVM node: anvil when requested or available,
+    else the RPC stub. block_time makes anvil mine on an interval instead of
+    per transaction.
+    """
+    anvil = shutil.which("anvil")
+    if kind == "anvil" or (kind == "auto" and anvil):
+        if not anvil:
+            raise SystemExit("anvil not found on PATH")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        command = [anvil, "--port", str(port), "--chain-id", str(chain_id), "--silent"]
+        if block_time:
+            command += ["--block-time", str(block_time)]
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.time() + 15
+            while True:
+                try:
+                    httpx.post(url, json={"jsonrpc": "2.0", "id": 1, "method": "eth_chainId"}, timeout=1)
+                    break
+                except httpx.TransportError:
+                    if time.time() > deadline:
+                        raise RuntimeError("anvil did not start")
+                    time.sleep(0.1)
+            yield "anvil", url
+        finally:
+            process.terminate()
+            process.wait(timeout=5)
+    else:
+        with StubServer(chain_app(chain_id=chain_id)) as node:
+            yield "rpc stub", node.url
+
+
+class DevnetWallet:
+    """Unlocked devnet account standing in for the CDP wallet (address, w3, load_contract, deploy_contract)."""
+
+    def __init__(self, w3, address: str):
+        self.w3 = w3
+        self.address = address
+        self.default_address = address
+
+    def load_contract(self, address: str, abi: list):
+        return self.w3.eth.contract(address=self.w3.to_checksum_address(address), abi=abi)
+
+    def deploy_contract(self, abi: list, bytecode: str, constructor_args: list):
+        """Send a deployment; like the CDP SmartContract, .wait() returns it with contract_address set."""
+        tx_hash = self.w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*constructor_args).transact(
+            {"from": self.address}
+        )
+        return _Deployment(self.w3, tx_hash)
+
+
+class _Deployment:
+    def __init__(self, w3, tx_hash):
+        self.w3 = w3
+        self.tx_hash = tx_hash
+        self.contract_address = None
+
+    def wait(self) -> "_Deployment":
+        receipt = self.w3.eth.wait_for_transaction_receipt(self.tx_hash)
+        if receipt["status"] != 1:
+            raise RuntimeError(f"deployment {self.tx_hash.hex()} reverted")
+        self.contract_address = receipt["contractAddress"]
+        return self
+
+
+def devnet_agent_service(rpc_url: str):
+    """AgentService whose wallet is the devnet's first unlocked account."""
+    from web3 import Web3
+
+    from app.agent_service import AgentService
+    from app.contracts import load_artifact
+
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    wallet = DevnetWallet(w3, w3.to_checksum_address(w3.eth.accounts[0]))
+    try:
+        abi = load_artifact("PredictionMarket")["abi"]
+    except Exception:
+        abi = RESOLVE_ABI
+
+    class DevnetAgentService(AgentService):
+        wallet = property(lambda self: wallet)
+        _market_artifact = property(lambda self: {"abi": abi})
+
+    return DevnetAgentService()
+
+
+def summarize(name: str, latencies: list, errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+
+    def percentile(q: float) -> float:
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {
+        "scenario": name,
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50Ms": round(percentile(0.50), 2),
+        "p99Ms": round(percentile(0.99), 2),
+    }
+
+
+async def drive(name: str, total: int, concurrency: int, request) -> dict:
+    """Send total requests from concurrency workers; request(i) returns an httpx.Response."""
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, latencies, errors, time.perf_counter() - started)
+
+
+def seed_markets(main, count: int, assets: list) -> list:
+    """Open markets added the way POST /predictions/ai stores them."""
+    ids = []
+    now = time.time()
+    for i in range(count):
+        yes = random.uniform(0.2, 0.8)
+        price = 100.0 + i
+        ids.append(main.save_prediction({
+            "asset": assets[i % len(assets)],
+            "currentPrice": price,
+            "targetPrice": price * 1.05,
+            "confidence": 0.6,
+            "reasoning": "load test",
+            "question": f"Will {assets[i % len(assets)]} reach ${price * 1.05:,.2f}?",
+            "endTimestamp": now + 86400,
+            "yesPrice": yes,
+            "noPrice": 1 - yes,
+            "totalLiquidity": 1000.0,
+        }).id)
+    return ids
+
+
+async def scenario_create(client, server, args) -> dict:
+    assets = [f"A{i}" for i in range(args.assets)]
+    return await drive("create", args.creates, args.concurrency, lambda i: client.post(
+        "/predictions/ai", params={"asset": assets[i % len(assets)]}
+    ))
+
+
+async def scenario_list(client, server, args) -> dict:
+    import app.main as main
+
+    await server.call(seed_markets, main, args.seed, [f"A{i}" for i in range(args.assets)])
+    etags = {}
+
+    async def request(i):
+        rng = random.Random(i)
+        params = {"limit": 50, "cursor": rng.randrange(args.seed)}
+        if rng.random() < 0.3:
+            params["asset"] = f"A{rng.randrange(args.assets)}"
+        key = tuple(sorted(params.items()))
+        # Polling clients revalidate pages they have already seen
+        headers = {"If-None-Match": etags[key]} if key in etags and rng.random() < 0.5 else {}
+        response = await client.get("/predictions", params=params, headers=headers)
+        if "etag" in response.headers:
+            etags[key] = response.headers["etag"]
+        return response
+
+    return await drive("list", args.reads, args.concurrency, request)
+
+
+async def scenario_bet(client, server, args) -> dict:
+    import app.main as main
+
+    markets = await server.call(seed_markets, main, args.bet_markets, ["BTC", "ETH", "SOL"])
+    return await drive("bet", args.bets, args.concurrency, lambda i: client.post("/support", json={
+        "predictionId": random.choice(markets),
+        "amount": round(random.uniform(1, 50), 2),
+        "supportAi": random.random() < 0.5,
+        "userAddress": f"0x{random.randrange(1000):040x}",
+    }))
+
+
+async def scenario_settle(client, server, args) -> dict:
+    import app.main as main
+
+    resolved_at = {}
+    on_resolved = main.settlement.on_resolved
+
+    def record(prediction_id, outcome, price):
+        resolved_at[prediction_id] = time.perf_counter()
+        on_resolved(prediction_id, outcome, price)
+
+    def expire(count):
+        main.settlement.on_resolved = record
+        now = time.time()
+        predictions = [main.store.add(dict(
+            asset=("BTC", "ETH", "SOL")[i % 3],
+            currentPrice=100.0,
+            predictedPrice=105.0,
+            confidence=0.6,
+            reasoning="load test",
+            predictorType="AI",
+            question="Settlement wave",
+            endTimestamp=now - 1,
+            yesPrice=0.5,
+            noPrice=0.5,
+            totalLiquidity=1000.0,
+            marketAddress=f"0x{0xabc000 + i:040x}",
+        )) for i in range(count)]
+        for prediction in predictions:
+            main.settlement.schedule(prediction)
+        return [p.id for p in predictions]
+
+    started = time.perf_counter()
+    ids = await server.call(expire, args.settlements)
+    deadline = time.time() + args.timeout
+    while len(resolved_at) < len(ids) and time.time() < deadline:
+        await asyncio.sleep(0.01)
+    elapsed = (max(resolved_at.values()) if resolved_at else time.perf_counter()) - started
+    await server.call(setattr, main.settlement, "on_resolved", on_resolved)
+    return summarize("settle", [resolved_at[i] - started for i in ids if i in resolved_at],
+                     len(ids) - len(resolved_at), elapsed)
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Regressions versus a baseline run: lower RPS or higher p99 beyond tolerance."""
+    previous = {r["scenario"]: r for r in baseline}
+    failures = []
+    for result in results:
+        before = previous.get(result["scenario"])
+        if before is None:
+            continue
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            failures.append(f"{result['scenario']}: {result['rps']:,.0f} req/s < baseline {before['rps']:,.0f}")
+        if result["p99Ms"] > before["p99Ms"] * (1 + tolerance):
+            failures.append(f"{result['scenario']}: p99 {result['p99Ms']:.1f} ms > baseline {before['p99Ms']:.1f}")
+        if result["errors"] > before["errors"]:
+            failures.append(f"{result['scenario']}: {result['errors']} errors > baseline {before['errors']}")
+    return failures
+
+
+async def run(url: str, server: AppServer, args) -> list:
+    scenarios = {"create": scenario_create, "list": scenario_list, "bet": scenario_bet, "settle": scenario_settle}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        deadline = time.time() + 30
+        while (await client.get("/readyz")).status_code != 200:
+            if time.time() > deadline:
+                raise RuntimeError("app did not become ready")
+            await asyncio.sleep(0.05)
+        results = []
+        for name in args.scenarios:
+            result = await scenarios[name](client, server, args)
+            results.append(result)
+            print(f"{result['scenario']:<8} {result['requests']:>7,} {result['errors']:>7,} "
+                  f"{result['rps']:>10,.1f} {result['p50Ms']:>10.2f} {result['p99Ms']:>10.2f}")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--creates", type=int, default=500)
+    parser.add_argument("--assets", type=int, default=25, help="distinct assets in the creation burst")
+    parser.add_argument("--reads", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=5000, help="markets in the store before the listing scenario")
+    parser.add_argument("--bets", type=int, default=5000)
+    parser.add_argument("--bet-markets", type=int, default=100)
+    parser.add_argument("--settlements", type=int, default=500)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per chat completion")
+    parser.add_argument("--cmc-latency", type=float, default=0.05)
+    parser.add_argument("--devnet", choices=("auto", "anvil", "stub"), default="auto")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    chain_id = 84532
+    with tempfile.TemporaryDirectory() as tmp, \
+            StubServer(cmc_app(args.cmc_latency)) as cmc, \
+            StubServer(openai_app(args.llm_latency)) as llm, \
+            devnet(args.devnet, chain_id) as (node_kind, rpc_url):
+        os.environ.update({
+            "COINMARKETCAP_API_KEY": "bench",
+            "COINMARKETCAP_BASE_URL": f"{cmc.url}/v1",
+            "AZURE_OPENAI_ENDPOINT": llm.url,
+            "AZURE_OPENAI_API_KEY": "bench",
+            "AZURE_OPENAI_API_VERSION": "2024-06-01",
+            "AZURE_OPENAI_DEPLOYMENT": "bench",
+            "BASE_RPC_URL": rpc_url,
+            "PREDICTION_DB_PATH": os.path.join(tmp, "predictions.db"),
+            "SETTLEMENT_BATCH_WINDOW": "0.5",
+        })
+        import logging
+
+        import app.main as app_main
+
+        logging.getLogger().setLevel(logging.WARNING)
+        app_main.agent_service = app_main.settlement.agent_service = devnet_agent_service(rpc_url)
+
+        print(f"devnet: {node_kind}, LLM latency {args.llm_latency * 1000:.0f} ms, "
+              f"quote latency {args.cmc_latency * 1000:.0f} ms, concurrency {args.concurrency}")
+        print(f"{'scenario':<8} {'requests':>7} {'errors':>7} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        with AppServer(app_main.app) as server:
+            results = asyncio.run(run(server.url, server, args))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "args": vars(args)}, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f)["results"], args.tolerance)
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+Local stand-ins for the upstream services used by the backend, for benchmarks.
+
+Each stub runs an aiohttp server on its own thread and event loop so that a
+benchmark can still make progress when the code under test blocks its loop.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+from aiohttp import web
+
+
+# Symbols the CoinMarketCap stub rejects, as the real API does, by failing
+# the whole request with 400
+UNKNOWN_SYMBOLS = {"NOTACOIN"}
+
+
+def fake_quote(symbol: str) -> dict:
+    """Build a CoinMarketCap-shaped quote entry for a symbol."""
+    seed = sum(ord(c) for c in symbol)
+    # Small jitter so prices move between calls but stay in the same buckets
+    price = (10.0 + seed * 37.0) * (1 + random.uniform(-0.0005, 0.0005))
+    return {
+        "symbol": symbol,
+        "quote": {
+            "USD": {
+                "price": price,
+                "market_cap": price * 1_000_000,
+                "volume_24h": price * 50_000,
+                "percent_change_1h": round((seed % 20) / 10 - 1, 2),
+                "percent_change_24h": round((seed % 100) / 10 - 5, 2),
+                "percent_change_7d": round((seed % 200) / 10 - 10, 2),
+            }
+        },
+    }
+
+
+async def injected_fault(app: web.Application):
+    """
+    Simulate an outage set through app["fault"]["mode"] while the stub runs:
+    "error" answers 503 and "slow" stalls for app["fault"]["delay"] seconds
+    before answering normally.
+    """
+    fault = app["fault"]
+    if fault["mode"] == "error":
+        return web.json_response({"error": {"message": "injected outage"}}, status=503)
+    if fault["mode"] == "slow":
+        await asyncio.sleep(fault["delay"])
+    return None
+
+
+class StubServer:
+    """Runs an aiohttp application in a background thread."""
+
+    def __init__(self, app: web.Application, host: str = "127.0.0.1", port: int = 0):
+        self.app = app
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.host, self.port, backlog=4096)
+        self._loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.run_until_complete(self._runner.cleanup())
+        self._loop.close()
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def cmc_app(latency: float = 0.05) -> web.Application:
+    """
+    CoinMarketCap `quotes/latest` stub with a fixed response latency (see
+    injected_fault for outages); requests naming UNKNOWN_SYMBOLS get a 400.
+    """
+    app = web.Application()
+    app["stats"] = {"requests": 0}
+    app["fault"] = {"mode": None, "delay": 30.0}
+
+    async def quotes_latest(request: web.Request) -> web.Response:
+        app["stats"]["requests"] += 1
+        failure = await injected_fault(app)
+        if failure is not None:
+            return failure
+        await asyncio.sleep(latency)
+        symbols = [s for s in request.query.get("symbol", "").upper().split(",") if s]
+        unknown = [s for s in symbols if s in UNKNOWN_SYMBOLS]
+        if unknown:
+            values = "values" if len(unknown) > 1 else "value"
+            return web.json_response({
+                "status": {"error_code": 400, "error_message": f'Invalid {values} for "symbol": "{",".join(unknown)}"'}
+            }, status=400)
+        return web.json_response({
+            "status": {"error_code": 0, "timestamp": time.time()},
+            "data": {s: fake_quote(s) for s in symbols},
+        })
+
+    app.router.add_get("/v1/cryptocurrency/quotes/latest", quotes_latest)
+    return app
+
+
+def openai_app(
+    latency: float = 0.5, content: str = None, malformed_rate: float = 0.0, entry_latency: float = 0.0
+) -> web.Application:
+    """
+    OpenAI/Azure-compatible chat-completions stub with a fixed latency.
+
+    With malformed_rate, that fraction of replies is wrapped in a code fence,
+    wrapped in prose, or has probabilities that do not sum to 1; repair
+    requests are always answered with clean JSON. Batched prompts (one
+    "id: ..." line per market) get a {"predictions": [...]} reply, taking
+    entry_latency longer per extra market; with malformed_rate, that fraction
+    of entries is invalid. Usage reports prompt tokens as characters / 4.
+    Outages can be simulated with injected_fault.
+    """
+    app = web.Application()
+    app["stats"] = {"requests": 0, "json_mode": 0, "repairs": 0, "batches": 0, "prompt_tokens": 0}
+    app["fault"] = {"mode": None, "delay": 30.0}
+
+    def entry() -> dict:
+        yes = round(random.uniform(0.2, 0.8), 2)
+        return {
+            "yesProbability": yes,
+            "noProbability": round(1 - yes, 2),
+            "confidence": 0.7,
+            "reasoning": "Stubbed completion.",
+        }
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        payload = await request.json()
+        app["stats"]["requests"] += 1
+        failure = await injected_fault(app)
+        if failure is not None:
+            return failure
+        if payload.get("response_format", {}).get("type") == "json_object":
+            app["stats"]["json_mode"] += 1
+        messages = payload.get("messages", [])
+        prompt_tokens = sum(len(m.get("content") or "") for m in messages) // 4
+        app["stats"]["prompt_tokens"] += prompt_tokens
+        repair = len(messages) > 2
+        if repair:
+            app["stats"]["repairs"] += 1
+        ids = [line.split(":", 1)[1].strip() for line in (messages[-1].get("content") or "").splitlines()
+               if line.startswith("id:")] if messages else []
+        await asyncio.sleep(latency + entry_latency * max(len(ids) - 1, 0))
+        prediction = entry()
+        body = content or json.dumps(prediction)
+        if ids and not content:
+            app["stats"]["batches"] += 1
+            entries = [dict(entry(), id=i) for i in ids]
+            for item in entries:
+                if random.random() < malformed_rate:
+                    item["noProbability"] = item["yesProbability"] + 0.3
+            body = json.dumps({"predictions": entries})
+        elif not content and not repair and random.random() < malformed_rate:
+            kind = random.randrange(3)
+            if kind == 0:
+                body = f"```json\n{body}\n```"
+            elif kind == 1:
+                body = f"Here is my analysis of the market:\n{body}\nLet me know if you need more detail."
+            else:
+                body = json.dumps(dict(prediction, noProbability=prediction["yesProbability"] + 0.3))
+        return web.json_response({
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": body},
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 0, "total_tokens": prompt_tokens},
+        })
+
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", chat_completions)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    return app
+
+
+def chain_app(latency: float = 0.0, chain_id: int = 84532) -> web.Application:
+    """
+    Minimal automining JSON-RPC node for benchmarks when no EVM devnet
+    (e.g. anvil) is available. Accepts eth_sendTransaction from any account,
+    enforces per-account nonces, mines one block per transaction and
+    answers eth_call / eth_getLogs with empty results.
+    """
+    from eth_utils import keccak
+
+    app = web.Application()
+    app["stats"] = {"requests": 0, "calls": 0, "transactions": 0}
+    state = {"block": 1, "nonces": {}, "receipts": {}}
+    account = "0x" + "11" * 20
+
+    def block(number: int) -> dict:
+        return {
+            "number": hex(number),
+            "hash": "0x" + keccak(number.to_bytes(32, "big")).hex(),
+            "parentHash": "0x" + keccak((number - 1).to_bytes(32, "big")).hex(),
+            "timestamp": hex(int(time.time())),
+            "baseFeePerGas": hex(1),
+            "gasLimit": hex(30_000_000),
+            "gasUsed": "0x0",
+            "miner": "0x" + "00" * 20,
+            "transactions": [],
+        }
+
+    def send_transaction(tx: dict) -> str:
+        sender = tx["from"].lower()
+        expected = state["nonces"].get(sender, 0)
+        nonce = int(tx.get("nonce", hex(expected)), 16)
+        if nonce != expected:
+            raise ValueError(f"nonce {'too low' if nonce < expected else 'too high'}: expected {expected}, got {nonce}")
+        state["nonces"][sender] = expected + 1
+        state["block"] += 1
+        tx_hash = "0x" + keccak(f"{sender}:{nonce}".encode()).hex()
+        state["receipts"][tx_hash] = {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockNumber": hex(state["block"]),
+            "blockHash": block(state["block"])["hash"],
+            "from": tx["from"],
+            "to": tx.get("to"),
+            "status": "0x1",
+            "gasUsed": hex(50_000),
+            "cumulativeGasUsed": hex(50_000),
+            "effectiveGasPrice": hex(1),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "type": "0x2",
+        }
+        app["stats"]["transactions"] += 1
+        return tx_hash
+
+    def dispatch(method: str, params: list):
+        if method == "eth_chainId":
+            return hex(chain_id)
+        if method == "net_version":
+            return str(chain_id)
+        if method == "eth_accounts":
+            return [account]
+        if method == "eth_blockNumber":
+            return hex(state["block"])
+        if method == "eth_getBlockByNumber":
+            tag = params[0]
+            return block(state["block"] if tag in ("latest", "pending", "safe", "finalized") else int(tag, 16))
+        if method == "eth_getTransactionCount":
+            return hex(state["nonces"].get(params[0].lower(), 0))
+        if method in ("eth_gasPrice", "eth_maxPriorityFeePerGas"):
+            return hex(1_000_000_000)
+        if method == "eth_estimateGas":
+            return hex(100_000)
+        if method == "eth_sendTransaction":
+            return send_transaction(params[0])
+        if method == "eth_getTransactionReceipt":
+            return state["receipts"].get(params[0])
+        if method == "eth_call":
+            app["stats"]["calls"] += 1
+            return "0x" + "00" * 32
+        if method == "eth_getLogs":
+            return []
+        raise KeyError(method)
+
+    def handle(call: dict) -> dict:
+        try:
+            result = dispatch(call["method"], call.get("params") or [])
+            return {"jsonrpc": "2.0", "id": call.get("id"), "result": result}
+        except KeyError:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32601, "message": "Method not found"}}
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": call.get("id"), "error": {"code": -32000, "message": str(e)}}
+
+    async def rpc(request: web.Request) -> web.Response:
+        app["stats"]["requests"] += 1
+        payload = await request.json()
+        if latency:
+            await asyncio.sleep(latency)
+        if isinstance(payload, list):
+            return web.json_response([handle(call) for call in payload])
+        return web.json_response(handle(payload))
+
+    app.router.add_post("/", rpc)
+    return app
@@ -1,21 +1,70 @@
 import React, { useEffect, useState } from 'react';
 import PredictionCard from './PredictionCard';
-import { Prediction } from '../types';
+import { Prediction, StreamEvent } from '../types';
 import { predictionApi } from '../services/api';
 
 const PredictionList: React.FC = () => {
   const [predictions, setPredictions] = useState<Prediction[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Cursor for the next (older) page; undefined once everything is loaded
+  const [nextCursor, setNextCursor] = useState<string | undefined>();
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchPredictions();
+    return predictionApi.subscribeToUpdates(applyUpdate);
   }, []);
 
+  // Apply stream deltas in place instead of refetching the whole list
+  const applyUpdate = (event: StreamEvent) => {
+    setPredictions(current => {
+      switch (event.type) {
+        case 'market':
+          if (current.some(p => p.id === event.prediction.id)) return current;
+          return [event.prediction, ...current];
+        case 'resolved':
+          return current.map(p =>
+            p.id === event.id
+              ? { ...p, resolved: true, outcome: event.outcome, settlementPrice: event.settlementPrice }
+              : p
+          );
+        case 'odds':
+          return current.map(p =>
+            p.id === event.id ? { ...p, yesPrice: event.yesPrice, noPrice: event.noPrice } : p
+          );
+        case 'price':
+          return current.map(p =>
+            p.asset === event.asset && !p.resolved && p.marketData
+              ? {
+                  ...p,
+                  marketData: {
+                    ...p.marketData,
+                    current_price: event.price,
+                    percent_change_24h: event.percent_change_24h
+                  }
+                }
+              : p
+          );
+        default:
+          return current;
+      }
+    });
+  };
+
+  // Pages arrive newest first; keep markets the stream already delivered
+  const appendPage = (page: Prediction[]) => {
+    setPredictions(current => {
+      const seen = new Set(current.map(p => p.id));
+      return [...current, ...page.filter(p => !seen.has(p.id))];
+    });
+  };
+
   const fetchPredictions = async () => {
     try {
-      const data = await predictionApi.getAllPredictions();
-      setPredictions(data);
+      const page = await predictionApi.getPredictions();
+      appendPage(page.predictions);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       setError('Failed to load predictions');
       console.error('Error fetching predictions:', err);
@@ -24,11 +73,27 @@ const PredictionList: React.FC = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await predictionApi.getPredictions(nextCursor);
+      appendPage(page.predictions);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error loading more predictions:', err);
+      setError('Failed to load predictions');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleCreateAIPrediction = async () => {
     try {
       setLoading(true);
       const newPrediction = await predictionApi.getAIPrediction('BTC');
-      await fetchPredictions(); // 重新获取所有预测
+      // The stream may already have delivered it; applyUpdate skips duplicates
+      applyUpdate({ type: 'market', prediction: newPrediction });
     } catch (err) {
       console.error('Error creating AI prediction:', err);
       setError('Failed to create AI prediction');
@@ -59,6 +124,15 @@ const PredictionList: React.FC = () => {
             .map(prediction => (
               <PredictionCard key={prediction.id} prediction={prediction} isAI={true} />
             ))}
+          {nextCursor && (
+            <button
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              className="mt-4 bg-gray-200 px-4 py-2 rounded"
+            >
+              {loadingMore ? 'Loading...' : 'Load more'}
+            </button>
+          )}
         </div>
       </div>
     </div>
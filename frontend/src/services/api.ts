@@ -1,12 +1,15 @@
 import axios from 'axios';
-import { Prediction } from '../types';
+import { BetQuote, Prediction, PredictionPage, StreamEvent } from '../types';
 
 const API_URL = 'http://localhost:8000';
 
 export const predictionApi = {
-  getAllPredictions: async (): Promise<Prediction[]> => {
-    const response = await axios.get(`${API_URL}/predictions`);
-    return response.data;
+  // One page of AI markets, newest first (the order stream updates are prepended in)
+  getPredictions: async (cursor?: string, limit = 50): Promise<PredictionPage> => {
+    const response = await axios.get(`${API_URL}/predictions`, {
+      params: { limit, cursor, order: 'desc', predictorType: 'AI' }
+    });
+    return { predictions: response.data, nextCursor: response.headers['x-next-cursor'] };
   },
 
   getAIPrediction: async (asset: string): Promise<Prediction> => {
@@ -21,6 +24,13 @@ export const predictionApi = {
     return response.data;
   },
 
+  quoteBet: async (predictionId: number, amount: number, supportAi: boolean): Promise<BetQuote> => {
+    const response = await axios.get(`${API_URL}/predictions/${predictionId}/quote`, {
+      params: { side: supportAi ? 'yes' : 'no', amount }
+    });
+    return response.data;
+  },
+
   supportPrediction: async (
     predictionId: number,
     amount: number,
@@ -32,5 +42,12 @@ export const predictionApi = {
       supportAi
     });
     return response.data;
+  },
+
+  // Live deltas over server-sent events; returns an unsubscribe function
+  subscribeToUpdates: (onEvent: (event: StreamEvent) => void): (() => void) => {
+    const source = new EventSource(`${API_URL}/stream`);
+    source.onmessage = (message) => onEvent(JSON.parse(message.data));
+    return () => source.close();
   }
 };
\ No newline at end of file
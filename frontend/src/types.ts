@@ -18,6 +18,31 @@ export interface Prediction {
   marketData?: MarketData;
   supportersCount?: number;
   totalSupport?: number;
+  yesPrice?: number;
+  noPrice?: number;
+  resolved?: boolean;
+  outcome?: boolean;
+  settlementPrice?: number;
+}
+
+export interface PredictionPage {
+  predictions: Prediction[];
+  // Pass back to fetch the next (older) page; undefined on the last page
+  nextCursor?: string;
+}
+
+export type StreamEvent =
+  | { type: 'market'; prediction: Prediction }
+  | { type: 'price'; asset: string; price: number; percent_change_24h: number }
+  | { type: 'resolved'; id: number; outcome: boolean; settlementPrice: number }
+  | { type: 'odds'; id: number; yesPrice: number; noPrice: number };
+
+export interface BetQuote {
+  shares: number;
+  averagePrice: number;
+  yesPriceBefore: number;
+  yesPriceAfter: number;
+  slippage: number;
 }
 
 export interface Stake {